@@ -69,29 +69,10 @@ STANDARD_PARTS = [
     {'part_label': 'Logic Level Converter', 'manufacturer': 'Generic', 'mpn': 'Logic Level 4-Ch', 'category': 'tooling', 'kind': 'level_shifter', 'vcc_min': 3.3, 'vcc_max': 5.0, 'notes': 'Bi-directional'}
 ]
 
-def main():
-    # 1. Load Existing Data
-    if os.path.exists(TARGET_CSV):
-        print(f"Reading existing file: {TARGET_CSV}")
-        df = pd.read_csv(TARGET_CSV)
-    elif os.path.exists(os.path.join(os.getcwd(), TARGET_CSV)):
-        # Fallback if TARGET_CSV was just filename but running in data-entry
-        TARGET_CSV_PATH = os.path.join(os.getcwd(), TARGET_CSV)
-        print(f"Reading existing file: {TARGET_CSV_PATH}")
-        df = pd.read_csv(TARGET_CSV_PATH)
-    else:
-        # Check if the file name is just a name and we are in data-entry
-        if os.path.basename(TARGET_CSV) == TARGET_CSV and os.path.basename(os.getcwd()) == 'data-entry':
-             print(f"Reading existing file in current dir: {TARGET_CSV}")
-             try:
-                 df = pd.read_csv(TARGET_CSV)
-             except FileNotFoundError:
-                 print(f"Creating new file: {TARGET_CSV}")
-                 df = pd.DataFrame()
-        else:
-             print(f"Creating new file: {TARGET_CSV}")
-             df = pd.DataFrame()
-
+def add_standard_parts(df):
+    """Steps 2-3 of main on a DataFrame: (df with the missing STANDARD_PARTS appended
+    and its columns in PREFERRED_ORDER, number added). df is returned as is when
+    nothing is missing."""
     # 2. Check for Duplicates (don't add if part_label or mpn already exists)
     existing_labels = set(df['part_label'].dropna().astype(str).str.lower()) if 'part_label' in df.columns else set()
     existing_mpns = set(df['mpn'].dropna().astype(str).str.lower()) if 'mpn' in df.columns else set()
@@ -118,12 +99,6 @@ def main():
         else:
             df = new_df
             
-        # 4. Save
-        # Only try to make directory if dirname is not empty
-        output_dir = os.path.dirname(TARGET_CSV)
-        if output_dir:
-            os.makedirs(output_dir, exist_ok=True)
-        
         # Ensure column order matches our refined standard (optional but good practice)
         PREFERRED_ORDER = [
             'manufacturer', 'mpn', 'part_label', 'category', 'kind',
@@ -133,17 +108,51 @@ def main():
             'sample_rate_max_hz', 'latency_ms', 'accuracy_pct', 'range_min', 'range_max', 'units',
             'datasheet_url', 'product_url', 'offer_price', 'currency', 'lifecycle', 'notes'
         ]
-        
+
         # Add any missing columns to df
         for col in PREFERRED_ORDER:
             if col not in df.columns:
                 df[col] = None
-        
+
         # Reorder columns that exist in PREFERRED_ORDER, keep others at the end
         existing_cols = df.columns.tolist()
         final_order = [c for c in PREFERRED_ORDER if c in existing_cols] + [c for c in existing_cols if c not in PREFERRED_ORDER]
         df = df[final_order]
 
+    return df, added_count
+
+def main():
+    # 1. Load Existing Data
+    if os.path.exists(TARGET_CSV):
+        print(f"Reading existing file: {TARGET_CSV}")
+        df = pd.read_csv(TARGET_CSV)
+    elif os.path.exists(os.path.join(os.getcwd(), TARGET_CSV)):
+        # Fallback if TARGET_CSV was just filename but running in data-entry
+        TARGET_CSV_PATH = os.path.join(os.getcwd(), TARGET_CSV)
+        print(f"Reading existing file: {TARGET_CSV_PATH}")
+        df = pd.read_csv(TARGET_CSV_PATH)
+    else:
+        # Check if the file name is just a name and we are in data-entry
+        if os.path.basename(TARGET_CSV) == TARGET_CSV and os.path.basename(os.getcwd()) == 'data-entry':
+             print(f"Reading existing file in current dir: {TARGET_CSV}")
+             try:
+                 df = pd.read_csv(TARGET_CSV)
+             except FileNotFoundError:
+                 print(f"Creating new file: {TARGET_CSV}")
+                 df = pd.DataFrame()
+        else:
+             print(f"Creating new file: {TARGET_CSV}")
+             df = pd.DataFrame()
+
+    df, added_count = add_standard_parts(df)
+
+    if added_count:
+        # 4. Save
+        # Only try to make directory if dirname is not empty
+        output_dir = os.path.dirname(TARGET_CSV)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+
         df.to_csv(TARGET_CSV, index=False)
         print(f"Success! Added {added_count} new standard parts to {TARGET_CSV}")
     else:
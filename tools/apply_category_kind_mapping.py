@@ -33,6 +33,21 @@ MAP = {
     "Soldering Kit":                                     ("tooling",    "soldering_kit"),
 }
 
+def apply_mapping(df):
+    """main() on a DataFrame, in place: returns (rows updated, unmapped labels)."""
+    if "part_label" not in df.columns or "category" not in df.columns or "kind" not in df.columns:
+        raise SystemExit("CSV must have columns: part_label, category, kind")
+    labels = [("" if x is None or x != x else str(x)).strip() for x in df["part_label"]]
+    hit = [i for i, label in enumerate(labels) if label in MAP]
+    for label in {labels[i] for i in hit}:
+        if MAP[label][0] not in ALLOWED:
+            raise SystemExit(f"Mapped category not allowed for {label}: {MAP[label][0]}")
+    for col, k in (("category", 0), ("kind", 1)):
+        if hit:
+            df[col] = df[col].astype(object)
+            df.iloc[hit, df.columns.get_loc(col)] = [MAP[labels[i]][k] for i in hit]
+    return len(hit), [label for label in labels if label and label not in MAP]
+
 def main(inp, outp):
     inp_path = pathlib.Path(inp)
     out_path = pathlib.Path(outp)
@@ -0,0 +1,77 @@
+# filename: tools/bench_batch.py
+# usage:    python3 tools/bench_batch.py [--rounds 20] [--slots 4] [--url http://127.0.0.1:8000]
+# Compares one POST /recommend/batch against N sequential POST /recommend calls for
+# a bill of materials (distance sensor, motion sensor, relay, controller, ...).
+# Without --url the app is driven in-process through FastAPI's TestClient; with --url
+# it talks to a running `uvicorn tools.kb_adapter:app`, so network round trips count.
+import argparse, json, statistics, time, urllib.request
+
+BOM = [
+    {"cls": "SensorPart", "properties": ["distance"], "interfaces": ["GPIO_TRIGGER_ECHO"], "v": 5.0, "budget": 30},
+    {"cls": "SensorPart", "properties": ["motion"], "v": 5.0, "budget": 30},
+    {"cls": "ActuatorPart", "properties": ["power_state"], "v": 5.0, "budget": 10},
+    {"cls": "ControllerBoard", "v": 5.0, "budget": 50},
+    {"cls": "SensorPart", "interfaces": ["I2C"], "v": 3.3},
+    {"cls": "PowerSupply", "v": 12.0},
+    {"cls": "Part", "interfaces": ["GPIO"], "v": 5.0, "budget": 30},
+    {"cls": "SensorPart", "v": 3.3, "budget": 5},
+]
+
+def pct(xs, p):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(round(p / 100.0 * (len(xs) - 1))))]
+
+def http_client(url):
+    def post(path, body):
+        req = urllib.request.Request(url.rstrip("/") + path, data=json.dumps(body).encode("utf-8"),
+                                     headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(req) as r:
+            return json.loads(r.read())
+    return post
+
+def local_client():
+    from fastapi.testclient import TestClient
+    import kb_adapter as ka
+    from kb_cache import ResponseCache
+    ka.CACHE = ResponseCache(maxsize=0)  # time the lookups, not the response cache
+    client = TestClient(ka.app)
+    def post(path, body):
+        r = client.post(path, json=body)
+        r.raise_for_status()
+        return r.json()
+    return post
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rounds", type=int, default=20)
+    ap.add_argument("--slots", type=int, default=len(BOM), help="BOM slots per round (cycles through BOM)")
+    ap.add_argument("--url", help="base URL of a running kb_adapter (default: in-process)")
+    args = ap.parse_args()
+
+    post = http_client(args.url) if args.url else local_client()
+    slots = [BOM[i % len(BOM)] for i in range(args.slots)]
+
+    seq = [post("/recommend", s) for s in slots]
+    # without the I2C re-ranking (it reorders slots whose candidates clash) a batch
+    # must answer exactly like the single calls
+    if post("/recommend/batch", {"slots": slots, "i2c": False})["results"] != seq:
+        raise SystemExit("MISMATCH: batch and sequential calls returned different results")
+
+    timings = {"sequential": [], "batch": []}
+    for _ in range(args.rounds):
+        t0 = time.perf_counter()
+        for s in slots:
+            post("/recommend", s)
+        timings["sequential"].append((time.perf_counter() - t0) * 1000.0)
+        t0 = time.perf_counter()
+        post("/recommend/batch", {"slots": slots})
+        timings["batch"].append((time.perf_counter() - t0) * 1000.0)
+
+    print(f"{len(slots)} slots x {args.rounds} rounds ({args.url or 'in-process'})")
+    print(f"{'MODE':<16} {'p50 ms':>9} {'p99 ms':>9} {'mean ms':>9}")
+    for name, lat in timings.items():
+        print(f"{name:<16} {pct(lat, 50):>9.3f} {pct(lat, 99):>9.3f} {statistics.mean(lat):>9.3f}")
+    print(f"speedup (p50, batch vs sequential): {pct(timings['sequential'], 50) / pct(timings['batch'], 50):.1f}x")
+
+if __name__ == "__main__":
+    main()
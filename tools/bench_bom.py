@@ -0,0 +1,136 @@
+# filename: tools/bench_bom.py
+# usage:    python3 tools/bench_bom.py [--per-need 3000] [--requests 200] [--k 5] [--time-budget-ms 50]
+# bom_solver.py on a synthetic catalog: a controller offering I2C/GPIO on 3.3 V and
+# 5 V, and --per-need candidates for each of eight needs with random prices (some
+# unpriced), interfaces, supply ranges and I2C addresses (a few fixed ones, some
+# jumper-selectable pairs, so conflicts are common) and currencies (mostly EUR, some USD
+# or none); some parts fill two needs. Requests pick 3-6 needs, an optional budget and
+# an optional currency. Before timing, the solver's top-k is checked
+# against exhaustive enumeration on a small catalog (12 candidates per need).
+import argparse, itertools, random, statistics, time
+from rdflib import Graph, Literal, Namespace
+from rdflib.namespace import RDF, RDFS, XSD
+
+from bom_solver import UNPRICED, BomSolver
+from i2c_addr import assign
+from part_table import PartTable
+
+EX = Namespace("https://example.org/iotkb#")
+SOSA = Namespace("http://www.w3.org/ns/sosa/")
+NEEDS = ["distance", "motion", "temperature", "humidity", "illuminance", "pressure", "power_state", "sound"]
+ACTS = {"power_state", "sound"}
+IFACES = ["I2C", "GPIO", "SPI", "UART"]
+RANGES = [(3.3, 3.3), (3.0, 5.5), (5.0, 5.0), (2.7, 3.6), (None, None)]
+ADDRS = [("0x77", None), ("0x3C", None), ("0x29", None), ("0x76", "0x76–0x77"), ("0x3C", "0x3C–0x3D")]
+
+def make_graph(per_need: int, seed: int = 3) -> Graph:
+    rng = random.Random(seed)
+    g = Graph()
+    ctrl = EX.Bench_Controller
+    g.add((ctrl, RDF.type, EX.ControllerBoard))
+    g.add((ctrl, RDFS.label, Literal("Bench Controller")))
+    for i in ("I2C", "GPIO"):
+        g.add((ctrl, EX.supportsInterface, EX[i]))
+    g.add((ctrl, EX.vccMin, Literal("3.3", datatype=XSD.decimal)))
+    g.add((ctrl, EX.vccMax, Literal("5.0", datatype=XSD.decimal)))
+    n = 0
+    for need in NEEDS:
+        for _ in range(per_need):
+            s = EX[f"Part_{n}"]
+            n += 1
+            fills = [need] + ([rng.choice(NEEDS)] if rng.random() < 0.05 else [])
+            for f in fills:
+                pred = SOSA.actsOnProperty if f in ACTS else SOSA.observesProperty
+                g.add((s, pred, EX[f]))
+            g.add((s, RDF.type, EX.ActuatorPart if need in ACTS else EX.SensorPart))
+            g.add((s, RDFS.label, Literal(f"{need} part {n}")))
+            g.add((s, EX.hasInterface, EX[rng.choice(IFACES)]))
+            lo, hi = rng.choice(RANGES)
+            if lo is not None:
+                g.add((s, EX.vccMin, Literal(str(lo), datatype=XSD.decimal)))
+                g.add((s, EX.vccMax, Literal(str(hi), datatype=XSD.decimal)))
+            if rng.random() < 0.4:
+                default, rng_ = rng.choice(ADDRS)
+                g.add((s, EX.i2cAddrDefault, Literal(default)))
+                if rng_:
+                    g.add((s, EX.i2cAddrRange, Literal(rng_)))
+            if rng.random() < 0.9:
+                g.add((s, EX.offerPrice, Literal(f"{rng.uniform(0.5, 40):.2f}", datatype=XSD.decimal)))
+                cur = rng.choice(["EUR"] * 6 + ["USD"] * 3 + [None])
+                if cur:
+                    g.add((s, EX.priceCurrency, Literal(cur)))
+    return g
+
+def requests(n: int, seed: int = 5):
+    rng = random.Random(seed)
+    for _ in range(n):
+        needs = rng.sample(NEEDS, rng.randint(3, 6))
+        yield needs, rng.choice([None, 10.0, 25.0, 60.0]), rng.choice([None, None, "EUR", "USD"])
+
+def brute_force(solver: BomSolver, needs, budget, currency, k):
+    """Costs of the k cheapest minimal single-currency BOMs over every rail, by
+    enumeration."""
+    t = solver.table
+    ctrl = solver.controller_row("Bench_Controller")
+    caps = [EX[n] for n in needs]
+    found = {}
+    for rail in solver.rails(ctrl):
+        lists = [solver.candidates(c, ctrl, solver.controller_ifaces(ctrl), rail, budget, currency).tolist()
+                 for c in caps]
+        for combo in itertools.product(*lists):
+            rows = frozenset(combo)
+            cover = {r: {c for c in caps if solver._fills(r, c)} for r in rows}
+            if any(not (cover[r] - set().union(*(cover[q] for q in rows if q != r))) for r in rows):
+                continue
+            if budget is not None and sum(solver.paid[r] for r in rows) > budget:
+                continue
+            if len({solver.cur[r] for r in rows} - {0}) > 1:
+                continue
+            if assign([t.i2c_mask(r) for r in rows]) is None:
+                continue
+            found[rows] = sum(solver.cost[r] for r in rows)
+    return sorted(found.values())[:k]
+
+def pct(xs, p):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(round(p / 100.0 * (len(xs) - 1))))]
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--per-need", type=int, default=3000, help="candidates per need")
+    ap.add_argument("--requests", type=int, default=200)
+    ap.add_argument("--k", type=int, default=5)
+    ap.add_argument("--time-budget-ms", type=float, default=50.0)
+    args = ap.parse_args()
+
+    small = BomSolver(PartTable(make_graph(12)))
+    for needs, budget, currency in requests(40, seed=9):
+        needs = needs[:4]
+        got = [b["price"] + UNPRICED * b["unpriced"] for b in
+               small.solve("Bench_Controller", needs, budget=budget, k=args.k, time_budget_ms=1e9,
+                           currency=currency)["boms"]]
+        want = brute_force(small, needs, budget, currency, args.k)
+        if [round(x, 6) for x in got] != [round(x, 6) for x in want]:
+            raise SystemExit(f"MISMATCH for {needs} budget={budget} currency={currency}: "
+                             f"solver {got} vs enumeration {want}")
+
+    t0 = time.perf_counter()
+    solver = BomSolver(PartTable(make_graph(args.per_need)))
+    t_build = time.perf_counter() - t0
+    lat, complete, nodes = [], 0, []
+    for needs, budget, currency in requests(args.requests):
+        t0 = time.perf_counter()
+        out = solver.solve("Bench_Controller", needs, budget=budget, k=args.k, time_budget_ms=args.time_budget_ms,
+                           currency=currency)
+        lat.append((time.perf_counter() - t0) * 1000.0)
+        complete += out["complete"]
+        nodes.append(out["nodes"])
+
+    print(f"{len(NEEDS)} needs x {args.per_need} candidates ({len(solver.table)} parts), table + lists built in {t_build:.2f}s")
+    print(f"top-{args.k} on 40 small requests: same costs as exhaustive enumeration")
+    print(f"{'REQUESTS':>8} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'PROVEN':>7} {'NODES p50':>10}")
+    print(f"{len(lat):>8} {pct(lat, 50):>8.2f} {pct(lat, 99):>8.2f} {max(lat):>8.2f} "
+          f"{complete / len(lat):>7.0%} {statistics.median(nodes):>10.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# filename: tools/bench_csv2ttl.py
+# usage:    python3 tools/bench_csv2ttl.py [--rows 1000000] [--template data-entry/iotkb_refined.csv] [--keep DIR]
+# Builds a synthetic catalog by cycling the template CSV (unique labels/MPNs per row)
+# and converts it with csv2ttl_v3.py and csv2ttl.py at 1%, 10% and 100% of --rows.
+# Each conversion runs in a fresh interpreter so its peak RSS is measured on its own;
+# with the streaming converters it should stay flat as the catalog grows.
+import argparse, csv, os, subprocess, sys, tempfile, time
+
+TOOLS = os.path.dirname(os.path.abspath(__file__))
+
+CHILD = """
+import resource, sys, time
+sys.path.insert(0, {tools!r})
+import {mod} as m
+t0 = time.perf_counter()
+m.main({csv_in!r}, {ttl_out!r})
+print("BENCH", time.perf_counter() - t0, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+def make_csv(template: str, out_path: str, n: int):
+    with open(template, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        fields = reader.fieldnames
+        rows = list(reader)
+    with open(out_path, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=fields)
+        w.writeheader()
+        for k in range(n):
+            r = dict(rows[k % len(rows)])
+            r["part_label"] = f"{r.get('part_label') or 'Part'} #{k}"
+            r["mpn"] = f"{r.get('mpn') or 'SYN'}-{k}"
+            w.writerow(r)
+
+def run(mod: str, csv_in: str, ttl_out: str):
+    code = CHILD.format(tools=TOOLS, mod=mod, csv_in=csv_in, ttl_out=ttl_out)
+    out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+    _, secs, rss_kb = out.strip().splitlines()[-1].split()
+    return float(secs), int(rss_kb) / 1024.0
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=1_000_000)
+    ap.add_argument("--template", default="data-entry/iotkb_refined.csv")
+    ap.add_argument("--keep", help="directory for the generated CSV/TTL files (default: temp dir, removed)")
+    args = ap.parse_args()
+
+    work = args.keep or tempfile.mkdtemp(prefix="bench_csv2ttl-")
+    os.makedirs(work, exist_ok=True)
+    sizes = sorted({max(1, args.rows // 100), max(1, args.rows // 10), args.rows})
+
+    print(f"{'CONVERTER':<12} {'ROWS':>9} {'CSV MB':>8} {'TTL MB':>8} {'SECONDS':>8} {'ROWS/S':>9} {'PEAK RSS MB':>12}")
+    try:
+        for n in sizes:
+            csv_in = os.path.join(work, f"synthetic_{n}.csv")
+            make_csv(args.template, csv_in, n)
+            for mod in ("csv2ttl_v3", "csv2ttl"):
+                ttl_out = os.path.join(work, f"synthetic_{n}_{mod}.ttl")
+                secs, rss = run(mod, csv_in, ttl_out)
+                print(f"{mod:<12} {n:>9} {os.path.getsize(csv_in) / 1e6:>8.1f} {os.path.getsize(ttl_out) / 1e6:>8.1f} "
+                      f"{secs:>8.2f} {n / secs:>9.0f} {rss:>12.1f}")
+                if not args.keep:
+                    os.unlink(ttl_out)
+            if not args.keep:
+                os.unlink(csv_in)
+    finally:
+        if not args.keep:
+            os.rmdir(work)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# filename: tools/bench_csv2ttl_jobs.py
+# usage:    python3 tools/bench_csv2ttl_jobs.py [--rows 200000] [--jobs 1,2,4,8,16]
+# Scaling chart for `csv2ttl_v3.py --jobs N`: converts one synthetic catalog with each
+# worker count, checks every output is byte-identical to the serial one and prints
+# wall time, speedup and a text bar chart of the speedup.
+import argparse, hashlib, os, subprocess, sys, tempfile, time
+
+from bench_csv2ttl import make_csv
+
+TOOLS = os.path.dirname(os.path.abspath(__file__))
+
+def sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=200_000)
+    ap.add_argument("--jobs", default="1,2,4,8,16", help="comma-separated worker counts")
+    ap.add_argument("--template", default="data-entry/iotkb_refined.csv")
+    args = ap.parse_args()
+    counts = sorted({max(1, int(x)) for x in args.jobs.split(",")} | {1})
+
+    with tempfile.TemporaryDirectory(prefix="bench_csv2ttl_jobs-") as work:
+        csv_in = os.path.join(work, "synthetic.csv")
+        make_csv(args.template, csv_in, args.rows)
+        print(f"{args.rows} rows, {os.path.getsize(csv_in) / 1e6:.1f} MB CSV, {os.cpu_count()} CPUs")
+
+        results, ref = [], None
+        for n in counts:
+            ttl_out = os.path.join(work, f"out_{n}.ttl")
+            t0 = time.perf_counter()
+            subprocess.run([sys.executable, os.path.join(TOOLS, "csv2ttl_v3.py"), csv_in, ttl_out, "--jobs", str(n)],
+                           check=True, stdout=subprocess.DEVNULL)
+            secs = time.perf_counter() - t0
+            digest = sha256(ttl_out)
+            ref = ref or digest
+            if digest != ref:
+                raise SystemExit(f"MISMATCH: --jobs {n} output differs from serial output")
+            os.unlink(ttl_out)
+            results.append((n, secs))
+
+    base = results[0][1]
+    top = max(base / s for _, s in results)
+    print(f"{'JOBS':>4} {'SECONDS':>8} {'SPEEDUP':>8}")
+    for n, secs in results:
+        speedup = base / secs
+        print(f"{n:>4} {secs:>8.2f} {speedup:>7.2f}x  {'#' * max(1, round(40 * speedup / top))}")
+    print("all outputs byte-identical to --jobs 1")
+
+if __name__ == "__main__":
+    main()
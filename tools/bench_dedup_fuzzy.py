@@ -0,0 +1,100 @@
+# filename: tools/bench_dedup_fuzzy.py
+# usage:    python3 tools/bench_dedup_fuzzy.py [--sizes 25000,50000,100000,200000] [--pairs-rows 3000] [--jobs 1]
+# Scaling of tools/dedup_fuzzy.py on synthetic catalogs: parts are a part code plus a
+# few words, and about a third of them get 1-3 near-duplicate spellings (words
+# reordered, dropped or added, code hyphenated or upper-cased, the bare code alone).
+# For every size it reports time, time per row (flat when the blocking keeps the work
+# linear) and precision/recall of the found duplicate pairs against the generated
+# truth. On --pairs-rows rows it also scores every pair (the all-pairs baseline the
+# blocking replaces) with the same similarity, to show what the blocking misses.
+import argparse, random, time
+from itertools import combinations
+import pandas as pd
+
+import dedup_fuzzy as dd
+
+WORDS = ["Sensor", "Module", "Breakout", "Board", "Temperature", "Humidity", "Pressure", "Motion", "Relay",
+         "Driver", "Motor", "Display", "OLED", "Gas", "Light", "Sound", "Ultrasonic", "Distance", "Accelerometer"]
+PREFIX = ["BM", "HC", "DHT", "MPU", "ADS", "INA", "TSL", "VL", "SHT", "LM", "TMP", "MAX", "PCA", "TCA"]
+
+def catalog(n: int, seed: int = 3):
+    """(DataFrame, truth part id per row)."""
+    rng = random.Random(seed)
+    labels, truth, part = [], [], 0
+    while len(labels) < n:
+        code = f"{rng.choice(PREFIX)}{rng.randint(100, 99999)}{rng.choice(['', 'A', 'B', 'X'])}"
+        words = rng.sample(WORDS, rng.randint(1, 3))
+        variants = [f"{code} {' '.join(words)}"]
+        for _ in range(rng.choice([0, 0, 1, 2, 3])):
+            w = words[:]
+            rng.shuffle(w)
+            c = code if rng.random() < 0.5 else code[:2] + "-" + code[2:]
+            pick = rng.random()
+            if pick < 0.25:
+                variants.append(c.lower())
+            elif pick < 0.5:
+                variants.append(f"{' '.join(w)} {c}")
+            elif pick < 0.75:
+                variants.append(f"{c} {' '.join(w[:1])}")
+            else:
+                variants.append(f"{' '.join(w)} {c} Breakout")
+        for v in variants:
+            labels.append(v)
+            truth.append(part)
+        part += 1
+    df = pd.DataFrame({"manufacturer": "", "mpn": "", "part_label": labels[:n], "notes": "imported_from_fritzing"})
+    return df, truth[:n]
+
+def true_pairs(truth) -> set:
+    by = {}
+    for i, t in enumerate(truth):
+        by.setdefault(t, []).append(i)
+    return {p for rows in by.values() for p in combinations(rows, 2)}
+
+def found_pairs(cluster_ids) -> set:
+    by = {}
+    for i, c in enumerate(cluster_ids):
+        by.setdefault(c, []).append(i)
+    return {p for rows in by.values() for p in combinations(rows, 2)}
+
+def quality(found: set, truth: set):
+    hit = len(found & truth)
+    return hit / max(1, len(found)), hit / max(1, len(truth))
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="25000,50000,100000,200000")
+    ap.add_argument("--pairs-rows", type=int, default=3000, help="rows for the all-pairs baseline (0 skips it)")
+    ap.add_argument("--jobs", type=int, default=1)
+    args = ap.parse_args()
+
+    print(f"{'ROWS':>8} {'SECONDS':>8} {'US/ROW':>7} {'BLOCKS':>8} {'PAIRS':>10} {'CLUSTERS':>9} {'PREC':>6} {'RECALL':>7}")
+    for n in (int(x) for x in args.sizes.split(",")):
+        df, truth = catalog(n)
+        t0 = time.perf_counter()
+        out, st = dd.find_duplicates(df, jobs=args.jobs)
+        secs = time.perf_counter() - t0
+        prec, rec = quality(found_pairs(out["cluster_id"].tolist()), true_pairs(truth))
+        print(f"{n:>8} {secs:>8.2f} {secs / n * 1e6:>7.1f} {st['blocks']:>8} {st['pairs_scored']:>10} "
+              f"{st['clusters']:>9} {prec:>6.3f} {rec:>7.3f}")
+
+    if args.pairs_rows:
+        df, truth = catalog(args.pairs_rows)
+        feats = dd.row_features(df)
+        t0 = time.perf_counter()
+        pairs = [(i, j) for i, j in combinations(range(len(feats)), 2)
+                 if dd.similarity(feats[i], feats[j]) >= dd.THRESHOLD]
+        t_all = time.perf_counter() - t0
+        all_found = found_pairs(dd.clusters(len(df), pairs).tolist())
+        t0 = time.perf_counter()
+        out, st = dd.find_duplicates(df, jobs=args.jobs)
+        t_blk = time.perf_counter() - t0
+        blk_found = found_pairs(out["cluster_id"].tolist())
+        n_pairs = len(feats) * (len(feats) - 1) // 2
+        print(f"{args.pairs_rows} rows: all pairs {n_pairs} scored in {t_all:.2f}s, blocking {st['pairs_scored']} "
+              f"in {t_blk:.2f}s; blocking finds {len(blk_found & all_found)}/{len(all_found)} of the all-pairs "
+              f"duplicate pairs (recall vs truth {quality(all_found, true_pairs(truth))[1]:.3f} all pairs, "
+              f"{quality(blk_found, true_pairs(truth))[1]:.3f} blocked)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# filename: tools/bench_fetch_prices.py
+# usage:    python3 tools/bench_fetch_prices.py [--mpns 120] [--latency 0.05] [--workers 16] [--rate 50] [--batch 20]
+# Prices synthetic MPNs against tools/mock_nexar.py (started in-process), comparing the
+# original loop (a fresh requests.post per MPN + time.sleep(0.2)) with fetch_prices():
+# one MPN per request, --batch MPNs per aliased request, a warm re-run that should hit
+# the network zero times, a batched run with 20% of requests failing, and a batched
+# run replayed from responses recorded through a second mock. All runs must agree on
+# every price.
+import argparse, json, os, tempfile, time
+import requests
+
+import fetch_prices_token as fp
+from mock_nexar import recorded, serve
+
+def original_best_offer(part):
+    best_price = float('inf')
+    currency = "USD"
+    found = False
+    for seller in part.get('sellers', []):
+        for offer in seller.get('offers', []):
+            for price_point in offer.get('prices', []):
+                if price_point['quantity'] <= 1:
+                    p = float(price_point['price'])
+                    if p < best_price and p > 0:
+                        best_price = p
+                        currency = price_point['currency']
+                        found = True
+    return (best_price, currency) if found else (None, None)
+
+def original_loop(url, mpns, sleep: float) -> dict:
+    out = {}
+    for mpn in mpns:
+        r = requests.post(url, json={'query': fp.QUERY, 'variables': {'mpn': mpn}},
+                          headers={'Authorization': f'Bearer {fp.ACCESS_TOKEN}'})
+        results = r.json()['data']['supSearchMpn']['results']
+        out[mpn] = original_best_offer(results[0]['part']) if results else (None, None)
+        time.sleep(sleep)
+    return out
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--mpns", type=int, default=120)
+    ap.add_argument("--latency", type=float, default=0.05, help="mock server delay per request")
+    ap.add_argument("--sleep", type=float, default=0.2, help="fixed sleep of the original loop")
+    ap.add_argument("--workers", type=int, default=16)
+    ap.add_argument("--rate", type=float, default=50.0)
+    ap.add_argument("--batch", type=int, default=20)
+    args = ap.parse_args()
+
+    srv, url = serve(latency=args.latency)
+    mpns = [f"BENCH-{i:05d}" for i in range(args.mpns)]
+    quiet = lambda *a: None
+    rows, results = [], {}
+
+    def run(name, server, fn):
+        before = server.requests
+        t0 = time.perf_counter()
+        results[name] = fn()
+        rows.append((name, time.perf_counter() - t0, server.requests - before))
+
+    def fetch(server_url, cache_path, batch):
+        fp.API_URL = server_url
+        cache = fp.PriceCache(cache_path, ttl=3600)
+        try:
+            return fp.fetch_prices(mpns, args.workers, args.rate, cache, quiet, batch)
+        finally:
+            cache.close()
+
+    with tempfile.TemporaryDirectory(prefix="bench_fetch_prices-") as work:
+        db = lambda name: os.path.join(work, name + ".sqlite")
+        run("original loop", srv, lambda: original_loop(url, mpns, args.sleep))
+        run("fetch_prices, 1 per request", srv, lambda: fetch(url, db("single"), 1))
+        run(f"fetch_prices, {args.batch} per request", srv, lambda: fetch(url, db("batch"), args.batch))
+        run("fetch_prices, warm cache", srv, lambda: fetch(url, db("batch"), args.batch))
+        srv.fail_rate = 0.2
+        run("batched, 20% failures", srv, lambda: fetch(url, db("flaky"), args.batch))
+        srv.fail_rate = 0.0
+
+        # record through a second mock proxying the first, then replay from the file
+        tape = os.path.join(work, "responses.json")
+        lookup = recorded(tape, url, record=True)
+        rec, rec_url = serve(lookup=lookup)
+        fetch(rec_url, db("record"), args.batch)
+        rec.shutdown()
+        with open(tape, "w", encoding="utf-8") as f:
+            json.dump(lookup.book, f)
+        replay, replay_url = serve(lookup=recorded(tape))
+        run("batched, replayed responses", replay, lambda: fetch(replay_url, db("replay"), args.batch))
+        replay.shutdown()
+    srv.shutdown()
+
+    ref = results["original loop"]
+    for name, res in results.items():
+        if res != ref:
+            raise SystemExit(f"MISMATCH: '{name}' disagrees with the original loop")
+
+    print(f"{len(mpns)} MPNs, mock latency {args.latency * 1000:.0f} ms, "
+          f"{args.workers} workers, {args.rate:g} req/s limit")
+    print(f"{'RUN':<30} {'SECONDS':>8} {'REQUESTS':>9}")
+    for name, secs, n in rows:
+        print(f"{name:<30} {secs:>8.2f} {n:>9}")
+    print(f"requests cut {rows[1][2] / max(1, rows[2][2]):.0f}x by batching, identical prices in every run")
+
+if __name__ == "__main__":
+    main()
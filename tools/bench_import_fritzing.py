@@ -0,0 +1,123 @@
+# filename: tools/bench_import_fritzing.py
+# usage:    python3 tools/bench_import_fritzing.py [--files 50000] [--jobs 1,2,4]
+# Throughput of tools/import_fritzing_zip.py on a locally generated ZIP of synthetic
+# .fzp files (titles, authors, tags drawn from the "fritzing_tags" rules, connector
+# and view blocks so members are sized like real parts, a few malformed ones). The
+# baseline is the original importer: whole archive in a BytesIO, every member decoded
+# to str and parsed with ET.fromstring one after another. Every run must write a
+# byte-identical CSV.
+import argparse, csv, hashlib, io, os, random, sys, tempfile, time, zipfile
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape
+
+import import_fritzing_zip as ifz
+
+AUTHORS = ["SparkFun", "Adafruit", "Fritzing Core", "Seeed Studio", "Pololu", ""]
+WORDS = ["Breakout", "Module", "Board", "Mini", "Pro", "Shield", "Kit", "v2", "Dual", "Smart"]
+
+def fzp(rng: random.Random, i: int) -> str:
+    keywords = [kw for r in ifz.TAG_RULES.rules for kw in r["keywords"]]
+    tags = rng.sample(keywords, rng.randint(0, 3)) + rng.sample(WORDS, rng.randint(0, 2))
+    title = f"{rng.choice(WORDS)} {rng.choice(keywords).title()} {i}"
+    desc = escape(f"<p>{title} by {rng.choice(AUTHORS)} & co.</p> " + " ".join(rng.choices(WORDS, k=30)))
+    conns = "".join(f'<connector id="connector{c}" name="P{c}" type="male"><description>pin {c}</description>'
+                    f'<views><breadboardView><p layer="breadboard" svgId="connector{c}pin"/></breadboardView>'
+                    f'<schematicView><p layer="schematic" svgId="connector{c}pin"/></schematicView></views></connector>'
+                    for c in range(rng.randint(2, 24)))
+    return (f'<?xml version="1.0" encoding="UTF-8"?>\n<module fritzingVersion="0.9.3" moduleId="bench_{i}">'
+            f'<version>4</version><author>{escape(rng.choice(AUTHORS))}</author><title>{escape(title)}</title>'
+            f'<label>U</label><date>2024-01-01</date><url>https://example.org/p/{i}</url>'
+            f'<tags>{"".join(f"<tag>{escape(t)}</tag>" for t in tags)}</tags>'
+            f'<properties><property name="family">{rng.choice(WORDS)}</property></properties>'
+            f'<description>{desc}</description><views><iconView><layers image="icon/x.svg"/></iconView></views>'
+            f'<connectors>{conns}</connectors></module>')
+
+def make_zip(path: str, n: int, seed: int = 7):
+    rng = random.Random(seed)
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as z:
+        for i in range(n):
+            body = fzp(rng, i) if i % 997 else "<module><title>broken"   # a few malformed members
+            z.writestr(f"fritzing-parts-master/core/bench_{i:06d}.fzp", body)
+        z.writestr("fritzing-parts-master/README.md", "synthetic")
+
+def reference_parse(content: str):
+    """The original parse_fzp: ET.fromstring on the decoded member."""
+    try:
+        root = ET.fromstring(content)
+    except ET.ParseError:
+        print("Warning: Skipping malformed XML file.", file=sys.stderr)
+        return None
+    get = lambda tag: root.find(tag)
+    title, author, desc, url, tags_elem = (get(t) for t in ("title", "author", "description", "url", "tags"))
+    tags = [t.text for t in tags_elem.findall('tag') if t.text is not None] if tags_elem is not None else []
+    part_type, part_kind = ifz.get_part_type_and_kind(tags)
+    row = {h: '' for h in ifz.CSV_HEADERS}
+    row.update({
+        'part_label': title.text if (title is not None and title.text) else 'Unknown Part',
+        'part_type': part_type,
+        'part_kind': part_kind,
+        'manufacturer': author.text if (author is not None and author.text) else '',
+        'product_url': url.text if (url is not None and url.text) else '',
+        'notes': desc.text.strip() if (desc is not None and desc.text) else '',
+    })
+    return row
+
+def reference_import(zip_path: str, out_csv: str) -> int:
+    with open(zip_path, "rb") as f:
+        data = f.read()
+    rows = []
+    with zipfile.ZipFile(io.BytesIO(data)) as z:
+        for name in ifz.fzp_members(z):
+            with z.open(name) as m:
+                row = reference_parse(m.read().decode('utf-8'))
+                if row:
+                    rows.append(row)
+    with open(out_csv, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=ifz.CSV_HEADERS)
+        writer.writeheader()
+        writer.writerows(rows)
+    return len(rows)
+
+def sha256(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--files", type=int, default=50_000)
+    ap.add_argument("--jobs", default="1,2,4", help="comma-separated worker counts")
+    args = ap.parse_args()
+    counts = sorted({max(1, int(x)) for x in args.jobs.split(",")})
+
+    with tempfile.TemporaryDirectory(prefix="bench_import_fritzing-") as work:
+        zip_path = os.path.join(work, "parts.zip")
+        t0 = time.perf_counter()
+        make_zip(zip_path, args.files)
+        print(f"{args.files} .fzp files, {os.path.getsize(zip_path) / 1e6:.1f} MB ZIP "
+              f"(built in {time.perf_counter() - t0:.1f}s), {os.cpu_count()} CPUs")
+
+        stderr, sys.stderr = sys.stderr, open(os.devnull, "w")   # malformed-member warnings
+        try:
+            ref_csv = os.path.join(work, "ref.csv")
+            t0 = time.perf_counter()
+            n = reference_import(zip_path, ref_csv)
+            results = [("original (BytesIO, fromstring)", time.perf_counter() - t0)]
+            ref = sha256(ref_csv)
+            for jobs in counts:
+                out = os.path.join(work, f"out_{jobs}.csv")
+                t0 = time.perf_counter()
+                m = ifz.import_zip(zip_path, out, jobs)
+                results.append((f"import_zip --jobs {jobs}", time.perf_counter() - t0))
+                if m != n or sha256(out) != ref:
+                    raise SystemExit(f"MISMATCH: --jobs {jobs} output differs from the original importer")
+        finally:
+            sys.stderr.close()
+            sys.stderr = stderr
+
+    print(f"{'METHOD':<32} {'SECONDS':>8} {'FILES/S':>9}")
+    for name, secs in results:
+        print(f"{name:<32} {secs:>8.2f} {args.files / secs:>9.0f}")
+    print(f"{n} parts written, all CSVs byte-identical")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# filename: tools/bench_incremental_fritzing.py
+# usage:    python3 tools/bench_incremental_fritzing.py [--files 50000] [--changes 25]
+# Full vs incremental rebuild of the Fritzing import + merge after a small upstream
+# change. Builds a synthetic parts ZIP (bench_import_fritzing.make_zip), imports and
+# merges it in full, then derives a second ZIP with --changes members edited, added
+# and removed each, and rebuilds it both ways: `import_fritzing_zip.py --incremental
+# --delta` + `merge_fritzing.py --delta` against a full import + merge. Both CSVs must
+# come out byte-identical.
+import argparse, filecmp, os, re, subprocess, sys, tempfile, time, zipfile
+
+from bench_import_fritzing import make_zip
+
+TOOLS = os.path.dirname(os.path.abspath(__file__))
+SEED = os.path.join(os.path.dirname(TOOLS), "data-entry", "iotkb_seed.csv")
+
+def run(script: str, *args) -> float:
+    t0 = time.perf_counter()
+    subprocess.run([sys.executable, os.path.join(TOOLS, script), *args], check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - t0
+
+def change_zip(src: str, dst: str, n: int):
+    """dst = src with n members retitled, n removed and n new ones added."""
+    with zipfile.ZipFile(src) as zi, zipfile.ZipFile(dst, "w", zipfile.ZIP_DEFLATED) as zo:
+        names = [x for x in zi.namelist() if x.endswith(".fzp")]
+        step = max(1, len(names) // (3 * n + 1))
+        edit, drop = set(names[0::step][:n]), set(names[1::step][:n])
+        for name in zi.namelist():
+            if name in drop:
+                continue
+            data = zi.read(name)
+            if name in edit:
+                data = data.replace(b"<title>", b"<title>Rev B ", 1)
+            zo.writestr(name, data)
+        for i, name in enumerate(names[2::step][:n]):
+            body = re.sub(rb"<title>", b"<title>Added ", zi.read(name), count=1)
+            zo.writestr(name.replace(".fzp", f"_added{i}.fzp"), body)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--files", type=int, default=50_000)
+    ap.add_argument("--changes", type=int, default=25, help="members edited, added and removed (each)")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench_incremental_fritzing-") as work:
+        p = lambda name: os.path.join(work, name)
+        make_zip(p("v1.zip"), args.files)
+        change_zip(p("v1.zip"), p("v2.zip"), args.changes)
+        print(f"{args.files} .fzp files; v2 edits, adds and removes {args.changes} each")
+
+        # v1, in full, leaves the manifest and merge state behind
+        run("import_fritzing_zip.py", "--zip", p("v1.zip"), "--out", p("inc.csv"), "--jobs", "1", "--incremental",
+            "--delta", p("delta_v1.csv"))
+        run("merge_fritzing.py", "--seed", SEED, "--fritzing", p("inc.csv"), "--out", p("inc_merged.csv"),
+            "--delta", p("delta_v1.csv"))
+
+        rows = []
+        t_imp = run("import_fritzing_zip.py", "--zip", p("v2.zip"), "--out", p("full.csv"), "--jobs", "1")
+        t_mrg = run("merge_fritzing.py", "--seed", SEED, "--fritzing", p("full.csv"), "--out", p("full_merged.csv"))
+        rows.append(("full", t_imp, t_mrg))
+        t_imp = run("import_fritzing_zip.py", "--zip", p("v2.zip"), "--out", p("inc.csv"), "--jobs", "1",
+                    "--incremental", "--delta", p("delta.csv"))
+        t_mrg = run("merge_fritzing.py", "--seed", SEED, "--fritzing", p("inc.csv"), "--out", p("inc_merged.csv"),
+                    "--delta", p("delta.csv"))
+        rows.append(("incremental", t_imp, t_mrg))
+
+        for a, b in (("full.csv", "inc.csv"), ("full_merged.csv", "inc_merged.csv")):
+            if not filecmp.cmp(p(a), p(b), shallow=False):
+                raise SystemExit(f"MISMATCH: incremental {b} differs from full {a}")
+        with open(p("delta.csv"), encoding="utf-8") as f:
+            n_delta = sum(1 for _ in f) - 1
+
+    print(f"{'REBUILD':<12} {'IMPORT S':>9} {'MERGE S':>8} {'TOTAL S':>8}")
+    for name, ti, tm in rows:
+        print(f"{name:<12} {ti:>9.2f} {tm:>8.2f} {ti + tm:>8.2f}")
+    print(f"{n_delta} delta rows; import and merge outputs byte-identical to the full rebuild")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+# filename: tools/bench_kb_load.py
+# usage:    python3 tools/bench_kb_load.py [--repeat 5]
+# Startup-time benchmark: full Turtle parse vs. loading the compiled snapshot
+# (kb_snapshot.py) for each ontology file and for the kb_adapter file set.
+import argparse, glob, shutil, statistics, tempfile, time
+from kb_snapshot import load_graph, parse_sources
+
+def timed(fn, repeat):
+    ts = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        n = len(fn())
+        ts.append((time.perf_counter() - t0) * 1000.0)
+    return n, statistics.median(ts)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    sets = [[p] for p in sorted(glob.glob("ontologies/*.ttl"))]
+    sets.append(["ontologies/iotkb_schema.ttl", "ontologies/iotkb_align.ttl", "ontologies/iotkb_parts.ttl"])
+
+    cache_dir = tempfile.mkdtemp(prefix="kb_cache_bench_")
+    try:
+        print(f"{'SOURCES':<60} {'TRIPLES':>8} {'PARSE ms':>9} {'SNAP ms':>8} {'SPEEDUP':>8}")
+        for paths in sets:
+            _, t_parse = timed(lambda: parse_sources(paths), args.repeat)
+            load_graph(paths, cache_dir=cache_dir)  # build the snapshot
+            n, t_snap = timed(lambda: load_graph(paths, cache_dir=cache_dir), args.repeat)
+            name = " + ".join(p.split("/")[-1] for p in paths)
+            speedup = f"{t_parse / t_snap:.1f}x" if t_snap else "-"
+            print(f"{name:<60} {n:>8} {t_parse:>9.1f} {t_snap:>8.1f} {speedup:>8}")
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
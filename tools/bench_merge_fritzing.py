@@ -0,0 +1,116 @@
+# filename: tools/bench_merge_fritzing.py
+# usage:    python3 tools/bench_merge_fritzing.py [--rows 1000000] [--ref-rows 100000]
+# Normalize + merge of a synthetic Fritzing import (import_fritzing_zip.py columns,
+# voltages and bus names in the notes, ~30% duplicate parts, some rows colliding with
+# the seed) into data-entry/iotkb_seed.csv. The baseline is the original path: iterrows
+# with s()/parse_voltage()/infer_iface() per row, then norm_key via apply(axis=1) and a
+# sort + drop_duplicates. It is run on the first --ref-rows rows (it takes minutes on a
+# million); on those, both paths must produce the same set of rows.
+import argparse, os, random, tempfile, time
+import pandas as pd
+
+import merge_fritzing as mf
+from import_fritzing_zip import CSV_HEADERS
+
+TOOLS = os.path.dirname(os.path.abspath(__file__))
+SEED = os.path.join(os.path.dirname(TOOLS), "data-entry", "iotkb_seed.csv")
+WORDS = ["Breakout", "Module", "Board", "Mini", "Pro", "Sensor", "Relay", "Motor", "LED", "Display",
+         "Temperature", "Humidity", "Button", "Shield", "Driver", "Ultrasonic", "Camera", "Kit"]
+NOTES = ["I2C interface", "SPI bus", "serial UART", "analog out", "digital GPIO", "trigger and echo pins",
+         "3.3V logic", "5 V supply", "2.7V to 5.5V", "12V input", "runs at 1.8 v", ""]
+AUTHORS = ["SparkFun", "Adafruit", "Fritzing Core", "Seeed Studio", "Pololu", ""]
+
+def make_fritzing(path: str, n: int, seed_df, seed: int = 7):
+    rng = random.Random(seed)
+    seed_rows = seed_df[["part_label", "manufacturer", "mpn"]].fillna("").values.tolist()
+    rows = []
+    for i in range(n):
+        r = rng.random()
+        if r < 0.3 and rows:             # duplicate of an earlier part, case/spacing varied
+            label, manu, mpn = rows[rng.randrange(len(rows))][:3]
+            label = label.upper() if rng.random() < 0.5 else label.replace(" ", "-")
+        elif r < 0.31:                   # same part as a seed row
+            label, manu, mpn = rng.choice(seed_rows)
+        else:
+            label = f"{rng.choice(WORDS)} {rng.choice(WORDS)} {i}"
+            manu = rng.choice(AUTHORS)
+            mpn = f"FZ-{i:07d}" if rng.random() < 0.2 else ""
+        notes = " ".join(rng.sample(NOTES, rng.randint(0, 3)))
+        rows.append([label, manu, mpn, notes, f"https://example.org/p/{i}"])
+    df = pd.DataFrame("", index=range(n), columns=CSV_HEADERS)
+    df[["part_label", "manufacturer", "mpn", "notes", "product_url"]] = rows
+    df.to_csv(path, index=False)
+
+def reference_normalize(fritz, seed_cols, cols) -> pd.DataFrame:
+    """The original normalize loop (one dict per row)."""
+    s = mf.s
+    get = lambda r, k: s(r.get(cols[k], "")) if cols[k] else ""
+    out_rows, cat_texts, kind_texts = [], [], []
+    for _, r in fritz.iterrows():
+        name, manu, mpn, tags = s(r.get(cols["name_col"], "")), get(r, "manu_col"), get(r, "mpn_col"), get(r, "tags_col")
+        fam, desc, url, durl = get(r, "fam_col"), get(r, "desc_col"), get(r, "url_col"), get(r, "data_col")
+        vmin, vmax = mf.parse_voltage(" ".join([s(r.get(cols["volt_col"], "")), desc, tags, fam, name]))
+        cat_texts.append(mf.category_text(name, tags, fam, desc))
+        kind_texts.append(mf.kind_text(name, tags))
+        rec = {c: "" for c in seed_cols}
+        rec.update({"manufacturer": manu, "mpn": mpn, "part_label": name if name else (mpn or "Fritzing Part"),
+                    "vcc_min": vmin, "vcc_max": vmax,
+                    "iface": mf.infer_iface(" ".join([s(r.get(cols["iface_col"], "")), tags, desc])),
+                    "datasheet_url": durl, "product_url": url, "notes": "imported_from_fritzing"})
+        out_rows.append(rec)
+    for rec, cat, kind in zip(out_rows, mf.CATEGORY_RULES.classify(cat_texts), mf.KIND_RULES.classify(kind_texts)):
+        rec["category"], rec["kind"] = cat["category"], kind["kind"]
+    return pd.DataFrame(out_rows, columns=seed_cols)
+
+def reference_merge(seed, fritz_norm) -> pd.DataFrame:
+    merged = pd.concat([seed, fritz_norm], ignore_index=True)
+    merged["_k"] = merged.apply(mf.norm_key, axis=1)
+    merged["_is_seed"] = False
+    merged.loc[:len(seed)-1, "_is_seed"] = True
+    merged = merged.sort_values(by=["_k", "_is_seed"], ascending=[True, False])
+    return merged.drop_duplicates(subset=["_k"], keep="first").drop(columns=["_k", "_is_seed"])
+
+def run(seed, fritz, normalize, merge):
+    t0 = time.perf_counter()
+    norm = normalize(fritz, list(seed.columns), mf.fritzing_columns(fritz))
+    t1 = time.perf_counter()
+    merged = merge(seed, norm)
+    return merged, t1 - t0, time.perf_counter() - t1
+
+def row_set(df) -> pd.DataFrame:
+    df = df.astype(object).where(df.notna(), "").astype(str)
+    return df.sort_values(list(df.columns)).reset_index(drop=True)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=1_000_000)
+    ap.add_argument("--ref-rows", type=int, default=100_000, help="rows for the original path (0 skips it)")
+    args = ap.parse_args()
+
+    seed = pd.read_csv(SEED)
+    with tempfile.TemporaryDirectory(prefix="bench_merge_fritzing-") as work:
+        path = os.path.join(work, "fritzing.csv")
+        make_fritzing(path, args.rows, seed)
+        fritz = pd.read_csv(path)
+
+    results = []
+    if args.ref_rows:
+        part = fritz.iloc[:args.ref_rows]
+        ref, tn, tm = run(seed, part, reference_normalize, reference_merge)
+        results.append((f"original, {len(part)} rows", len(part), tn, tm, len(ref)))
+        new, tn, tm = run(seed, part, mf.normalize_fritzing, mf.merge_full)
+        results.append((f"vectorized, {len(part)} rows", len(part), tn, tm, len(new)))
+        if not row_set(ref).equals(row_set(new)):
+            raise SystemExit("MISMATCH: vectorized merge differs from the original")
+    new, tn, tm = run(seed, fritz, mf.normalize_fritzing, mf.merge_full)
+    results.append((f"vectorized, {len(fritz)} rows", len(fritz), tn, tm, len(new)))
+
+    print(f"{len(seed)} seed rows, {args.rows} Fritzing rows")
+    print(f"{'RUN':<28} {'NORMALIZE S':>11} {'MERGE S':>8} {'ROWS/S':>10} {'MERGED':>8}")
+    for name, n, tn, tm, out in results:
+        print(f"{name:<28} {tn:>11.2f} {tm:>8.2f} {n / (tn + tm):>10.0f} {out:>8}")
+    if args.ref_rows:
+        print("same merged rows as the original on the reference slice")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# filename: tools/bench_pipeline.py
+# usage:    python3 tools/bench_pipeline.py [--copies 50] [--latency 0.0]
+# The catalog refresh run two ways on the repo seed and a Fritzing import grown to
+# --copies times tools/data-entry/fritzing_import.csv (labels suffixed per copy):
+#   chained:   every stage reads the previous stage's CSV and writes its own, as the
+#              separate scripts do (apply_category_kind_mapping.py and csv2ttl_v3.py
+#              run through their own main()s)
+#   in-memory: tools/pipeline.py's run(), one DataFrame through all stages
+# Prices come from tools/mock_nexar.py. Both runs must write byte-identical Turtle
+# and final CSVs.
+import argparse, filecmp, os, tempfile, time, warnings
+from types import SimpleNamespace
+import pandas as pd
+
+import pipeline as pl
+import apply_category_kind_mapping, csv2ttl_v3, fetch_prices_token
+from mock_nexar import serve
+
+TOOLS = os.path.dirname(os.path.abspath(__file__))
+SEED = os.path.join(os.path.dirname(TOOLS), "data-entry", "iotkb_seed.csv")
+FRITZING = os.path.join(TOOLS, "data-entry", "fritzing_import.csv")
+
+def grow(src: str, dst: str, copies: int):
+    df = pd.read_csv(src)
+    parts = []
+    for k in range(copies):
+        c = df.copy()
+        if k:
+            c["part_label"] = c["part_label"].astype(str) + f" #{k}"
+        parts.append(c)
+    pd.concat(parts, ignore_index=True).to_csv(dst, index=False)
+
+def chained(work: str, args) -> list:
+    """The script chain: one CSV per stage on disk. Returns (stage, seconds)."""
+    p = lambda name: os.path.join(work, name)
+    times = []
+    def step(name, fn, src, dst):
+        t0 = time.perf_counter()
+        df = fn(pd.read_csv(src), args)
+        df.to_csv(dst, index=False)
+        times.append((name, time.perf_counter() - t0))
+
+    t0 = time.perf_counter()
+    apply_category_kind_mapping.main(args.seed, p("seed_mapped.csv"))
+    times.append(("map", time.perf_counter() - t0))
+    step("merge", pl.stage_merge, p("seed_mapped.csv"), p("iotkb_seed_merged.csv"))
+    step("categorize", pl.stage_categorize, p("iotkb_seed_merged.csv"), p("iotkb_refined.csv"))
+    step("standard", pl.stage_standard, p("iotkb_refined.csv"), p("iotkb_refined.csv"))
+    step("filter", pl.stage_filter, p("iotkb_refined.csv"), p("iotkb_smart_only.csv"))
+    step("prices", pl.stage_prices, p("iotkb_smart_only.csv"), p("iotkb_priced.csv"))
+    step("enrich", pl.stage_enrich, p("iotkb_priced.csv"), p("iotkb_priced.csv"))
+    t0 = time.perf_counter()
+    csv2ttl_v3.main(p("iotkb_priced.csv"), args.ttl)
+    times.append(("ttl", time.perf_counter() - t0))
+    return times
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--copies", type=int, default=50, help="copies of the Fritzing import to merge")
+    ap.add_argument("--latency", type=float, default=0.0, help="mock Nexar delay per request")
+    cli = ap.parse_args()
+    warnings.simplefilter("ignore", pd.errors.DtypeWarning)   # mixed columns of the chained reads
+
+    srv, url = serve(latency=cli.latency)
+    fetch_prices_token.API_URL = url
+    quiet = lambda *a, **k: None
+    with tempfile.TemporaryDirectory(prefix="bench_pipeline-") as work:
+        p = lambda name: os.path.join(work, name)
+        grow(FRITZING, p("fritzing.csv"), cli.copies)
+        args = SimpleNamespace(seed=SEED, fritzing=p("fritzing.csv"), ttl=p("chained.ttl"), price_cache="", jobs=1)
+
+        import builtins
+        real_print, builtins.print = builtins.print, quiet   # the scripts' progress output
+        try:
+            chain = chained(work, args)
+            args.ttl = p("memory.ttl")
+            t0 = time.perf_counter()
+            df = pd.read_csv(SEED)
+            t_load = time.perf_counter() - t0
+            stages = [(n, fn) for n, fn in pl.STAGES if n not in ("dedup", "validate")]
+            df, report = pl.run(df, stages, args, log=quiet)
+            df.to_csv(p("memory.csv"), index=False)
+        finally:
+            builtins.print = real_print
+        srv.shutdown()
+
+        if not filecmp.cmp(p("chained.ttl"), p("memory.ttl"), shallow=False):
+            raise SystemExit("MISMATCH: in-memory Turtle differs from the chained scripts")
+        if not filecmp.cmp(p("iotkb_priced.csv"), p("memory.csv"), shallow=False):
+            raise SystemExit("MISMATCH: in-memory catalog differs from the chained scripts")
+        n_fritz = len(pd.read_csv(p("fritzing.csv")))
+
+    print(f"{n_fritz} Fritzing rows merged into the seed, {report[-1][3]} parts in the Turtle")
+    print(f"{'STAGE':<11} {'CHAINED S':>10} {'MEMORY S':>9} {'ROWS IN':>8} {'ROWS OUT':>9}")
+    mem = {name: (secs, a, b) for name, secs, a, b in report}
+    for name, secs in chain:
+        m, a, b = mem[name]
+        print(f"{name:<11} {secs:>10.3f} {m:>9.3f} {a:>8} {b:>9}")
+    t_chain, t_mem = sum(s for _, s in chain), t_load + sum(r[1] for r in report)
+    print(f"{'total':<11} {t_chain:>10.3f} {t_mem:>9.3f}   (in-memory includes {t_load:.3f}s loading the seed)")
+    print("Turtle and final catalog byte-identical")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+# filename: tools/bench_power.py
+# usage:    python3 tools/bench_power.py [--parts 100000] [--supplies 5000] [--requests 500] [--bom-size 40]
+# power_budget.py on a synthetic catalog: --parts loads with random supply ranges and
+# active/idle currents (some missing), and --supplies ex:PowerSupply parts (fixed
+# regulators and adapters, adjustable LM2596/MT3608 modules, batteries that are never
+# recommended) with a rating in the label for most of them. Each request is a BOM of
+# up to --bom-size parts.
+# The baseline answers the same request with per-part graph lookups, plain Python
+# sums and a scan over every supply; both must return the same rails and supplies.
+import argparse, random, time
+import numpy as np
+from rdflib import Graph, Literal, Namespace
+from rdflib.namespace import RDF, RDFS, XSD
+
+from part_table import PartTable, decimal_val
+from power_budget import HEADROOM, RAILS, TOP_K, PowerBudget, supply_output
+
+EX = Namespace("https://example.org/iotkb#")
+RANGES = [(3.3, 3.3), (3.0, 5.5), (5.0, 5.0), (2.7, 3.6), (4.5, 12.0), (7.0, 12.0), (None, None)]
+
+def make_graph(parts: int, supplies: int, seed: int = 3) -> Graph:
+    rng = random.Random(seed)
+    g = Graph()
+    dec = lambda x: Literal(str(x), datatype=XSD.decimal)
+    for n in range(parts):
+        s = EX[f"Part_{n}"]
+        g.add((s, RDF.type, EX.SensorPart))
+        g.add((s, RDFS.label, Literal(f"part {n}")))
+        lo, hi = rng.choice(RANGES)
+        if lo is not None:
+            g.add((s, EX.vccMin, dec(lo)))
+            g.add((s, EX.vccMax, dec(hi)))
+        if rng.random() < 0.8:
+            g.add((s, EX.iActive_mA, dec(round(rng.uniform(0.1, 400), 2))))
+        if rng.random() < 0.6:
+            g.add((s, EX.iIdle_uA, dec(round(rng.uniform(0.1, 5000), 1))))
+    for n in range(supplies):
+        s = EX[f"Supply_{n}"]
+        g.add((s, RDF.type, EX.PowerSupply))
+        cap = rng.choice(["", f" {rng.choice([50, 100, 150, 300, 500, 800])}mA", f" {rng.choice([1, 1.5, 2, 3, 5])}A"])
+        kind = rng.choice(["regulator", "adjustable", "adapter", "battery"])
+        if kind == "regulator":
+            v = rng.choice([3.3, 5.0, 12.0])
+            g.add((s, RDFS.label, Literal(f"Regulator {n} {v}V{cap}")))
+            g.add((s, EX.vccMin, dec(v + 1.2)))
+            g.add((s, EX.vccMax, dec(v + 15)))
+        elif kind == "adjustable":
+            g.add((s, RDFS.label, Literal(f"{rng.choice(['LM2596', 'MT3608'])} module {n}{cap}")))
+            g.add((s, EX.notes, Literal("Step-down, adjustable")))
+            g.add((s, EX.vccMin, dec(rng.choice([1.2, 3.2]))))
+            g.add((s, EX.vccMax, dec(rng.choice([12, 24, 40]))))
+            kind = "regulator"
+        elif kind == "adapter":
+            v = rng.choice([5.0, 9.0, 12.0])
+            g.add((s, RDFS.label, Literal(f"{v}V adapter {n}{cap}")))
+            g.add((s, EX.vccMin, dec(v)))
+            g.add((s, EX.vccMax, dec(v)))
+        else:
+            g.add((s, RDFS.label, Literal(f"LiPo {n} {rng.choice([500, 1200, 2000])}mAh")))
+            g.add((s, EX.vccMin, dec(3.0)))
+            g.add((s, EX.vccMax, dec(4.2)))
+        g.add((s, EX.partKind, Literal(kind)))
+    return g
+
+def requests(parts: int, n: int, size: int, seed: int = 5):
+    rng = random.Random(seed)
+    for _ in range(n):
+        yield [f"Part_{rng.randrange(parts)}" for _ in range(rng.randint(1, size))]
+
+class Baseline:
+    """Per-request graph lookups and Python loops; the supplies' derived outputs are
+    kept as a plain list, scanned in full for every rail."""
+
+    def __init__(self, g: Graph, table: PartTable):
+        self.g = g
+        self.supplies = []
+        for r in table.rows_of_class(EX.PowerSupply).tolist():
+            lo, hi, cap = supply_output(table, r)
+            if not (np.isnan(lo) or np.isnan(hi)):
+                self.supplies.append((str(table.parts[r]), lo, hi, cap))
+
+    def analyze(self, parts, rails=RAILS, headroom=HEADROOM, k=TOP_K):
+        totals = {}
+        for p in parts:
+            s = EX[p]
+            lo, hi = decimal_val(self.g, s, EX.vccMin), decimal_val(self.g, s, EX.vccMax)
+            v = next((r for r in rails if (lo is None or r >= lo) and (hi is None or r <= hi)), lo)
+            a, i = decimal_val(self.g, s, EX.iActive_mA), decimal_val(self.g, s, EX.iIdle_uA)
+            t = totals.setdefault(v, [0.0, 0.0])
+            t[0] += a or 0.0
+            t[1] += i or 0.0
+        out = []
+        for v in sorted(totals):
+            need = totals[v][0] * (1.0 + headroom)
+            loaded = totals[v][0] > 0
+            fit = [(cap, n, iri) for n, (iri, lo, hi, cap) in enumerate(self.supplies) if loaded and lo <= v <= hi]
+            rated = sorted(x for x in fit if not np.isnan(x[0]) and x[0] >= need)[:k]
+            out.append((v, round(totals[v][0], 6), round(totals[v][1], 6), [iri for _, _, iri in rated]))
+        return out
+
+def summary(out):
+    return [(r["v"], r["i_active_mA"], r["i_idle_uA"], [s["iri"] for s in r["supplies"]]) for r in out["rails"]]
+
+def pct(xs, p):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(round(p / 100.0 * (len(xs) - 1))))]
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--parts", type=int, default=100_000)
+    ap.add_argument("--supplies", type=int, default=5000)
+    ap.add_argument("--requests", type=int, default=500)
+    ap.add_argument("--bom-size", type=int, default=40, help="max parts per BOM")
+    args = ap.parse_args()
+
+    g = make_graph(args.parts, args.supplies)
+    t0 = time.perf_counter()
+    table = PartTable(g)
+    t_table = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    budget = PowerBudget(table)
+    t_index = time.perf_counter() - t0
+    base = Baseline(g, table)
+
+    reqs = list(requests(args.parts, args.requests, args.bom_size))
+    lat, lat_base = [], []
+    for parts in reqs:
+        t0 = time.perf_counter()
+        out = budget.analyze(parts)
+        lat.append((time.perf_counter() - t0) * 1000.0)
+        t0 = time.perf_counter()
+        want = base.analyze(parts)
+        lat_base.append((time.perf_counter() - t0) * 1000.0)
+        if summary(out) != want:
+            raise SystemExit(f"MISMATCH for {parts}: {summary(out)} vs baseline {want}")
+
+    print(f"{args.parts} parts, {args.supplies} supplies ({budget.rated} rated, {len(budget.rows)} indexed); "
+          f"table {t_table:.2f}s, supply index {t_index:.3f}s")
+    print(f"{len(reqs)} BOMs of 1-{args.bom_size} parts: same rails and supplies as the baseline")
+    print(f"{'PATH':<22} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for name, xs in (("graph + loops", lat_base), ("power_budget", lat)):
+        print(f"{name:<22} {pct(xs, 50):>8.3f} {pct(xs, 99):>8.3f} {max(xs):>8.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# filename: tools/bench_recommend.py
+# usage:    python3 tools/bench_recommend.py [--rounds 20]
+# Compares p50/p99 latency of kb_adapter's /recommend on the in-memory index
+# against the SPARQL path, and checks both return identical responses.
+import argparse, statistics, time
+import kb_adapter as ka
+from kb_cache import ResponseCache
+
+REQS = [
+    ka.Req(cls="SensorPart"),
+    ka.Req(cls="SensorPart", properties=["distance"], interfaces=["GPIO_TRIGGER_ECHO"], v=5.0, budget=30, currency="CAD"),
+    ka.Req(cls="SensorPart", interfaces=["I2C"], v=3.3),
+    ka.Req(cls="ActuatorPart", properties=["power_state"], v=5.0, budget=10),
+    ka.Req(cls="ControllerBoard", budget=50),
+    ka.Req(cls="PowerSupply", v=12.0),
+    ka.Req(cls="Part", interfaces=["GPIO"], v=5.0, budget=30),
+]
+
+def pct(xs, p):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(round(p / 100.0 * (len(xs) - 1))))]
+
+def run(rounds: int, use_index: bool):
+    kb = ka.KB.current
+    ka.KB.current = kb if use_index else kb._replace(index=None)
+    lat, out = [], []
+    try:
+        for _ in range(rounds):
+            for r in REQS:
+                t0 = time.perf_counter()
+                out.append(ka.recommend(r))
+                lat.append((time.perf_counter() - t0) * 1000.0)
+    finally:
+        ka.KB.current = kb
+    return lat, out
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rounds", type=int, default=20)
+    args = ap.parse_args()
+
+    kb = ka.KB.current
+    if kb.graph is None:
+        raise SystemExit("bench_recommend needs the graph mode (unset KB_MODE)")
+    if kb.index is None:
+        ka.KB.current = kb._replace(index=ka.PartIndex(kb.graph))
+    ka.CACHE = ResponseCache(maxsize=0)  # time the lookup paths, not the response cache
+    print(f"KB: {len(kb.graph)} triples, {len(REQS)} request shapes x {args.rounds} rounds")
+
+    lat_sparql, out_sparql = run(args.rounds, use_index=False)
+    lat_index,  out_index  = run(args.rounds, use_index=True)
+    if out_sparql != out_index:
+        raise SystemExit("MISMATCH: index and SPARQL paths returned different results")
+
+    print(f"{'PATH':<8} {'p50 ms':>9} {'p99 ms':>9} {'mean ms':>9}")
+    for name, lat in (("sparql", lat_sparql), ("index", lat_index)):
+        print(f"{name:<8} {pct(lat, 50):>9.3f} {pct(lat, 99):>9.3f} {statistics.mean(lat):>9.3f}")
+    print(f"speedup (p50): {pct(lat_sparql, 50) / pct(lat_index, 50):.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# filename: tools/bench_repair_enrich.py
+# usage:    python3 tools/bench_repair_enrich.py [--rows 20000] [--standards 2000]
+# Times tools/repair_and_enrich.py on a synthetic catalog (iotkb_priced + iotkb_refined
+# cycled up to --rows) against a grown standard library (the lists in repair_and_enrich,
+# data-entry/generate_standard_parts and generate_more_parts, plus --standards renamed
+# revisions of them): the original iterrows() scan of every standard part with per-cell
+# df.at writes, against StandardIndex + enrich(), and checks both frames are identical.
+import argparse, os, sys, time
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "data-entry"))
+import repair_and_enrich as re_
+import generate_standard_parts, generate_more_parts
+
+SOURCES = ["data-entry/iotkb_priced.csv", "data-entry/iotkb_refined.csv"]
+
+def reference_enrich(df, parts) -> int:
+    """The original loop: every standard part for every row, first match wins."""
+    updates = 0
+    for index, row in df.iterrows():
+        row_label = str(row['part_label']).lower()
+        row_mpn = str(row['mpn']).lower()
+        match_found = None
+        for part in parts:
+            std_mpn = part.get('mpn', '').lower()
+            std_label = part.get('part_label', '').lower()
+            if std_mpn and std_mpn in row_mpn:
+                match_found = part
+                break
+            if std_label in row_label:
+                match_found = part
+                break
+        if match_found:
+            for key, val in match_found.items():
+                if key not in re_.SKIP_COLS:
+                    df.at[index, key] = val
+            updates += 1
+    return updates
+
+def standard_library(n: int) -> list:
+    base = re_.STANDARD_PARTS + generate_standard_parts.STANDARD_PARTS + generate_more_parts.STANDARD_PARTS
+    extra = [dict(p, part_label=f"{p['part_label']} Rev {k}", mpn=f"{p['mpn']}-R{k:05d}")
+             for k, p in zip(range(n), base * (n // len(base) + 1))]
+    return base + extra
+
+def load_catalog(n: int) -> pd.DataFrame:
+    base = pd.concat([pd.read_csv(os.path.join(ROOT, p)) for p in SOURCES], ignore_index=True)
+    df = pd.concat([base] * (n // len(base) + 1), ignore_index=True).iloc[:n].copy()
+    df['part_label'] = df['part_label'].astype(str)
+    df['mpn'] = df['mpn'].astype(str)
+    return df
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=20_000)
+    ap.add_argument("--standards", type=int, default=2_000, help="extra synthetic standard parts")
+    args = ap.parse_args()
+
+    parts = standard_library(args.standards)
+    df = load_catalog(args.rows)
+    print(f"{len(df)} rows, {len(parts)} standard parts")
+
+    ref = df.copy()
+    t0 = time.perf_counter()
+    n_ref = reference_enrich(ref, parts)
+    t_loop = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    n_new = re_.enrich(df, re_.StandardIndex(parts))
+    t_index = time.perf_counter() - t0
+
+    if n_ref != n_new or not ref.equals(df):
+        raise SystemExit("MISMATCH: enrich() disagrees with the per-row loop")
+
+    print(f"{'METHOD':<26} {'SECONDS':>8} {'ROWS/S':>10}")
+    print(f"{'iterrows + linear scan':<26} {t_loop:>8.2f} {len(df) / t_loop:>10.0f}")
+    print(f"{'StandardIndex + enrich':<26} {t_index:>8.2f} {len(df) / t_index:>10.0f}")
+    print(f"speedup: {t_loop / t_index:.1f}x, {n_new} rows enriched, identical frames")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+# filename: tools/bench_search.py
+# usage:    python3 tools/bench_search.py [--parts 100000] [--queries 1000] [--check 40] [--sparql 5]
+# kb_search.py on a synthetic catalog of --parts parts (bench_csv2ttl.py's synthetic
+# CSV, converted with csv2ttl_v3.py). Queries are 1-3 words taken from the catalog's
+# own labels, MPNs, manufacturers and notes, a third of them with a class, voltage or
+# budget filter. The first --check queries are also scored by a plain scan computing
+# BM25 part by part; both must return the same parts and scores. The scan and a
+# SPARQL REGEX over labels (what kb_server.py had; --sparql queries) are timed too.
+import argparse, builtins, math, os, random, re, tempfile, time
+from collections import Counter
+from rdflib import Graph, Literal
+from rdflib.namespace import RDF
+
+import csv2ttl_v3
+import kb_search as ks
+from bench_csv2ttl import make_csv
+
+TOOLS = os.path.dirname(os.path.abspath(__file__))
+TEMPLATE = os.path.join(os.path.dirname(TOOLS), "data-entry", "iotkb_refined.csv")
+CLASSES = ["SensorPart", "ActuatorPart", "ControllerBoard", "PowerSupply"]
+
+def make_graph(parts: int) -> Graph:
+    with tempfile.TemporaryDirectory(prefix="bench_search-") as work:
+        csv_path, ttl_path = os.path.join(work, "parts.csv"), os.path.join(work, "parts.ttl")
+        make_csv(TEMPLATE, csv_path, parts)
+        real_print, builtins.print = builtins.print, lambda *a, **k: None   # converter progress
+        try:
+            csv2ttl_v3.main(csv_path, ttl_path)
+        finally:
+            builtins.print = real_print
+        g = Graph()
+        g.parse(ttl_path, format="turtle")
+    return g
+
+def queries(index, n: int, seed: int = 5):
+    rng = random.Random(seed)
+    for _ in range(n):
+        words = []
+        while not words:
+            r = rng.randrange(len(index))
+            text = " ".join([index.labels[r]] + [index.value(p, r) or "" for p in index.fields])
+            words = [w for w in ks.tokens(text) if not w.isdigit()]
+        q = " ".join(rng.sample(words, min(len(words), rng.randint(1, 3))))
+        f = rng.randrange(6)
+        classes = [ks.EX[rng.choice(CLASSES)]] if f == 0 else None
+        v = rng.choice([3.3, 5.0]) if f == 1 else None
+        budget = rng.choice([2.0, 10.0]) if f == 2 else None
+        yield q, classes, v, budget
+
+class Scan:
+    """BM25 computed part by part from the graph's literals, no index."""
+
+    def __init__(self, g: Graph, index):
+        self.index = index
+        self.docs = []
+        for s in index.parts:
+            tf = Counter()
+            for pred, weight in ks.FIELDS:
+                split = ks.mpn_tokens if pred == ks.EX.mpn else ks.tokens
+                for o in g.objects(s, pred):
+                    if isinstance(o, Literal):
+                        for t in split(str(o)):
+                            tf[t] += weight
+            self.docs.append((tf, sum(tf.values()), set(g.objects(s, RDF.type))))
+        self.avgdl = sum(d[1] for d in self.docs) / len(self.docs)
+
+    def search(self, q, classes=None, v=None, budget=None, limit=20):
+        terms = set(ks.tokens(q))
+        n = len(self.docs)
+        df = Counter(t for tf, _, _ in self.docs for t in terms if t in tf)
+        out = []
+        for r, (tf, dl, types) in enumerate(self.docs):
+            hit = [t for t in terms if t in tf]
+            if not hit:
+                continue
+            if classes and not types & set(classes):
+                continue
+            ix = self.index
+            if v is not None and (v < ix.vcc_min[r] or v > ix.vcc_max[r]):
+                continue
+            if budget is not None and ix.price[r] > budget:
+                continue
+            score = 0.0
+            for t in hit:
+                idf = math.log(1.0 + (n - df[t] + 0.5) / (df[t] + 0.5))
+                score += idf * tf[t] * (ks.K1 + 1) / (tf[t] + ks.K1 * (1 - ks.B + ks.B * dl / self.avgdl))
+            out.append((-score, r))
+        out.sort()
+        return len(out), [(r, -s) for s, r in out[:limit]]
+
+def sparql_regex(g: Graph, q: str):
+    pattern = "|".join(re.escape(w) for w in ks.tokens(q))
+    return list(g.query(f"""
+PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+SELECT ?part WHERE {{ ?part rdfs:label ?label . FILTER(REGEX(STR(?label), "{pattern}", "i")) }}"""))
+
+def pct(xs, p):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(round(p / 100.0 * (len(xs) - 1))))]
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--parts", type=int, default=100_000)
+    ap.add_argument("--queries", type=int, default=1000)
+    ap.add_argument("--check", type=int, default=40, help="queries also answered by the scan")
+    ap.add_argument("--sparql", type=int, default=5, help="queries also answered by SPARQL REGEX")
+    args = ap.parse_args()
+
+    g = make_graph(args.parts)
+    t0 = time.perf_counter()
+    index = ks.SearchIndex(g)
+    t_build = time.perf_counter() - t0
+    qs = list(queries(index, args.queries))
+
+    lat, hits = [], 0
+    for q, classes, v, budget in qs:
+        t0 = time.perf_counter()
+        total, top = index.search(q, classes, v, budget)
+        lat.append((time.perf_counter() - t0) * 1000.0)
+        hits += total
+
+    scan, lat_scan = Scan(g, index), []
+    for q, classes, v, budget in qs[:args.check]:
+        t0 = time.perf_counter()
+        want = scan.search(q, classes, v, budget)
+        lat_scan.append((time.perf_counter() - t0) * 1000.0)
+        got = index.search(q, classes, v, budget)
+        if got[0] != want[0] or [r for r, _ in got[1]] != [r for r, _ in want[1]] or \
+                any(abs(a - b) > 1e-9 for (_, a), (_, b) in zip(got[1], want[1])):
+            raise SystemExit(f"MISMATCH for {q!r} {classes} v={v} budget={budget}: {got} vs scan {want}")
+
+    lat_sparql = []
+    for q, _, _, _ in qs[:args.sparql]:
+        t0 = time.perf_counter()
+        sparql_regex(g, q)
+        lat_sparql.append((time.perf_counter() - t0) * 1000.0)
+
+    print(f"{len(index)} parts, {len(index.vocab)} terms, {len(index.docs)} postings; index built in {t_build:.2f}s")
+    print(f"{len(qs)} queries, {hits / len(qs):.0f} hits on average; first {args.check} same as the BM25 scan")
+    print(f"{'PATH':<22} {'QUERIES':>8} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for name, xs in (("SPARQL REGEX (labels)", lat_sparql), ("BM25 scan", lat_scan), ("kb_search", lat)):
+        if xs:
+            print(f"{name:<22} {len(xs):>8} {pct(xs, 50):>9.3f} {pct(xs, 99):>9.3f} {max(xs):>9.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# filename: tools/bench_shacl.py
+# usage:    python3 tools/bench_shacl.py [--parts 1000000] [--ref-parts 20000] [--changed 0.01]
+# tools/shacl_validate.py on ontologies/iotkb_parts.ttl and on a synthetic catalog of
+# --parts parts (bench_csv2ttl.py's synthetic CSV, converted with csv2ttl_v3.py).
+# The baseline is a generic evaluation over an rdflib Graph: parse everything, find
+# each shape's focus nodes through rdfs:subClassOf and count every focus node's
+# values per path. It runs on the real file and on the first --ref-parts synthetic
+# parts; there, both must report the same results. The synthetic catalog is then
+# rebuilt with --changed of its rows edited, added or removed, and validated again
+# incrementally; that report must equal a full validation of the new file.
+import argparse, csv, os, random, tempfile, time
+from rdflib import Graph, URIRef
+from rdflib.namespace import RDF, RDFS
+
+import csv2ttl_v3
+import shacl_validate as sv
+from bench_csv2ttl import make_csv
+
+TOOLS = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(TOOLS)
+PARTS_TTL = os.path.join(ROOT, sv.DATA_TTL)
+SHAPES = os.path.join(ROOT, sv.SHAPES_TTL)
+SCHEMA = os.path.join(ROOT, sv.SCHEMA_TTL)
+TEMPLATE = os.path.join(ROOT, "data-entry", "iotkb_refined.csv")
+
+def reference(data):
+    """(focusNode, sourceShape, resultPath) per result of the generic evaluation, and seconds."""
+    t0 = time.perf_counter()
+    g = Graph()
+    g.parse(data, format="turtle")
+    g.parse(SCHEMA, format="turtle")
+    found = set()
+    for shape in sv.compile_shapes(SHAPES):
+        focus = set()
+        for c in shape.targets:
+            for sub in g.transitive_subjects(RDFS.subClassOf, URIRef(c)):
+                focus.update(g.subjects(RDF.type, sub))
+        for f in focus:
+            n = lambda p: len(set(g.objects(f, URIRef(p))))
+            for p, lo, hi, _, _ in shape.counts:
+                if n(p) < lo or (hi is not None and n(p) > hi):
+                    found.add((str(f), shape.iri, p))
+            if shape.alternatives is not None and not any(
+                    all(n(p) >= lo and (hi is None or n(p) <= hi) for p, lo, hi in alt) for alt in shape.alternatives):
+                found.add((str(f), shape.iri, ""))
+    return found, time.perf_counter() - t0
+
+def result_set(report):
+    return {(r["focusNode"], r["sourceShape"], r["resultPath"] or "") for r in report["results"]}
+
+def timed(data, report_file, full):
+    t0 = time.perf_counter()
+    report = sv.run(data, report_file, SHAPES, (SCHEMA,), full)
+    return report, time.perf_counter() - t0
+
+def edit_csv(src, dst, share, seed=11):
+    """Copy of the synthetic CSV with share of the rows changed: interfaces dropped,
+    MPNs and manufacturers cleared, rows removed or appended."""
+    rng = random.Random(seed)
+    with open(src, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        fields, rows = reader.fieldnames, list(reader)
+    out, added = [], 0
+    for r in rows:
+        if rng.random() < share:
+            op = rng.randrange(4)
+            if op == 0:
+                continue
+            if op == 1:
+                r["iface"] = ""
+            elif op == 2:
+                r["mpn"] = r["manufacturer"] = ""
+            else:
+                out.append(dict(r, part_label=f"{r['part_label']} rev B"))
+                added += 1
+        out.append(r)
+    with open(dst, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=fields)
+        w.writeheader()
+        w.writerows(out)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--parts", type=int, default=1_000_000)
+    ap.add_argument("--ref-parts", type=int, default=20_000, help="synthetic parts for the rdflib baseline (0 skips it)")
+    ap.add_argument("--changed", type=float, default=0.01, help="share of synthetic rows edited before the incremental run")
+    args = ap.parse_args()
+
+    rows = []   # (catalog, run, parts checked, results, seconds)
+    with tempfile.TemporaryDirectory(prefix="bench_shacl-") as work:
+        p = lambda name: os.path.join(work, name)
+
+        ref, t_ref = reference(PARTS_TTL)
+        report, t_full = timed(PARTS_TTL, p("parts.json"), True)
+        if result_set(report) != ref:
+            raise SystemExit("MISMATCH: compiled validation differs from the rdflib baseline on iotkb_parts.ttl")
+        inc, t_inc = timed(PARTS_TTL, p("parts.json"), False)
+        rows += [("iotkb_parts.ttl", "rdflib baseline", "-", len(ref), t_ref),
+                 ("iotkb_parts.ttl", "compiled, full", report["checked"], report["results_count"], t_full),
+                 ("iotkb_parts.ttl", "compiled, unchanged", inc["checked"], inc["results_count"], t_inc)]
+
+        quiet = lambda *a, **k: None
+        import builtins
+        real_print, builtins.print = builtins.print, quiet   # csv2ttl_v3's progress output
+        try:
+            if args.ref_parts:
+                make_csv(TEMPLATE, p("ref.csv"), args.ref_parts)
+                csv2ttl_v3.main(p("ref.csv"), p("ref.ttl"))
+            make_csv(TEMPLATE, p("big.csv"), args.parts)
+            csv2ttl_v3.main(p("big.csv"), p("big.ttl"))
+            edit_csv(p("big.csv"), p("big2.csv"), args.changed)
+            csv2ttl_v3.main(p("big2.csv"), p("big2.ttl"))
+        finally:
+            builtins.print = real_print
+
+        if args.ref_parts:
+            ref, t_ref = reference(p("ref.ttl"))
+            report, t_full = timed(p("ref.ttl"), p("ref.json"), True)
+            if result_set(report) != ref:
+                raise SystemExit("MISMATCH: compiled validation differs from the rdflib baseline on the synthetic slice")
+            name = f"synthetic {args.ref_parts}"
+            rows += [(name, "rdflib baseline", "-", len(ref), t_ref),
+                     (name, "compiled, full", report["checked"], report["results_count"], t_full)]
+
+        name = f"synthetic {args.parts}"
+        report, t_full = timed(p("big.ttl"), p("big.json"), True)
+        rows.append((name, "compiled, full", report["checked"], report["results_count"], t_full))
+        os.replace(p("big2.ttl"), p("big.ttl"))
+        inc, t_inc = timed(p("big.ttl"), p("big.json"), False)
+        rows.append((name, f"compiled, {args.changed:.0%} changed", inc["checked"], inc["results_count"], t_inc))
+        full, t_full = timed(p("big.ttl"), p("full.json"), True)
+        rows.append((name, "compiled, full again", full["checked"], full["results_count"], t_full))
+        if inc["mode"] != "incremental" or inc["results"] != full["results"]:
+            raise SystemExit("MISMATCH: incremental report differs from a full validation")
+
+    print(f"{'CATALOG':<22} {'RUN':<22} {'CHECKED':>8} {'RESULTS':>8} {'SECONDS':>8}")
+    for cat, run, checked, n, secs in rows:
+        print(f"{cat:<22} {run:<22} {checked:>8} {n:>8} {secs:>8.2f}")
+    print("same results as the rdflib baseline; incremental report equals the full one")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# filename: tools/bench_workers.py
+# usage:    python3 tools/bench_workers.py [--workers 1 4 16]
+# Starts N worker processes the way `uvicorn --workers N` would import kb_adapter,
+# once with the per-worker Graph (KB_MODE=graph) and once attached to the shared
+# memory-mapped catalog (KB_MODE=mmap), and reports RSS / PSS per worker.
+# PSS splits shared pages between the processes mapping them, so it shows what
+# each worker really adds to the machine.
+import argparse, multiprocessing as mp, os, statistics, sys
+
+def mem_kb():
+    rss = pss = 0
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                rss = int(line.split()[1])
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    pss = int(line.split()[1])
+    except OSError:
+        pass
+    return rss, pss
+
+def worker(mode, ready, done, out):
+    os.environ["KB_MODE"] = mode
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import fastapi, pydantic, rdflib  # common to both modes, measured as the baseline
+    base = mem_kb()[0]
+    import kb_adapter as ka
+    for cls in ("SensorPart", "ActuatorPart", "ControllerBoard", "PowerSupply", "Part"):
+        ka.recommend(ka.Req(cls=cls, v=5.0, budget=30))
+    ready.wait()          # all workers loaded: measure while every mapping is live
+    rss, pss = mem_kb()
+    out.put((base, rss, pss))
+    done.wait()
+
+def run(mode, n):
+    ctx = mp.get_context("spawn")
+    ready, done, out = ctx.Barrier(n + 1), ctx.Barrier(n + 1), ctx.Queue()
+    procs = [ctx.Process(target=worker, args=(mode, ready, done, out)) for _ in range(n)]
+    for p in procs:
+        p.start()
+    ready.wait()
+    stats = [out.get() for _ in range(n)]
+    done.wait()
+    for p in procs:
+        p.join()
+    return stats
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16])
+    args = ap.parse_args()
+
+    # build the snapshot and the catalog up front so no worker pays for compiling
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from kb_mmap import ensure_catalog
+    from kb_snapshot import load_graph
+    files = ["ontologies/iotkb_schema.ttl", "ontologies/iotkb_align.ttl", "ontologies/iotkb_parts.ttl"]
+    load_graph(files)
+    ensure_catalog(files)
+
+    print(f"{'MODE':<6} {'N':>3} {'RSS/worker MB':>14} {'KB part MB':>11} {'PSS/worker MB':>14}")
+    for n in args.workers:
+        for mode in ("graph", "mmap"):
+            stats = run(mode, n)
+            rss = statistics.mean(s[1] for s in stats) / 1024
+            kb = statistics.mean(s[1] - s[0] for s in stats) / 1024
+            pss = statistics.mean(s[2] for s in stats) / 1024
+            print(f"{mode:<6} {n:>3} {rss:>14.1f} {kb:>11.1f} {pss:>14.1f}")
+
+if __name__ == "__main__":
+    main()
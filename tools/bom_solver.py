@@ -0,0 +1,241 @@
+# filename: tools/bom_solver.py
+# Whole-BOM solver around a chosen controller, on the columnar part table
+# (part_table.py). Given the controller and a list of needs (capabilities such as
+# distance, motion, power_state) it returns the k cheapest complete sets of parts
+# such that every part
+#   - talks one of the controller's interfaces (ex:supportsInterface, or the board's
+#     own ex:hasInterface when it declares none),
+#   - runs on the BOM's rail (the requested voltage, else the controller's logic
+#     level and the 3.3 V / 5 V rails inside its vccMin..vccMax),
+#   - and the whole set stays within the budget.
+# Prices are only added up in one currency: every priced part of a BOM shares the
+# same ex:priceCurrency (the requested one, if any; parts without a currency fit any
+# BOM, as in /recommend), since the catalog has no exchange rates.
+# A part observing or acting on several of the needs (BME280: temperature and
+# humidity) fills all of them for one price. Parts on the I2C bus must be able to
+# take distinct addresses (i2c_addr.py): a BOM with a BME280 and a BMP180, both fixed
+# at 0x77, is never returned.
+#
+# The candidate lists per need are built once, sorted by price; a request only masks
+# them (rail, interfaces, budget) and runs a depth-first branch-and-bound over the
+# needs with the fewest candidates first. A branch is cut when its running cost plus
+# a lower bound for the still-open needs (each need's cheapest price per need it
+# fills) cannot beat the k-th best BOM found so far. The search stops at the latency
+# budget and returns what it has, flagged as not proven optimal.
+import heapq, time
+import numpy as np
+from rdflib import Namespace, URIRef
+
+from i2c_addr import assign, fits, fmt
+from part_table import PartTable
+
+EX = Namespace("https://example.org/iotkb#")
+
+RAILS = (3.3, 5.0)       # rails a board can offer when the request names none
+UNPRICED = 1e9           # ranking cost of a part without a price: after every priced BOM
+TOP_K = 3
+TIME_BUDGET_MS = 50.0
+CHECK_EVERY = 256        # search nodes between deadline checks
+
+class BomSolver:
+    def __init__(self, table: PartTable):
+        self.table = table
+        # need (capability IRI) -> rows that fill it, cheapest first (unpriced last)
+        cost = np.where(np.isnan(table.price), UNPRICED, table.price)
+        self.cost, self.paid = cost, np.nan_to_num(table.price)   # paid: what counts against the budget
+        # currency code per row (0: none, or no price to add up); 1.. index self.currencies
+        self.currencies = [None] + sorted({c for c in table.currency if c})
+        code = {c: i for i, c in enumerate(self.currencies)}
+        self.cur = np.where(np.isnan(table.price), 0, np.array([code.get(c, 0) for c in table.currency], dtype=np.int64))
+        self.currency_code = code
+        self.by_need = {}
+        for cap, i in table.caps.ids.items():
+            word, bit = i >> 6, np.uint64(1) << np.uint64(i & 63)
+            rows = np.flatnonzero(table.need_bits[:, word] & bit)
+            self.by_need[cap] = rows[np.lexsort((rows, cost[rows]))]
+
+    def controller_row(self, name: str):
+        """Row of a controller given by IRI or ex: local name (None if unknown)."""
+        t = self.table
+        return t.row_of.get(name, t.row_of.get(str(EX[name])))
+
+    def controller_ifaces(self, row: int) -> np.ndarray:
+        t = self.table
+        bits = t.supports_bits[row]
+        return bits if bits.any() else t.iface_bits[row]
+
+    def rails(self, row: int, v=None) -> list:
+        if v is not None:
+            return [float(v)]
+        t = self.table
+        lo, hi, logic = t.vcc_min[row], t.vcc_max[row], t.logic[row]
+        out = [] if np.isnan(logic) else [float(logic)]
+        out += [r for r in RAILS if not (r < lo) and not (r > hi) and r not in out]
+        return out or [None]
+
+    def candidates(self, cap, ctrl: int, iface_mask, rail, budget, currency=None) -> np.ndarray:
+        """Rows filling cap that fit the controller's interfaces, the rail, the
+        currency and the budget (on their own), cheapest first."""
+        t = self.table
+        rows = self.by_need.get(cap, np.zeros(0, dtype=np.int64))
+        keep = rows != ctrl
+        if iface_mask.any():
+            keep &= (t.iface_bits[rows] & iface_mask).any(axis=1)
+        if rail is not None:
+            keep &= ~(rail < t.vcc_min[rows]) & ~(rail > t.vcc_max[rows])
+        if budget is not None:
+            keep &= ~(t.price[rows] > budget)
+        if currency is not None:
+            keep &= (self.cur[rows] == 0) | (self.cur[rows] == self.currency_code.get(currency, -1))
+        return rows[keep]
+
+    def solve(self, controller: str, needs, v=None, budget=None, k=TOP_K, time_budget_ms=TIME_BUDGET_MS,
+              currency=None) -> dict:
+        """The k cheapest BOMs for the needs (capability local names or IRIs), over every
+        rail the controller offers, each priced in a single currency (currency, if
+        given). complete is False if the latency budget ran out before the search
+        could prove the BOMs are the cheapest."""
+        t0 = time.perf_counter()
+        deadline = t0 + time_budget_ms / 1000.0
+        t = self.table
+        ctrl = self.controller_row(controller)
+        if ctrl is None:
+            raise KeyError(f"unknown controller {controller!r}")
+        caps = []
+        for n in needs:
+            cap = URIRef(n) if ":" in n else EX[n]
+            if cap not in caps:
+                caps.append(cap)
+        iface_mask = self.controller_ifaces(ctrl)
+
+        found, stats = {}, {"nodes": 0, "complete": True}
+        missing = set()
+        for rail in self.rails(ctrl, v):
+            lists = [self.candidates(c, ctrl, iface_mask, rail, budget, currency) for c in caps]
+            empty = [c for c, rows in zip(caps, lists) if not len(rows)]
+            if empty:
+                missing.update(empty)
+                continue
+            for cost, rows in self._search(caps, lists, budget, k, deadline, stats):
+                key = tuple(sorted(rows))
+                if key not in found or cost < found[key][0]:
+                    found[key] = (cost, rail, rows)
+            if not stats["complete"]:
+                break
+        best = sorted(found.values(), key=lambda x: (x[0], tuple(t.labels[r] for r in x[2])))[:k]
+
+        def part(r, filled, addr):
+            return {"iri": str(t.parts[r]), "label": t.labels[r], "price": t.value(t.price, r),
+                    "currency": t.currency[r], "vcc_min": t.value(t.vcc_min, r), "vcc_max": t.value(t.vcc_max, r),
+                    "i2c_addr": fmt(addr), "needs": [c.split("#")[-1] for c in caps if c in filled[r]]}
+        boms = []
+        for cost, rail, rows in best:
+            filled = {r: {c for c in caps if self._fills(r, c)} for r in rows}
+            rows = sorted(rows, key=lambda r: min(caps.index(c) for c in filled[r]))   # in need order
+            prices = [t.value(t.price, r) for r in rows]
+            addrs = assign([t.i2c_mask(r) for r in rows])
+            boms.append({"rail": rail, "price": round(sum(p for p in prices if p is not None), 6),
+                         "currency": self.currencies[max(self.cur[rows].tolist())],
+                         "unpriced": sum(p is None for p in prices),
+                         "parts": [part(r, filled, a) for r, a in zip(rows, addrs)]})
+        return {"controller": {"iri": str(t.parts[ctrl]), "label": t.labels[ctrl], "price": t.value(t.price, ctrl)},
+                "needs": [c.split("#")[-1] for c in caps], "count": len(boms), "boms": boms,
+                "missing": sorted(c.split("#")[-1] for c in missing) if not boms else [],
+                "complete": stats["complete"], "nodes": stats["nodes"],
+                "ms": round((time.perf_counter() - t0) * 1000.0, 3)}
+
+    def _fills(self, row: int, cap) -> bool:
+        return bool(self._cover(np.array([row]), [cap])[0])
+
+    def _cover(self, rows: np.ndarray, caps) -> np.ndarray:
+        """Per row, the caps it fills as a bit mask (bit j for caps[j])."""
+        out = np.zeros(len(rows), dtype=np.int64)
+        for j, cap in enumerate(caps):
+            i = self.table.caps.ids.get(cap)
+            if i is not None:
+                hit = self.table.need_bits[rows, i >> 6] & (np.uint64(1) << np.uint64(i & 63))
+                out |= (hit != 0).astype(np.int64) << j
+        return out
+
+    def _search(self, caps, lists, budget, k, deadline, stats):
+        """Branch-and-bound over the needs; returns [(cost, rows)] of the k cheapest
+        minimal BOMs found (exact unless stats['complete'] is cleared)."""
+        n = len(caps)
+        full = (1 << n) - 1
+        # per candidate: cost, row, the needs of this request it fills (bit mask), the
+        # price counted against the budget, its I2C address mask and currency code
+        cands, h = [], []
+        for rows in lists:
+            masks = self._cover(rows, caps)
+            cost = self.cost[rows]
+            bits = self.table.i2c_bits[rows]
+            i2c = [lo | hi << 64 for lo, hi in bits.tolist()]
+            cands.append(list(zip(cost.tolist(), rows.tolist(), masks.tolist(), self.paid[rows].tolist(), i2c,
+                                  self.cur[rows].tolist())))
+            # lower bound for the need: cheapest cost per need filled among its candidates
+            h.append(float((cost / np.bitwise_count(masks)).min()))
+        order = sorted(range(n), key=lambda j: len(cands[j]))
+
+        best = []            # max-heap of (-cost, rows) holding the k cheapest so far
+        seen = set()
+        counter = [0]
+
+        def threshold():
+            return -best[0][0] if len(best) >= k else float("inf")
+
+        def dfs(covered, spent, paid, chosen, masks, addrs, bus, cur):
+            counter[0] += 1
+            if counter[0] % CHECK_EVERY == 0 and time.perf_counter() > deadline:
+                stats["complete"] = False
+            if not stats["complete"]:
+                return
+            if covered == full:
+                # drop non-minimal sets: every part must fill a need no other part fills
+                for x, m in enumerate(masks):
+                    others = 0
+                    for y, o in enumerate(masks):
+                        if y != x:
+                            others |= o
+                    if m & ~others == 0:
+                        return
+                key = frozenset(chosen)
+                if key in seen:
+                    return
+                seen.add(key)
+                item = (-spent, sorted(chosen))
+                if len(best) < k:
+                    heapq.heappush(best, item)
+                elif spent < -best[0][0]:
+                    heapq.heapreplace(best, item)
+                return
+            j = next(j for j in order if not covered >> j & 1)
+            rest = sum(h[i] for i in range(n) if not covered >> i & 1 and i != j)
+            for c, r, m, p, a, cu in cands[j]:
+                bound = spent + c
+                if bound >= threshold():
+                    break        # candidates are sorted by cost
+                if budget is not None and paid + p > budget:
+                    continue
+                if cu and cur and cu != cur:
+                    continue     # priced in another currency than the parts so far
+                if a and not fits(addrs, bus, a):
+                    continue     # no free I2C address left for it
+                new = covered | m
+                lb = bound + rest - sum(h[i] for i in range(n) if m >> i & 1 and not covered >> i & 1 and i != j)
+                if lb >= threshold():
+                    continue
+                chosen.append(r)
+                masks.append(m)
+                if a:
+                    addrs.append(a)
+                dfs(new, bound, paid + p, chosen, masks, addrs, bus | a, cur or cu)
+                chosen.pop()
+                masks.pop()
+                if a:
+                    addrs.pop()
+                if not stats["complete"]:
+                    return
+
+        dfs(0, 0.0, 0.0, [], [], [], 0, 0)
+        stats["nodes"] += counter[0]
+        return sorted(((-c, rows) for c, rows in best))
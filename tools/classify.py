@@ -0,0 +1,192 @@
+# filename: tools/classify.py
+# Shared rule-based classifier for the importers (import_fritzing_zip.py,
+# merge_fritzing.py, data-entry/auto_categorize.py, csv2ttl.py). The rules live in
+# classification_rules.json (CLASSIFY_RULES overrides the path), one named rule set
+# per tool; each set is compiled once and classifies whole columns per call. Rule sets
+# applied to the same rows (merge_fritzing.py's category and kind) share one scan
+# through match_many().
+#
+# Modes:
+#   substring  first rule (file order) with any keyword inside the text wins
+#   tags       like substring over a row's tag list, but keyword order decides and
+#              the matched keyword/tag is returned so the caller can derive a kind
+#   alias      exact lookup of a normalized value (lowercased, ignore_chars removed)
+import json, os, re
+from functools import lru_cache
+import numpy as np
+
+RULES_PATH = os.environ.get("CLASSIFY_RULES",
+                            os.path.join(os.path.dirname(os.path.abspath(__file__)), "classification_rules.json"))
+SEP = "\x00"   # joins rows (and tags); no keyword contains it
+NONE = np.iinfo(np.int64).max
+
+def trie_pattern(words) -> str:
+    trie = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[''] = {}
+    def emit(node):
+        # longer continuations first, the end-of-word alternative last
+        alts = [re.escape(ch) + emit(sub) for ch, sub in sorted(node.items()) if ch]
+        if '' in node:
+            alts.append('')
+        return alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+    return emit(trie)
+
+class KeywordMatcher:
+    """All keywords compiled into one trie-shaped regex inside a lookahead, so a single
+    finditer over a whole column reports every position where a keyword starts, with
+    the longest keyword found there. Any other keyword starting at that position is a
+    prefix of it, so a table of "lowest priority among its prefixes" turns each hit
+    into the best keyword at that position; the minimum per row is the winner.
+    Several keyword lists (keywords, *more) share one regex and one scan; first_many()
+    answers for each of them."""
+
+    def __init__(self, keywords, *more):
+        self.prios = []               # per list: keyword -> lowest priority that lists it
+        for kws in (keywords,) + more:
+            prio = {}
+            for kw, p in kws:
+                prio.setdefault(kw, p)
+            self.prios.append(prio)
+        words = set().union(*self.prios)
+        self.best = {kw: tuple(self.best_prefix(kw, k) for k in range(len(self.prios))) for kw in words}
+        first = "".join(sorted({kw[0] for kw in words}))
+        self.pattern = re.compile("(?=[" + re.escape(first) + "])(?=(" + trie_pattern(words) + "))") if words else None
+
+    def best_prefix(self, kw: str, k: int) -> int:
+        """Lowest priority in list k among the prefixes of kw (NONE if none)."""
+        prio = self.prios[k]
+        return min((prio[kw[:j]] for j in range(1, len(kw) + 1) if kw[:j] in prio), default=NONE)
+
+    def first(self, texts) -> np.ndarray:
+        """Lowest keyword priority found in each text (-1 if none)."""
+        return self.first_many(texts)[0]
+
+    def first_many(self, texts, limits=None) -> list:
+        """first() of every keyword list in one scan. limits: per list None or, for
+        each text, how many leading characters that list looks at."""
+        n_lists = len(self.prios)
+        hits = [np.full(len(texts), NONE, dtype=np.int64) for _ in range(n_lists)]
+        if self.pattern is not None and len(texts):
+            lens = np.fromiter((len(t) + 1 for t in texts), dtype=np.int64, count=len(texts))
+            starts = np.cumsum(lens) - lens
+            pos, found = [], []
+            for m in self.pattern.finditer(SEP.join(texts)):
+                pos.append(m.start())
+                found.append(m.group(1))
+            if pos:
+                rows = np.searchsorted(starts, pos, side="right") - 1
+                best = self.best
+                for k in range(n_lists):
+                    prios = np.fromiter((best[kw][k] for kw in found), dtype=np.int64, count=len(found))
+                    if limits is not None and limits[k] is not None:
+                        # a keyword running past the limit only counts up to it
+                        room = np.asarray(limits[k], dtype=np.int64)[rows] - (np.asarray(pos) - starts[rows])
+                        over = np.flatnonzero(np.fromiter(map(len, found), dtype=np.int64, count=len(found)) > room)
+                        for j in over.tolist():
+                            prios[j] = self.best_prefix(found[j][:max(int(room[j]), 0)], k)
+                    np.minimum.at(hits[k], rows, prios)
+        for hit in hits:
+            hit[hit == NONE] = -1
+        return hits
+
+class RuleSet:
+    def __init__(self, name: str, spec: dict):
+        self.name = name
+        self.mode = spec.get("mode", "substring")
+        self.rules = spec["rules"]
+        self.default = spec.get("default", {})
+        self.outputs = [{k: v for k, v in r.items() if k not in ("keywords", "aliases")} for r in self.rules]
+        self._subsets = {}
+        if self.mode == "alias":
+            self.ignore = re.compile("[" + re.escape(spec.get("ignore_chars", "")) + "]") if spec.get("ignore_chars") else None
+            self.aliases = {}
+            for out, r in zip(self.outputs, self.rules):
+                for a in r["aliases"]:
+                    self.aliases.setdefault(a, out)
+        elif self.mode == "tags":
+            # keyword order across the whole file is the priority
+            self.keywords = [(i, kw) for i, r in enumerate(self.rules) for kw in r["keywords"]]
+            self.prios = [(kw, k) for k, (_, kw) in enumerate(self.keywords)]
+        else:
+            self.prios = [(kw, i) for i, r in enumerate(self.rules) for kw in r["keywords"]]
+        if self.mode != "alias":
+            self.matcher = KeywordMatcher(self.prios)
+
+    def check_keywords(self):
+        if self.mode == "alias":
+            raise ValueError(f"rule set {self.name!r} is an alias table, use lookup()")
+
+    def match(self, texts) -> np.ndarray:
+        """Index of the winning rule for each (lowercased) text, -1 if none."""
+        self.check_keywords()
+        return self.matcher.first(texts)
+
+    def outputs_of(self, ids) -> list:
+        """Output fields (a fresh dict per row) of the rules match() returned, the
+        default for -1."""
+        return [dict(self.outputs[i] if i >= 0 else self.default) for i in np.asarray(ids).tolist()]
+
+    def classify(self, texts) -> list:
+        """Output fields of the winning rule for each text (the default if none)."""
+        return self.outputs_of(self.match(texts))
+
+    def classify_tags(self, tag_lists) -> list:
+        """Per row of (lowercased) tags: (output, keyword, tag) of the winning keyword, tag
+        being the keyword itself if it is one of the tags, else the first tag containing
+        it; (default, None, None) if nothing matched."""
+        self.check_keywords()
+        out = []
+        for tags, k in zip(tag_lists, self.matcher.first([SEP.join(t) for t in tag_lists]).tolist()):
+            if k < 0:
+                out.append((dict(self.default), None, None))
+                continue
+            i, kw = self.keywords[k]
+            tag = kw if kw in tags else next(t for t in tags if kw in t)
+            out.append((dict(self.outputs[i]), kw, tag))
+        return out
+
+    def lookup(self, value):
+        """Output of the rule listing value as an alias (None if unknown)."""
+        if self.mode != "alias":
+            raise ValueError(f"rule set {self.name!r} has no aliases, use match() or classify()")
+        key = (value or "").strip().lower()
+        if self.ignore is not None:
+            key = self.ignore.sub("", key)
+        out = self.aliases.get(key)
+        return None if out is None else dict(out)
+
+    def where(self, **fields) -> "RuleSet":
+        """Rule set restricted to the rules whose outputs match fields (order kept)."""
+        key = tuple(sorted(fields.items()))
+        if key not in self._subsets:
+            spec = {"mode": self.mode, "default": self.default,
+                    "rules": [r for r, o in zip(self.rules, self.outputs)
+                              if all(o.get(k) == v for k, v in fields.items())]}
+            self._subsets[key] = RuleSet(f"{self.name}[{key}]", spec)
+        return self._subsets[key]
+
+_shared = {}   # tuple of rule sets -> their KeywordMatcher
+
+def match_many(sets, texts, limits=None) -> list:
+    """match() of several keyword rule sets over the same texts in one scan. limits:
+    per set None or, for each text, the length of the leading part that set looks at
+    (e.g. the name + tags part of a longer text)."""
+    sets = tuple(sets)
+    for rs in sets:
+        rs.check_keywords()
+    if sets not in _shared:
+        _shared[sets] = KeywordMatcher(*(rs.prios for rs in sets))
+    return _shared[sets].first_many(texts, limits)
+
+@lru_cache(maxsize=None)
+def load_rules(path: str = None) -> dict:
+    with open(path or RULES_PATH, encoding="utf-8") as f:
+        spec = json.load(f)
+    return {name: RuleSet(name, s) for name, s in spec.items()}
+
+def ruleset(name: str, path: str = None) -> RuleSet:
+    return load_rules(path)[name]
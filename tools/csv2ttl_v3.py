@@ -1,4 +1,5 @@
-import sys, csv, re
+import sys, csv, io, re, os, shutil, tempfile, argparse
+from concurrent.futures import ProcessPoolExecutor
 from typing import Optional, List
 
 BASE = "https://example.org/iotkb"
@@ -64,140 +65,251 @@ HEADER = f"""@prefix ex:   <{EX}> .
   owl:imports <{BASE}> .
 """
 
-def main(csv_in, ttl_out):
-    try:
-        with open(csv_in, newline='', encoding="utf-8") as f:
-            rows = list(csv.DictReader(f))
-    except FileNotFoundError:
-        print(f"Error: Input file not found at {csv_in}")
-        sys.exit(1)
-    except Exception as e:
-        print(f"Error reading CSV: {e}")
-        sys.exit(1)
+WRITE_BUFFER = 1 << 20
 
-    # Collect distinct object properties to declare them
-    obs_props, act_props, ifaces, features = set(), set(), set(), set()
-    for r in rows:
-        for p in tokens(r.get("observed_property","")): obs_props.add(p)
-        for p in tokens(r.get("actuatable_property","")): act_props.add(p)
-        for i in tokens(r.get("iface","")): ifaces.add(i)
-        for f in tokens(r.get("feature_of_interest","")): features.add(f)
+def add_vocab(vocab, r):
+    obs_props, act_props, ifaces, features = vocab
+    for p in tokens(r.get("observed_property","")): obs_props.add(p)
+    for p in tokens(r.get("actuatable_property","")): act_props.add(p)
+    for i in tokens(r.get("iface","")): ifaces.add(i)
+    for f in tokens(r.get("feature_of_interest","")): features.add(f)
 
-    out = [HEADER]
+def scan_vocab(csv_in):
+    """Pass 1: distinct properties / interfaces / features to declare, and the row count."""
+    vocab = (set(), set(), set(), set())
+    n_rows = 0
+    with open(csv_in, newline='', encoding="utf-8") as f:
+        for r in csv.DictReader(f):
+            n_rows += 1
+            add_vocab(vocab, r)
+    return (*vocab, n_rows)
 
-    # Declare Individuals for properties/interfaces
+# --- Sharding (--jobs N) ---
+SHARDS_PER_JOB = 4
+
+class ByteLines:
+    """Decoded lines of a binary file between two byte offsets. csv pulls one line
+    at a time, so after each row .pos is the byte offset where that record ends
+    (quoted fields spanning several lines included)."""
+    def __init__(self, f, start=0, end=None):
+        self.f, self.pos, self.end = f, start, end
+        f.seek(start)
+
+    def __iter__(self):
+        for line in self.f:
+            if self.end is not None and self.pos >= self.end:
+                return
+            self.pos += len(line)
+            yield line.decode("utf-8")
+
+def scan_shards(csv_in, n_shards):
+    """Pass 1 for --jobs: the vocabulary plus record-aligned byte ranges of roughly equal size."""
+    vocab = (set(), set(), set(), set())
+    n_rows = 0
+    size = os.path.getsize(csv_in)
+    with open(csv_in, "rb") as f:
+        lines = ByteLines(f)
+        reader = csv.DictReader(lines)
+        fieldnames = reader.fieldnames
+        edges = [lines.pos]
+        for r in reader:
+            n_rows += 1
+            add_vocab(vocab, r)
+            if lines.pos >= size * len(edges) / n_shards:
+                edges.append(lines.pos)
+        if lines.pos > edges[-1]:
+            edges.append(lines.pos)
+    return (*vocab, n_rows), fieldnames, list(zip(edges, edges[1:]))
+
+def render_shard(job):
+    """Worker: render the part blocks of one byte range to its own file."""
+    csv_in, fieldnames, start, end, out_path = job
+    with open(csv_in, "rb") as f, open(out_path, "w", encoding="utf-8", newline="", buffering=WRITE_BUFFER) as out:
+        for r in csv.DictReader(ByteLines(f, start, end), fieldnames=fieldnames):
+            block = part_block(r)
+            if block is not None:
+                out.write("\n" + "\n".join(block) + "\n")
+    return out_path
+
+def part_block(r) -> Optional[List[str]]:
+    """Turtle lines for one CSV row (None if the row has no usable label)."""
+    label_raw = r.get("part_label") or (r.get("manufacturer","") + " " + r.get("mpn","")).strip()
+    if not label_raw: return None
+    
+    local = iri_local(label_raw)
+    
+    part_type = (r.get("category","") or r.get("part_type","")).strip().lower()
+    cls = CLASS_BY_PART_TYPE.get(part_type) or "Part"
+
+    block = [f"ex:{local} a ex:{cls} ;"]
+    
+    # --- Helper Functions ---
+    def put_dec(prop, key):
+        v = decfrag(r.get(key))
+        if v is not None:
+            block.append(f"  {prop} \"{v}\"^^xsd:decimal ;")
+    def put_int(prop, key):
+        v = intfrag(r.get(key))
+        if v is not None:
+            block.append(f"  {prop} \"{v}\"^^xsd:integer ;")
+    def put_str(prop, key):
+        raw = (r.get(key) or "").strip()
+        if raw and raw.lower() != 'nan':
+            block.append(f"  {prop} \"{esc_lit(raw)}\" ;")
+    def put_uri(prop, key):
+        raw = (r.get(key) or "").strip()
+        if raw and raw.lower() != 'nan':
+            # Simple check to ensure it looks like a URI
+            if raw.startswith("http"):
+                block.append(f"  {prop} \"{esc_lit(raw)}\"^^xsd:anyURI ;")
+            else:
+                block.append(f"  {prop} \"{esc_lit(raw)}\" ;")
+
+    # --- Map All Columns ---
+    put_str("rdfs:label", "part_label")
+    
+    # Identity
+    put_str("ex:partKind", "kind") # or 'part_kind'
+    put_str("ex:manufacturer", "manufacturer")
+    put_str("ex:mpn", "mpn")
+    
+    # Semantics
+    for p in tokens(r.get("observed_property","")):
+        block.append(f"  sosa:observesProperty ex:{iri_local(p)} ;") # Changed to proper sosa: prop
+    for p in tokens(r.get("actuatable_property","")):
+        block.append(f"  sosa:actsOnProperty   ex:{iri_local(p)} ;") # Changed to proper sosa: prop
+    for f in tokens(r.get("feature_of_interest","")):
+        block.append(f"  sosa:hasFeatureOfInterest ex:{iri_local(f)} ;") # Changed to proper sosa: prop
+    for i in tokens(r.get("iface","")):
+        block.append(f"  ex:hasInterface     ex:{iri_local(i)} ;")
+    
+    # Electrical
+    put_dec("ex:vccMin", "vcc_min")
+    put_dec("ex:vccMax", "vcc_max")
+    put_dec("ex:logicLevel", "logic_level")
+    put_dec("ex:iActive_mA", "i_active_mA")
+    put_dec("ex:iIdle_uA", "i_idle_uA")
+    
+    # Physical
+    put_str("ex:packageCase", "package_case")
+    put_int("ex:pinCount", "pin_count")
+    put_dec("ex:tempMinC", "temp_min_c")
+    put_dec("ex:tempMaxC", "temp_max_c")
+
+    # Interface Details
+    put_str("ex:i2cAddrDefault", "i2c_addr_default")
+    put_str("ex:i2cAddrRange", "i2c_addr_range")
+    put_dec("ex:spiMaxFreq_MHz", "spi_max_mhz")
+    put_str("ex:uartBaud", "uart_baud")
+    
+    # Performance
+    put_dec("ex:sampleRateMax_Hz", "sample_rate_max_hz")
+    put_dec("ex:latency_ms", "latency_ms")
+    put_dec("ex:accuracy_pct", "accuracy_pct")
+    put_dec("ex:rangeMin", "range_min")
+    put_dec("ex:rangeMax", "range_max")
+    put_str("ex:units", "units")
+    
+    # Metadata
+    put_uri("ex:datasheetURL", "datasheet_url")
+    put_uri("ex:productURL", "product_url")
+    put_dec("ex:offerPrice", "offer_price")
+    put_str("ex:priceCurrency", "currency")
+    put_str("ex:lifecycle", "lifecycle")
+    put_str("ex:notes", "notes")
+
+    if block[-1].endswith(" ;"):
+        block[-1] = block[-1][:-2] + " ."
+    else:
+        block.append(".")
+
+    return block
+
+def declarations(vocab) -> List[str]:
+    """Individuals for the properties/interfaces/features found in pass 1."""
+    obs_props, act_props, ifaces, features = vocab
+    decls = []
     for p in sorted(obs_props):
-        out.append(f"ex:{iri_local(p)} a sosa:ObservableProperty .")
+        decls.append(f"ex:{iri_local(p)} a sosa:ObservableProperty .")
     for p in sorted(act_props):
-        out.append(f"ex:{iri_local(p)} a sosa:ActuatableProperty .")
+        decls.append(f"ex:{iri_local(p)} a sosa:ActuatableProperty .")
     for i in sorted(ifaces):
-        out.append(f"ex:{iri_local(i)} a ex:Interface .")
+        decls.append(f"ex:{iri_local(i)} a ex:Interface .")
     for f in sorted(features):
-        out.append(f"ex:{iri_local(f)} a sosa:FeatureOfInterest .")
-    
-    if obs_props or act_props or ifaces or features:
-        out.append("")
+        decls.append(f"ex:{iri_local(f)} a sosa:FeatureOfInterest .")
+    if decls:
+        decls.append("")
+    return decls
 
+def frame_to_ttl(df, ttl_out) -> int:
+    """main() for a DataFrame already in memory: its rows are rendered from their CSV
+    text (an in-memory CSV, so values format exactly as in a file written with
+    df.to_csv), giving the same Turtle as main() on that file. Returns the row count."""
+    rows = list(csv.DictReader(io.StringIO(df.to_csv(index=False))))
+    vocab = (set(), set(), set(), set())
     for r in rows:
-        label_raw = r.get("part_label") or (r.get("manufacturer","") + " " + r.get("mpn","")).strip()
-        if not label_raw: continue
-        
-        local = iri_local(label_raw)
-        
-        part_type = (r.get("category","") or r.get("part_type","")).strip().lower()
-        cls = CLASS_BY_PART_TYPE.get(part_type) or "Part"
-
-        block = [f"ex:{local} a ex:{cls} ;"]
-        
-        # --- Helper Functions ---
-        def put_dec(prop, key):
-            v = decfrag(r.get(key))
-            if v is not None:
-                block.append(f"  {prop} \"{v}\"^^xsd:decimal ;")
-        def put_int(prop, key):
-            v = intfrag(r.get(key))
-            if v is not None:
-                block.append(f"  {prop} \"{v}\"^^xsd:integer ;")
-        def put_str(prop, key):
-            raw = (r.get(key) or "").strip()
-            if raw and raw.lower() != 'nan':
-                block.append(f"  {prop} \"{esc_lit(raw)}\" ;")
-        def put_uri(prop, key):
-            raw = (r.get(key) or "").strip()
-            if raw and raw.lower() != 'nan':
-                # Simple check to ensure it looks like a URI
-                if raw.startswith("http"):
-                    block.append(f"  {prop} \"{esc_lit(raw)}\"^^xsd:anyURI ;")
-                else:
-                    block.append(f"  {prop} \"{esc_lit(raw)}\" ;")
-
-        # --- Map All Columns ---
-        put_str("rdfs:label", "part_label")
-        
-        # Identity
-        put_str("ex:partKind", "kind") # or 'part_kind'
-        put_str("ex:manufacturer", "manufacturer")
-        put_str("ex:mpn", "mpn")
-        
-        # Semantics
-        for p in tokens(r.get("observed_property","")):
-            block.append(f"  sosa:observesProperty ex:{iri_local(p)} ;") # Changed to proper sosa: prop
-        for p in tokens(r.get("actuatable_property","")):
-            block.append(f"  sosa:actsOnProperty   ex:{iri_local(p)} ;") # Changed to proper sosa: prop
-        for f in tokens(r.get("feature_of_interest","")):
-            block.append(f"  sosa:hasFeatureOfInterest ex:{iri_local(f)} ;") # Changed to proper sosa: prop
-        for i in tokens(r.get("iface","")):
-            block.append(f"  ex:hasInterface     ex:{iri_local(i)} ;")
-        
-        # Electrical
-        put_dec("ex:vccMin", "vcc_min")
-        put_dec("ex:vccMax", "vcc_max")
-        put_dec("ex:logicLevel", "logic_level")
-        put_dec("ex:iActive_mA", "i_active_mA")
-        put_dec("ex:iIdle_uA", "i_idle_uA")
-        
-        # Physical
-        put_str("ex:packageCase", "package_case")
-        put_int("ex:pinCount", "pin_count")
-        put_dec("ex:tempMinC", "temp_min_c")
-        put_dec("ex:tempMaxC", "temp_max_c")
-
-        # Interface Details
-        put_str("ex:i2cAddrDefault", "i2c_addr_default")
-        put_str("ex:i2cAddrRange", "i2c_addr_range")
-        put_dec("ex:spiMaxFreq_MHz", "spi_max_mhz")
-        put_str("ex:uartBaud", "uart_baud")
-        
-        # Performance
-        put_dec("ex:sampleRateMax_Hz", "sample_rate_max_hz")
-        put_dec("ex:latency_ms", "latency_ms")
-        put_dec("ex:accuracy_pct", "accuracy_pct")
-        put_dec("ex:rangeMin", "range_min")
-        put_dec("ex:rangeMax", "range_max")
-        put_str("ex:units", "units")
-        
-        # Metadata
-        put_uri("ex:datasheetURL", "datasheet_url")
-        put_uri("ex:productURL", "product_url")
-        put_dec("ex:offerPrice", "offer_price")
-        put_str("ex:priceCurrency", "currency")
-        put_str("ex:lifecycle", "lifecycle")
-        put_str("ex:notes", "notes")
-
-        if block[-1].endswith(" ;"):
-            block[-1] = block[-1][:-2] + " ."
+        add_vocab(vocab, r)
+    with open(ttl_out, "w", encoding="utf-8", buffering=WRITE_BUFFER) as out:
+        out.write(HEADER)
+        for line in declarations(vocab):
+            out.write("\n" + line)
+        for r in rows:
+            block = part_block(r)
+            if block is not None:
+                out.write("\n" + "\n".join(block) + "\n")
+    return len(rows)
+
+def main(csv_in, ttl_out, jobs=1):
+    # Two passes over the CSV so only the vocabulary is held in memory; part
+    # blocks are streamed to a buffered writer as they are built. With jobs > 1
+    # the second pass is split into record-aligned byte ranges rendered in a
+    # process pool and concatenated in order, giving the same bytes as jobs=1.
+    try:
+        if jobs > 1:
+            vocab, fieldnames, shards = scan_shards(csv_in, jobs * SHARDS_PER_JOB)
         else:
-            block.append(".")
+            vocab = scan_vocab(csv_in)
+        obs_props, act_props, ifaces, features, n_rows = vocab
+    except FileNotFoundError:
+        print(f"Error: Input file not found at {csv_in}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"Error reading CSV: {e}")
+        sys.exit(1)
 
-        out.extend(block)
-        out.append("")
+    # Declare Individuals for properties/interfaces
+    decls = declarations((obs_props, act_props, ifaces, features))
 
-    with open(ttl_out, "w", encoding="utf-8") as f:
-        f.write("\n".join(out))
-    print(f"Success: Generated TTL with {len(rows)} parts to {ttl_out}")
+    # Pass 2: every line is written with a leading "\n", which reproduces
+    # "\n".join(lines) of the old in-memory version byte for byte
+    with open(ttl_out, "w", encoding="utf-8", buffering=WRITE_BUFFER) as out:
+        out.write(HEADER)
+        for line in decls:
+            out.write("\n" + line)
+        if jobs > 1:
+            tmp = tempfile.mkdtemp(prefix=".csv2ttl-", dir=os.path.dirname(os.path.abspath(ttl_out)))
+            try:
+                work = [(csv_in, fieldnames, a, b, os.path.join(tmp, f"{k:05d}.ttl"))
+                        for k, (a, b) in enumerate(shards)]
+                with ProcessPoolExecutor(max_workers=jobs) as pool:
+                    for path in pool.map(render_shard, work):   # in shard order
+                        with open(path, encoding="utf-8", newline="") as part:
+                            shutil.copyfileobj(part, out, WRITE_BUFFER)
+                        os.unlink(path)
+            finally:
+                shutil.rmtree(tmp, ignore_errors=True)
+        else:
+            with open(csv_in, newline='', encoding="utf-8") as f:
+                for r in csv.DictReader(f):
+                    block = part_block(r)
+                    if block is not None:
+                        out.write("\n" + "\n".join(block) + "\n")
+    print(f"Success: Generated TTL with {n_rows} parts to {ttl_out}")
 
 if __name__ == "__main__":
-    if len(sys.argv) != 3:
-        print("Usage: python3 tools/csv2ttl_v3.py <input_csv_path> <output_ttl_path>")
-        sys.exit(1)
-    main(sys.argv[1], sys.argv[2])
\ No newline at end of file
+    ap = argparse.ArgumentParser(usage="python3 tools/csv2ttl_v3.py <input_csv_path> <output_ttl_path> [--jobs N]")
+    ap.add_argument("csv_in")
+    ap.add_argument("ttl_out")
+    ap.add_argument("--jobs", type=int, default=1, help="render part blocks in N worker processes")
+    args = ap.parse_args()
+    main(args.csv_in, args.ttl_out, max(1, args.jobs))
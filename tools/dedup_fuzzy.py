@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# usage:
+#   python3 tools/dedup_fuzzy.py \
+#       --in data-entry/iotkb_seed_merged.csv \
+#       --out data-entry/iotkb_seed_clusters.csv \
+#       [--survivors data-entry/iotkb_seed_dedup.csv] [--threshold 0.8] [--jobs N]
+#
+# Near-duplicate detection after merge_fritzing.py, whose dedup only catches rows with
+# the same normalized part_label + manufacturer|mpn ("HC-SR04 Ultrasonic", "Ultrasonic
+# Sensor HC-SR04" and "hc-sr04" all survive it). Rows are only compared within blocks
+# that share either a part-code token (letters and digits, e.g. hcsr04, bme280) or a
+# MinHash LSH band of their token sets; blocks bigger than --max-block are skipped, so
+# the work stays linear in the rows rather than quadratic. Blocks are scored in a
+# process pool, matches are joined into clusters (union-find) and the most complete
+# row of each cluster is its canonical survivor (seed rows before Fritzing imports).
+
+import argparse, hashlib, os, re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+INPUT_CSV = "data-entry/iotkb_seed_merged.csv"
+OUTPUT_CSV = "data-entry/iotkb_seed_clusters.csv"
+THRESHOLD = 0.8    # similarity at which two rows are the same part
+BANDS, BAND_ROWS = 16, 2   # MinHash LSH: 32 hashes, a pair with Jaccard j shares a band w.p. 1-(1-j^2)^16
+MAX_BLOCK = 200    # rows; larger blocks are generic tokens/bands and are not compared
+CHUNK = 2000       # candidate pairs per worker task (roughly)
+
+# words joined by -_./ count as one token, so HC-SR04 and hcsr04 are the same
+TOKEN = re.compile(r"[a-z0-9]+(?:[-_./][a-z0-9]+)*")
+
+def tokens(*texts) -> frozenset:
+    return frozenset(re.sub(r"[-_./]", "", t) for x in texts for t in TOKEN.findall(x.lower()))
+
+def is_code(tok: str) -> bool:
+    """Part-number-like token: letters and digits, at least 4 characters."""
+    return len(tok) >= 4 and not tok.isalpha() and not tok.isdigit()
+
+def col_s(df, c) -> list:
+    if c not in df.columns:
+        return [""] * len(df)
+    return [str(x).strip() for x in df[c].astype(object).where(df[c].notna(), "")]
+
+def row_features(df):
+    """(tokens, squashed mpn) per row."""
+    labels, mpns = col_s(df, "part_label"), col_s(df, "mpn")
+    return [(tokens(l, m), re.sub(r"[^a-z0-9]+", "", m.lower())) for l, m in zip(labels, mpns)]
+
+# --- blocking ---
+
+def minhash(token_sets, n_hash: int, seed: int = 1) -> np.ndarray:
+    """(rows, n_hash) MinHash signatures (rows without tokens are left at the max
+    value). Tokens are hashed once with blake2b, then spread over n_hash
+    multiply-shift hashes."""
+    vocab, flat, lens = {}, [], []
+    for ts in token_sets:
+        flat.extend(vocab.setdefault(t, len(vocab)) for t in ts)
+        lens.append(len(ts))
+    base = np.fromiter((int.from_bytes(hashlib.blake2b(t.encode("utf-8"), digest_size=8).digest(), "little")
+                        for t in vocab), dtype=np.uint64, count=len(vocab))
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, 2**63, n_hash, dtype=np.uint64) * np.uint64(2) + np.uint64(1)   # odd
+    b = rng.integers(0, 2**63, n_hash, dtype=np.uint64)
+    hashed = (base[:, None] * a + b) >> np.uint64(32)   # (vocab, n_hash), wraps mod 2^64
+    lens = np.asarray(lens)
+    sig = np.full((len(lens), n_hash), np.iinfo(np.uint64).max, dtype=np.uint64)
+    has = lens > 0
+    if flat:
+        starts = np.concatenate([[0], np.cumsum(lens)[:-1]])[has]
+        sig[has] = np.minimum.reduceat(hashed[np.asarray(flat)], starts, axis=0)
+    return sig
+
+def group_rows(keys: np.ndarray, rows: np.ndarray, max_block: int):
+    """Rows sharing a key, as arrays of 2..max_block rows; also the number of
+    oversized groups."""
+    order = np.argsort(keys, kind="stable")
+    k, r = keys[order], rows[order]
+    cuts = np.flatnonzero(k[1:] != k[:-1]) + 1
+    groups = np.split(r, cuts)
+    return [g for g in groups if 2 <= len(g) <= max_block], sum(len(g) > max_block for g in groups)
+
+def blocks(features, bands=BANDS, band_rows=BAND_ROWS, max_block=MAX_BLOCK):
+    """Candidate blocks (sorted row arrays, no repeats) and the number skipped as too big.
+    Tokens found in more than max_block rows ("sensor", "module") are left out of the
+    MinHash sets; they would only put unrelated rows into the same bands."""
+    out, skipped = [], 0
+    freq = Counter(t for toks, _ in features for t in toks)
+    sets = [frozenset(t for t in toks if freq[t] <= max_block) for toks, _ in features]
+    rows = np.array([i for i, ts in enumerate(sets) if ts], dtype=np.int64)
+    if len(rows):
+        sig = minhash([sets[i] for i in rows], bands * band_rows)
+        for band in range(bands):
+            part = sig[:, band * band_rows:(band + 1) * band_rows]
+            key = part[:, 0]
+            for c in range(1, band_rows):
+                key = key * np.uint64(0x9E3779B97F4A7C15) ^ part[:, c]
+            found, n = group_rows(key, rows, max_block)
+            out += found
+            skipped += n
+    by_code = {}
+    for i, (toks, _) in enumerate(features):
+        for t in toks:
+            if is_code(t):
+                by_code.setdefault(t, []).append(i)
+    for members in by_code.values():
+        if len(members) > max_block:
+            skipped += 1
+        elif len(members) > 1:
+            out.append(np.asarray(members, dtype=np.int64))
+    unique = {tuple(np.sort(g)) for g in out}
+    return [np.asarray(g) for g in sorted(unique)], skipped
+
+# --- scoring ---
+
+def similarity(a, b) -> float:
+    """0..1. Different MPNs are different parts, equal MPNs the same one. So are rows
+    whose tokens with digits (part codes, values like 12v or 3.5mm) disagree, unless
+    one row's are a subset of the other's. Otherwise the token Jaccard, or the token
+    containment when a part code is shared ("hc-sr04" in "HC-SR04 Ultrasonic Distance
+    Sensor")."""
+    (ta, ma), (tb, mb) = a, b
+    if ma and mb:
+        return 1.0 if ma == mb else 0.0
+    if not ta or not tb:
+        return 0.0
+    da, db = {t for t in ta if not t.isalpha()}, {t for t in tb if not t.isalpha()}
+    if da and db and not (da <= db or db <= da):
+        return 0.0
+    shared = ta & tb
+    score = len(shared) / len(ta | tb)
+    if any(map(is_code, shared)):
+        score = max(score, len(shared) / min(len(ta), len(tb)))
+    return score
+
+_FEATURES, _THRESHOLD = None, THRESHOLD   # per worker, set by _init
+
+def _init(features, threshold):
+    global _FEATURES, _THRESHOLD
+    _FEATURES, _THRESHOLD = features, threshold
+
+def score_blocks(block_list):
+    """[(i, j, score)] for the pairs of these blocks scoring >= the threshold, and the
+    number of pairs scored. Pairs repeated across blocks are scored once per task."""
+    seen, found = set(), []
+    for g in block_list:
+        g = g.tolist()
+        for x in range(len(g)):
+            for y in range(x + 1, len(g)):
+                pair = (g[x], g[y])
+                if pair in seen:
+                    continue
+                seen.add(pair)
+                s = similarity(_FEATURES[pair[0]], _FEATURES[pair[1]])
+                if s >= _THRESHOLD:
+                    found.append((pair[0], pair[1], s))
+    return found, len(seen)
+
+def chunks(block_list, size=CHUNK):
+    """Consecutive blocks in tasks of about size candidate pairs."""
+    task, pairs = [], 0
+    for g in block_list:
+        task.append(g)
+        pairs += len(g) * (len(g) - 1) // 2
+        if pairs >= size:
+            yield task
+            task, pairs = [], 0
+    if task:
+        yield task
+
+def match_pairs(features, block_list, threshold=THRESHOLD, jobs=1):
+    """Matching pairs over all blocks (each pair once) and the number of pairs scored."""
+    tasks = list(chunks(block_list))
+    if jobs <= 1:
+        _init(features, threshold)
+        return _collect(map(score_blocks, tasks))
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init, initargs=(features, threshold)) as pool:
+        return _collect(pool.map(score_blocks, tasks, chunksize=4))
+
+def _collect(results):
+    best, scored = {}, 0
+    for found, n in results:
+        scored += n
+        for i, j, s in found:
+            best[(i, j)] = max(s, best.get((i, j), 0.0))
+    return best, scored
+
+# --- clusters ---
+
+def clusters(n: int, pairs) -> np.ndarray:
+    """Union-find over the matched pairs: a root row per row."""
+    parent = list(range(n))
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+    for i, j in pairs:
+        ri, rj = find(i), find(j)
+        if ri != rj:
+            parent[max(ri, rj)] = min(ri, rj)
+    return np.array([find(i) for i in range(n)], dtype=np.int64)
+
+def canonical_rows(df, roots: np.ndarray) -> np.ndarray:
+    """Per row, whether it is its cluster's survivor: seed rows before Fritzing imports,
+    then the most filled-in columns, then the first row."""
+    filled = (df.astype(object).where(df.notna(), "").astype(str).apply(lambda c: c.str.strip() != "")).sum(axis=1)
+    imported = np.array([x == "imported_from_fritzing" for x in col_s(df, "notes")])
+    order = np.lexsort((np.arange(len(df)), -filled.to_numpy(), imported, roots))
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = roots[order][1:] != roots[order][:-1]
+    out = np.zeros(len(df), dtype=bool)
+    out[order[first]] = True
+    return out
+
+def find_duplicates(df, threshold=THRESHOLD, jobs=1, max_block=MAX_BLOCK, bands=BANDS, band_rows=BAND_ROWS):
+    """df plus cluster_id (numbered in row order) and is_canonical, and a stats dict."""
+    features = row_features(df)
+    block_list, skipped = blocks(features, bands, band_rows, max_block)
+    pairs, scored = match_pairs(features, block_list, threshold, jobs)
+    roots = clusters(len(df), pairs)
+    out = df.copy()
+    out["cluster_id"] = pd.factorize(roots)[0]
+    out["is_canonical"] = canonical_rows(df, roots)
+    sizes = np.bincount(out["cluster_id"].to_numpy())
+    stats = dict(rows=len(df), blocks=len(block_list), oversized_blocks=skipped, pairs_scored=scored,
+                 matches=len(pairs), clusters=int((sizes > 1).sum()), duplicates=int(len(df) - len(sizes)))
+    return out, stats
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--in", dest="inp", default=INPUT_CSV)
+    ap.add_argument("--out", default=OUTPUT_CSV, help="input rows plus cluster_id and is_canonical")
+    ap.add_argument("--survivors", help="also write only the canonical rows (input columns) here")
+    ap.add_argument("--threshold", type=float, default=THRESHOLD)
+    ap.add_argument("--max-block", type=int, default=MAX_BLOCK)
+    ap.add_argument("--bands", type=int, default=BANDS)
+    ap.add_argument("--band-rows", type=int, default=BAND_ROWS)
+    ap.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="scoring processes")
+    args = ap.parse_args()
+
+    df = pd.read_csv(args.inp)
+    out, stats = find_duplicates(df, args.threshold, args.jobs, args.max_block, args.bands, args.band_rows)
+    out.to_csv(args.out, index=False)
+    if args.survivors:
+        out[out["is_canonical"]].drop(columns=["cluster_id", "is_canonical"]).to_csv(args.survivors, index=False)
+    for k, v in stats.items():
+        print(f"{k}: {v}")
+    print("output:", args.out)
+
+if __name__ == "__main__":
+    main()
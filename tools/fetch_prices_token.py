@@ -1,7 +1,13 @@
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
+import argparse
+import random
+import sqlite3
+import threading
 import time
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 # --- CONFIGURATION ---
 INPUT_CSV = 'data-entry/iotkb_smart_only.csv'
@@ -9,15 +15,21 @@ OUTPUT_CSV = 'data-entry/iotkb_priced.csv'
 
 # YOUR ACCESS TOKEN (Valid for ~24 hours from creation)
 ACCESS_TOKEN = "eyJhbGciOiJSUzI1NiIsImtpZCI6IjA5NzI5QTkyRDU0RDlERjIyRDQzMENBMjNDNkI4QjJFIiwidHlwIjoiYXQrand0In0.eyJuYmYiOjE3NjQ2NjUyOTMsImV4cCI6MTc2NDc1MTY5MywiaXNzIjoiaHR0cHM6Ly9pZGVudGl0eS5uZXhhci5jb20iLCJjbGllbnRfaWQiOiI0MGI5ODlmOC1mZTUwLTRlNWItYjViYS04OTU1MGE5ZTlhMTciLCJzdWIiOiIwOUI3QUMxNC1BMTc4LTQ2MDEtQjQ1MS1DMzdGN0I1NkUwRDgiLCJhdXRoX3RpbWUiOjE3NjQ2NjQ3NTQsImlkcCI6ImxvY2FsIiwicHJpdmF0ZV9jbGFpbXNfaWQiOiI1OTRlMGY5Zi0yMWNmLTRlNTMtYjU0Mi0yNTlkYzkyMmNkMDAiLCJwcml2YXRlX2NsYWltc19zZWNyZXQiOiJtNE4wM1V6bm54NEdoWWdWemlGWS9iS0U5MHlJVFc5Rk00eW5vcHJWSllNPSIsImp0aSI6IjAzQ0FGQjA5NTkzRjM3OEVDMTIyM0JENDNERTQ1OTgwIiwic2lkIjoiMzMwQUU4MzQ3NkY5NDc0NjhFODJGQjYwQUVBMjFERjIiLCJpYXQiOjE3NjQ2NjUyOTMsInNjb3BlIjpbIm9wZW5pZCIsInVzZXIuYWNjZXNzIiwicHJvZmlsZSIsImVtYWlsIiwidXNlci5kZXRhaWxzIiwic3VwcGx5LmRvbWFpbiIsImRlc2lnbi5kb21haW4iXSwiYW1yIjpbInB3ZCJdfQ.UKuz3SVr1SPW3VWmeYDlNdeUkca-cbW92DMUJxOb3OIi8ReTf4c_cZOWLvhnV8wrUHJPocKsa_zye9nS6XG-Vc5pc3hvPuekBwRx1jgKIChAcLa2CAcSGAUOY12I2fHfKdBP5kg2iH4E7as8b8aq2OAM0wTuQ9e_BUbGgscet63I8scUU860tgbEY7P-Tr6qiqOk3jFMHt1mYcQbkandTAB-HRd06t-SPXgUZuAjgr0cVFc7LEHHq4cbOP2qbIZT9Aqvtn9LKFURuuvBap0fcXRqfmUgorF5fiHlTP58U5eKkRCjygwO_-SIxbJbYK-iU8ZVOagG2KKgwet1RdfQ-w"
+ACCESS_TOKEN = os.environ.get("NEXAR_TOKEN", ACCESS_TOKEN)
 
-# Nexar GraphQL URL
-API_URL = "https://api.nexar.com/graphql"
+# Nexar GraphQL URL (point NEXAR_URL at tools/mock_nexar.py for offline runs)
+API_URL = os.environ.get("NEXAR_URL", "https://api.nexar.com/graphql")
 
-def fetch_price(mpn):
-    """Queries Nexar for the best price for a given MPN."""
-    query = """
-    query Search($mpn: String!) {
-      supSearchMpn(q: $mpn, limit: 1) {
+WORKERS   = int(os.environ.get("PRICE_WORKERS", "8"))
+RATE      = float(os.environ.get("PRICE_RATE", "5"))         # requests/second across all workers
+BURST     = int(os.environ.get("PRICE_BURST", "5"))
+RETRIES   = int(os.environ.get("PRICE_RETRIES", "4"))
+TIMEOUT   = float(os.environ.get("PRICE_TIMEOUT", "30"))
+CACHE_DB  = os.environ.get("PRICE_CACHE", ".price_cache.sqlite")
+CACHE_TTL = float(os.environ.get("PRICE_CACHE_TTL", str(7 * 24 * 3600)))
+BATCH     = int(os.environ.get("PRICE_BATCH", "20"))           # MPNs per GraphQL request
+
+PART_FIELDS = """
         results {
           part {
             mpn
@@ -35,103 +47,287 @@ def fetch_price(mpn):
               }
             }
           }
-        }
+        }"""
+
+QUERY = """
+    query Search($mpn: String!) {
+      supSearchMpn(q: $mpn, limit: 1) {""" + PART_FIELDS + """
       }
     }
     """
-    headers = {
+
+def batch_query(n: int) -> str:
+    """One document searching n MPNs: aliased sub-queries m0..m{n-1} over variables $m0.."""
+    params = ", ".join(f"$m{i}: String!" for i in range(n))
+    subs = "".join(f"\n      m{i}: supSearchMpn(q: $m{i}, limit: 1) {{{PART_FIELDS}\n      }}" for i in range(n))
+    return f"\n    query Batch({params}) {{{subs}\n    }}\n    "
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens/second, up to `burst` saved up."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.stamp = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+                self.stamp = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+class PriceCache:
+    """MPN -> (best price, currency, fetched_at) in SQLite. Misses (no offer found) are
+    cached too, as NULL price; failed requests are not."""
+
+    def __init__(self, path: str, ttl: float):
+        self.ttl = ttl
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.db:
+            self.db.execute("CREATE TABLE IF NOT EXISTS prices ("
+                            "mpn TEXT PRIMARY KEY, price REAL, currency TEXT, fetched_at REAL NOT NULL)")
+
+    def fresh(self, mpns) -> dict:
+        """Entries younger than the TTL, as {mpn: (price, currency)}."""
+        out, mpns = {}, list(mpns)
+        cutoff = time.time() - self.ttl
+        with self.lock:
+            for i in range(0, len(mpns), 500):
+                chunk = mpns[i:i + 500]
+                rows = self.db.execute(
+                    f"SELECT mpn, price, currency FROM prices WHERE fetched_at >= ? "
+                    f"AND mpn IN ({','.join('?' * len(chunk))})", [cutoff, *chunk])
+                out.update((m, (p, c)) for m, p, c in rows)
+        return out
+
+    def put_many(self, results: dict):
+        now = time.time()
+        with self.lock, self.db:
+            self.db.executemany("INSERT OR REPLACE INTO prices VALUES (?, ?, ?, ?)",
+                                [(m, p, c, now) for m, (p, c) in results.items()])
+
+    def close(self):
+        self.db.close()
+
+class RetryableError(Exception):
+    pass
+
+class PartialResult(RetryableError):
+    """A batch answered without some of its aliases (the server rejected those MPNs)."""
+
+def make_session(pool_size: int = WORKERS) -> requests.Session:
+    """One keep-alive connection pool shared by all workers."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({
         'Authorization': f'Bearer {ACCESS_TOKEN}',
         'Content-Type': 'application/json'
-    }
-    
+    })
+    return session
+
+def best_offer(part):
+    """Lowest positive price for quantity 1 (or less) across all sellers, or (None, None)."""
+    best_price, currency, found = float('inf'), "USD", False
+    for seller in (part or {}).get('sellers') or ():
+        for offer in seller.get('offers') or ():
+            for price_point in offer.get('prices') or ():
+                # We want quantity 1 (or close to it)
+                if price_point['quantity'] <= 1:
+                    p = float(price_point['price'])
+                    if p < best_price and p > 0:
+                        best_price, currency, found = p, price_point['currency'], True
+    return (best_price, currency) if found else (None, None)
+
+def post(session, query, variables) -> dict:
+    """One GraphQL request. Raises RetryableError on 429/5xx and connection errors."""
     try:
-        response = requests.post(API_URL, json={'query': query, 'variables': {'mpn': mpn}}, headers=headers)
-        
-        if response.status_code != 200:
-            print(f"Error {response.status_code}: {response.text}")
-            return None, None
-
-        data = response.json()
-        results = data.get('data', {}).get('supSearchMpn', {}).get('results', [])
-        
-        if not results:
-            return None, None
-            
-        # Get first part found
-        part = results[0]['part']
-        
-        # Look for the best price for Quantity 1
-        best_price = float('inf')
-        currency = "USD"
-        found = False
-
-        for seller in part.get('sellers', []):
-            for offer in seller.get('offers', []):
-                for price_point in offer.get('prices', []):
-                    # We want quantity 1 (or close to it)
-                    if price_point['quantity'] <= 1:
-                        p = float(price_point['price'])
-                        if p < best_price and p > 0:
-                            best_price = p
-                            currency = price_point['currency']
-                            found = True
-        
-        if found:
-            return best_price, currency
-            
-    except Exception as e:
-        print(f"Exception: {e}")
-        return None, None
-        
-    return None, None
+        response = session.post(API_URL, json={'query': query, 'variables': variables}, timeout=TIMEOUT)
+    except (requests.ConnectionError, requests.Timeout) as e:
+        raise RetryableError(str(e))
 
-def main():
-    if not os.path.exists(INPUT_CSV):
-        print(f"Error: {INPUT_CSV} not found.")
-        return
+    if response.status_code == 429 or response.status_code >= 500:
+        err = RetryableError(f"{response.status_code}: {response.text[:200]}")
+        err.retry_after = response.headers.get("Retry-After")
+        raise err
+    if response.status_code != 200:
+        raise RuntimeError(f"Error {response.status_code}: {response.text[:200]}")
+    return response.json()
+
+def first_part(search):
+    # Get first part found
+    results = (search or {}).get('results') or []
+    return results[0]['part'] if results else None
 
-    print(f"Reading {INPUT_CSV}...")
-    df = pd.read_csv(INPUT_CSV)
-    
+def query_price(session, mpn):
+    data = post(session, QUERY, {'mpn': mpn})
+    return best_offer(first_part((data.get('data') or {}).get('supSearchMpn')))
+
+def query_prices(session, mpns) -> dict:
+    """All MPNs in one aliased GraphQL document, demultiplexed back to {mpn: (price,
+    currency)}. An alias the server left out (a partial error) is retryable."""
+    data = post(session, batch_query(len(mpns)), {f"m{i}": m for i, m in enumerate(mpns)})
+    answers = data.get('data') or {}
+    missing = [m for i, m in enumerate(mpns) if f"m{i}" not in answers]
+    if missing:
+        errors = "; ".join(e.get('message', '') for e in data.get('errors') or [])
+        raise PartialResult(f"no result for {len(missing)} of {len(mpns)} MPNs: {errors[:200]}")
+    return {m: best_offer(first_part(answers[f"m{i}"])) for i, m in enumerate(mpns)}
+
+def with_retries(call, bucket=None, retries=RETRIES):
+    """call() with exponential backoff (and Retry-After) on transient failures; raises
+    once every attempt failed."""
+    for attempt in range(retries + 1):
+        if bucket is not None:
+            bucket.take()
+        try:
+            return call()
+        except RetryableError as e:
+            if attempt == retries:
+                raise
+            delay = min(30.0, 0.5 * 2 ** attempt) * (0.5 + random.random())
+            retry_after = getattr(e, "retry_after", None)
+            if retry_after and retry_after.replace('.', '', 1).isdigit():
+                delay = max(delay, float(retry_after))
+            time.sleep(delay)
+
+def fetch_price(mpn, session=None, bucket=None, retries=RETRIES):
+    """Queries Nexar for the best price for a given MPN, retrying transient failures
+    with exponential backoff. Returns (price, currency), (None, None) if the part has
+    no offer; raises if every attempt failed."""
+    session = session or make_session(1)
+    return with_retries(lambda: query_price(session, mpn), bucket, retries)
+
+def fetch_price_batch(mpns, session=None, bucket=None, retries=RETRIES) -> dict:
+    """fetch_price for several MPNs in one request: {mpn: (price, currency)}."""
+    session = session or make_session(1)
+    return with_retries(lambda: query_prices(session, mpns), bucket, retries)
+
+def fetch_prices(mpns, workers=WORKERS, rate=RATE, cache=None, log=print, batch=BATCH):
+    """Best (price, currency) for every MPN. Fresh cache entries are used as they are;
+    the rest are fetched `batch` MPNs per request, concurrently through one pooled
+    session and rate limiter, and written back to the cache. A batch rejected for
+    some of its MPNs (an error response, or aliases still missing after the retries)
+    is retried one MPN per request, so one bad MPN doesn't lose the others; a batch
+    that only hit transient failures is dropped. MPNs whose requests failed are left
+    out."""
+    mpns = list(dict.fromkeys(mpns))
+    out = cache.fresh(mpns) if cache is not None else {}
+    todo = [m for m in mpns if m not in out]
+    log(f"{len(mpns)} MPNs: {len(out)} cached, {len(todo)} to fetch")
+    if not todo:
+        return out
+
+    session = make_session(workers)
+    bucket = TokenBucket(rate, BURST)
+    batch = max(1, batch)
+
+    def single(mpn):
+        try:
+            return {mpn: fetch_price(mpn, session, bucket)}
+        except Exception as e:
+            log(f"Querying: {mpn}... failed: {e}")
+            return {}
+
+    def fetch_chunk(chunk):
+        if len(chunk) == 1:
+            return single(chunk[0])
+        try:
+            return fetch_price_batch(chunk, session, bucket)
+        except PartialResult as e:
+            log(f"Querying: {', '.join(chunk)}... batch incomplete ({e}); retrying one by one")
+        except RetryableError as e:
+            log(f"Querying: {', '.join(chunk)}... failed: {e}")
+            return {}
+        except Exception as e:
+            log(f"Querying: {', '.join(chunk)}... batch failed ({e}); retrying one by one")
+        res = {}
+        for mpn in chunk:
+            res.update(single(mpn))
+        return res
+
+    def one(chunk):
+        res = fetch_chunk(chunk)
+        if not res:
+            return {}
+        if cache is not None:
+            cache.put_many(res)
+        for mpn, (price, currency) in res.items():
+            log(f"Querying: {mpn}... " + (f"Found: {price} {currency}" if price else "Not found."))
+        return res
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            for res in pool.map(one, [todo[i:i + batch] for i in range(0, len(todo), batch)]):
+                out.update(res)
+    finally:
+        session.close()
+    return out
+
+def price_frame(df, workers=WORKERS, rate=RATE, cache=None, batch=BATCH, log=print) -> int:
+    """Fills offer_price/currency of df in place for the unpriced rows with a real MPN;
+    returns the number of rows priced."""
     # Ensure columns exist
     if 'offer_price' not in df.columns: df['offer_price'] = None
     if 'currency' not in df.columns: df['currency'] = None
 
-    updates = 0
+    # Skip invalid MPNs or Generic parts (Generic usually has no specific MPN price)
+    # and rows that are already priced
+    mpn = df['mpn'].map(str)
+    todo = (mpn != 'nan') & (mpn != '') & (df['manufacturer'].map(str).str.lower() != 'generic') \
+           & df['offer_price'].isna()
+
+    prices = fetch_prices(mpn[todo], workers, rate, cache, log, batch)
+    found = {m: pc for m, pc in prices.items() if pc[0]}
+    hit = todo & mpn.isin(list(found))
+    if hit.any():
+        for col, k in (('offer_price', 0), ('currency', 1)):
+            # mixed text/number columns, as the per-cell writes used to leave them
+            df[col] = df[col].astype(object)
+            df.loc[hit, col] = mpn[hit].map(lambda m: found[m][k])
+    return int(hit.sum())
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--input", default=INPUT_CSV)
+    ap.add_argument("--output", default=OUTPUT_CSV)
+    ap.add_argument("--workers", type=int, default=WORKERS)
+    ap.add_argument("--rate", type=float, default=RATE, help="max requests/second (0 = unlimited)")
+    ap.add_argument("--batch", type=int, default=BATCH, help="MPNs per GraphQL request")
+    ap.add_argument("--cache", default=CACHE_DB, help="SQLite price cache ('' disables it)")
+    ap.add_argument("--ttl", type=float, default=CACHE_TTL, help="cache entry lifetime in seconds")
+    args = ap.parse_args()
+
+    if not os.path.exists(args.input):
+        print(f"Error: {args.input} not found.")
+        return
+
+    print(f"Reading {args.input}...")
+    df = pd.read_csv(args.input)
+
     print("Fetching prices using provided Access Token...")
-    
-    # We will try to fetch prices for the first 10 valid MPNs to test the token
-    # Remove the counter check to run for ALL parts
-    
-    for index, row in df.iterrows():
-        mpn = str(row['mpn'])
-        
-        # Skip invalid MPNs or Generic parts (Generic usually has no specific MPN price)
-        if mpn == 'nan' or mpn == '' or str(row['manufacturer']).lower() == 'generic':
-            continue
-            
-        # Skip if already priced (optional)
-        if pd.notna(row['offer_price']):
-            continue
-
-        print(f"Querying: {mpn}...", end=" ", flush=True)
-        
-        price, currency = fetch_price(mpn)
-        
-        if price:
-            df.at[index, 'offer_price'] = price
-            df.at[index, 'currency'] = currency
-            print(f"Found: {price} {currency}")
-            updates += 1
-        else:
-            print("Not found.")
-            
-        # Be gentle with the API rate limit
-        time.sleep(0.2)
-
-    df.to_csv(OUTPUT_CSV, index=False)
+    cache = PriceCache(args.cache, args.ttl) if args.cache else None
+    try:
+        updates = price_frame(df, args.workers, args.rate, cache, args.batch)
+    finally:
+        if cache is not None:
+            cache.close()
+
+    df.to_csv(args.output, index=False)
     print(f"\nDone! Updated prices for {updates} parts.")
-    print(f"Saved to {OUTPUT_CSV}")
+    print(f"Saved to {args.output}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
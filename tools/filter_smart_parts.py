@@ -7,6 +7,16 @@ OUTPUT_FILE = 'data-entry/iotkb_smart_only.csv'
 # Categories we WANT to keep for a Smart System DB
 KEEP_CATEGORIES = ['sensor', 'actuator', 'controller', 'power']
 
+def filter_smart(df):
+    """Rows of the kept categories, without the generic kinds."""
+    # 1. Filter by Category
+    # We drop 'tooling' and 'mechanical' unless they are specifically interesting
+    df_smart = df[df['category'].isin(KEEP_CATEGORIES)]
+    
+    # 2. Filter out "Generic" noise if needed (Optional)
+    # This removes rows where 'kind' is generic like 'component' or 'nan'
+    return df_smart[~df_smart['kind'].isin(['component', 'nan', 'unknown'])]
+
 def main():
     if not os.path.exists(INPUT_FILE):
         print(f"Error: {INPUT_FILE} not found.")
@@ -17,13 +27,7 @@ def main():
     
     initial_count = len(df)
     
-    # 1. Filter by Category
-    # We drop 'tooling' and 'mechanical' unless they are specifically interesting
-    df_smart = df[df['category'].isin(KEEP_CATEGORIES)]
-    
-    # 2. Filter out "Generic" noise if needed (Optional)
-    # This removes rows where 'kind' is generic like 'component' or 'nan'
-    df_smart = df_smart[~df_smart['kind'].isin(['component', 'nan', 'unknown'])]
+    df_smart = filter_smart(df)
     
     final_count = len(df_smart)
     
@@ -0,0 +1,74 @@
+# filename: tools/i2c_addr.py
+# I2C address sets as 128-bit masks (bit a = 7-bit address a). A part's mask is every
+# address it can answer on: ex:i2cAddrDefault plus ex:i2cAddrRange ("0x40–0x4F",
+# "0x76|0x77"). Parts with no parseable address get 0 and never conflict.
+#
+# Two parts can only collide when their masks AND to non-zero, so the common case is
+# one AND against the union of the set so far; only overlapping sets go through the
+# exact check, a matching of parts to distinct addresses (BOMs have a handful of I2C
+# parts, so the augmenting paths stay tiny).
+import re
+
+HEX = r"0x[0-9A-Fa-f]{1,2}"
+RANGE = re.compile(rf"({HEX})\s*[-–]\s*({HEX})")
+SINGLE = re.compile(HEX)
+
+def parse_addrs(text) -> int:
+    """Mask of the 7-bit addresses named in text (single values and lo-hi ranges)."""
+    if not text:
+        return 0
+    m = 0
+    for lo, hi in RANGE.findall(text):
+        lo, hi = int(lo, 16), int(hi, 16)
+        for a in range(min(lo, hi), min(max(lo, hi), 127) + 1):
+            m |= 1 << a
+    for tok in SINGLE.findall(RANGE.sub(" ", text)):
+        a = int(tok, 16)
+        if a < 128:
+            m |= 1 << a
+    return m
+
+def split(mask: int):
+    """(low, high) 64-bit words of a mask, for uint64 columns."""
+    return mask & 0xFFFFFFFFFFFFFFFF, mask >> 64
+
+def join(lo, hi) -> int:
+    return int(lo) | int(hi) << 64
+
+def addrs(mask: int) -> list:
+    return [a for a in range(128) if mask >> a & 1]
+
+def fmt(a) -> str:
+    return None if a is None else f"0x{a:02X}"
+
+def assign(masks):
+    """One distinct address per mask (None for a zero mask), or None if the parts
+    can't all be given different addresses."""
+    owner = {}                           # address bit -> index into masks
+
+    def place(i, seen):
+        m = masks[i]
+        while m:
+            bit = m & -m
+            m ^= bit
+            if bit in seen:
+                continue
+            seen.add(bit)
+            if bit not in owner or place(owner[bit], seen):
+                owner[bit] = i
+                return True
+        return False
+
+    for i, m in enumerate(masks):
+        if m and not place(i, set()):
+            return None
+    out = [None] * len(masks)
+    for bit, i in owner.items():
+        out[i] = bit.bit_length() - 1
+    return out
+
+def fits(masks, union: int, m: int) -> bool:
+    """Whether a part with mask m can join parts with masks (their OR is union)."""
+    if not m & union:
+        return True                      # no shared address: the common case
+    return assign(list(masks) + [m]) is not None
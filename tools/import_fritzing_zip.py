@@ -1,33 +1,29 @@
 # tools/import_fritzing_zip.py
+# usage:    python3 tools/import_fritzing_zip.py [--zip fritzing-parts.zip] [--out CSV] [--jobs N]
+#                  [--incremental] [--delta changes.csv]
 import os
-import glob
 import xml.etree.ElementTree as ET
+import argparse
 import csv
+import hashlib
+import json
 import sys
 import re
 import requests
+import tempfile
 import zipfile
-import io
+from concurrent.futures import ProcessPoolExecutor
+from classify import ruleset
 
 # --- CONFIGURATION ---
 OUTPUT_CSV = 'data-entry/fritzing_import.csv'
 REPO_ZIP_URL = 'https://github.com/fritzing/fritzing-parts/archive/refs/heads/master.zip'
+CHUNK = 256   # .fzp members per worker task
+PARALLEL_MIN = 2000   # members to parse before --jobs defaults to a process pool
 
-# Mapping from Fritzing tags to your 6 categories
-TAG_TO_PART_TYPE_MAP = {
-    # Specific controllers
-    'controller': ['controller', 'microcontroller', 'arduino', 'esp32', 'rpi', 'raspberry pi', 'teensy', 'mcu', 'cpu', 'board', 'esp8266'],
-    # Specific sensors
-    'sensor': ['sensor', 'light', 'motion', 'distance', 'gas', 'flame', 'environment', 'temp', 'humidity', 'current', 'ina226', 'ds18b20', 'rtc', 'switch', 'pir', 'ultrasonic', 'gyro', 'accel'],
-    # Specific actuators
-    'actuator': ['actuator', 'motor', 'led', 'buzzer', 'relay', 'servo', 'pump', 'display', 'lcd', 'oled'],
-    # Power-specific items (not just passives)
-    'power': ['power supply', 'regulator', 'battery', 'vcc', 'gnd', 'power', 'converter', 'buck', 'boost'],
-    # Mechanical parts
-    'mechanical': ['mechanical', 'screw', 'mount', 'bracket', 'enclosure', 'wheel', 'chassis', 'standoff', 'holder'],
-    # Default/Tooling (catches passives, connectors, etc.)
-    'tooling': ['tooling', 'breadboard', 'jumper', 'wire', 'resistor', 'capacitor', 'diode', 'transistor', 'ic', 'connector', 'header', 'debug', 'switch', 'button']
-}
+# Mapping from Fritzing tags to your 6 categories lives in tools/classification_rules.json
+# ("fritzing_tags"): part types and their keywords in priority order
+TAG_RULES = ruleset('fritzing_tags')
 
 # Headers from your iotkb_seed_v3_final.csv
 CSV_HEADERS = [
@@ -49,28 +45,28 @@ def to_snake_case(s):
     s = re.sub(r'[\s-]+', '_', s) # Replace space or dash with underscore
     return s
 
+def part_types_and_kinds(tag_lists):
+    """Maps Fritzing tag lists to (part_type, part_kind) tuples in one batch.
+    The first keyword (in rule order) that equals or occurs within a tag decides the
+    part type; the kind is that keyword on an exact tag match, else the tag itself."""
+    out = []
+    for rule, keyword, tag in TAG_RULES.classify_tags([[t.lower() for t in tags] for tags in tag_lists]):
+        if keyword is None:
+            out.append(('tooling', 'unknown')) # Default for uncategorized components
+        else:
+            out.append((rule['category'], to_snake_case(tag)))
+    return out
+
 def get_part_type_and_kind(tags):
     """Maps a list of Fritzing tags to our (part_type, part_kind) tuple."""
-    tags_lower = [t.lower() for t in tags]
-    
-    for part_type, keywords in TAG_TO_PART_TYPE_MAP.items():
-        for keyword in keywords:
-            # Check for exact tag match
-            if keyword in tags_lower:
-                return part_type, to_snake_case(keyword)
-            
-            # Check for keyword within a tag
-            for tag in tags_lower:
-                if keyword in tag:
-                    # Use the more specific tag as the 'kind'
-                    return part_type, to_snake_case(tag)
-                    
-    return 'tooling', 'unknown' # Default for uncategorized components
+    return part_types_and_kinds([tags])[0]
 
-def parse_fzp(fzp_content_string):
-    """Parses the XML content of a .fzp file and returns a data dictionary."""
+def read_fzp(fzp_content):
+    """Parses the XML content of a .fzp file (bytes straight from the archive, or str)
+    into (row, tags); part_type/part_kind are left empty for part_types_and_kinds().
+    Returns None for unreadable files."""
     try:
-        root = ET.fromstring(fzp_content_string)
+        root = ET.fromstring(fzp_content)
         
         title_elem = root.find('title')
         author_elem = root.find('author')
@@ -86,20 +82,16 @@ def parse_fzp(fzp_content_string):
         tags = []
         if tags_elem is not None:
             tags = [tag.text for tag in tags_elem.findall('tag') if tag.text is not None]
-            
-        part_type, part_kind = get_part_type_and_kind(tags)
 
         # Initialize all CSV row fields to empty
         row = {h: '' for h in CSV_HEADERS}
         row.update({
             'part_label': part_label,
-            'part_type': part_type,
-            'part_kind': part_kind,
             'manufacturer': manufacturer,
             'product_url': product_url,
             'notes': notes
         })
-        return row
+        return row, tags
 
     except ET.ParseError:
         print(f"Warning: Skipping malformed XML file.", file=sys.stderr)
@@ -108,65 +100,225 @@ def parse_fzp(fzp_content_string):
         print(f"Warning: Error parsing XML content: {e}", file=sys.stderr)
         return None
 
-def main():
-    # --- 1. Download the Fritzing parts repo ZIP ---
-    print(f"Downloading Fritzing parts library from {REPO_ZIP_URL}...")
-    try:
-        response = requests.get(REPO_ZIP_URL, timeout=300)
+def parse_fzp(fzp_content_string):
+    """Parses the XML content of a .fzp file and returns a data dictionary."""
+    parsed = read_fzp(fzp_content_string)
+    if parsed is None:
+        return None
+    row, tags = parsed
+    row['part_type'], row['part_kind'] = get_part_type_and_kind(tags)
+    return row
+
+def fzp_members(z):
+    # Find all .fzp files in the 'core' directory
+    # The top-level folder in the zip is 'fritzing-parts-master'
+    return [f for f in z.namelist() if f.endswith('.fzp') and '/core/' in f]
+
+_ZIP = None
+
+def _open_zip(zip_path):
+    global _ZIP
+    _ZIP = zipfile.ZipFile(zip_path)
+
+def parse_members(names):
+    """(member, row) for each readable member of a run of ZIP members, parsed and
+    classified (in a worker, the archive opened by _open_zip)."""
+    parsed, tag_lists = [], []
+    for name in names:
+        res = read_fzp(_ZIP.read(name))
+        if res:
+            parsed.append((name, res[0]))
+            tag_lists.append(res[1])
+    # classify the chunk in one batch
+    for (_, row), (part_type, part_kind) in zip(parsed, part_types_and_kinds(tag_lists)):
+        row['part_type'], row['part_kind'] = part_type, part_kind
+    return parsed
+
+def iter_parts(zip_path, names, jobs=1):
+    """Yields lists of (member, row), in member order, as chunks of members finish parsing.
+    jobs > 1 spreads the chunks over a process pool, each worker with its own handle
+    on the archive."""
+    chunks = [names[i:i + CHUNK] for i in range(0, len(names), CHUNK)]
+    if jobs <= 1:
+        _open_zip(zip_path)
+        try:
+            yield from map(parse_members, chunks)
+        finally:
+            _ZIP.close()
+        return
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_open_zip, initargs=(zip_path,)) as pool:
+        yield from pool.map(parse_members, chunks)
+
+def download_zip(url, dest):
+    """Streams url into the open binary file dest (spooled to disk, not memory)."""
+    with requests.get(url, stream=True, timeout=300) as response:
         response.raise_for_status() # Raise an error for bad responses
-        print("Download successful. Parsing ZIP file...")
-    except requests.exceptions.RequestException as e:
-        print(f"\n--- ERROR ---")
-        print(f"Error downloading repository: {e}")
-        print("Please check your internet connection and ensure 'requests' is installed (`pip install requests`)")
+        for block in response.iter_content(chunk_size=1 << 20):
+            dest.write(block)
+
+def row_hash(row) -> str:
+    return hashlib.sha1("\x1f".join(str(row.get(h, '')) for h in CSV_HEADERS).encode('utf-8')).hexdigest()
+
+# --- incremental re-import ---
+# The manifest (next to the CSV, see manifest_path) lists every core member of the
+# last import in archive order as [name, crc, size, row hash or null if unreadable].
+# A re-import only parses members whose CRC/size changed or that are new; the other
+# rows are copied from the previous CSV. The delta CSV lists what changed as rows
+# with _op 'remove' (previous row) and/or 'add' (new row); a changed part is a remove
+# followed by an add, and a member whose row came out identical is not listed.
+
+DELTA_COLUMNS = ['_op', '_member']
+
+def manifest_path(out_csv):
+    return os.path.splitext(out_csv)[0] + '.manifest.json'
+
+def load_manifest(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)['members']
+
+def write_manifest(path, members):
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({'version': 1, 'members': members}, f)
+    os.replace(tmp, path)
+
+def write_delta(path, delta):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=DELTA_COLUMNS + CSV_HEADERS)
+        writer.writeheader()
+        for op, name, row in delta:
+            writer.writerow({'_op': op, '_member': name, **row})
+
+def previous_rows(out_csv, members):
+    """{member: row} from the previous CSV, whose rows are the manifest's readable
+    members in order; None if the two disagree."""
+    named = [m[0] for m in members if m[3] is not None]
+    with open(out_csv, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    return dict(zip(named, rows)) if len(rows) == len(named) else None
+
+def import_zip(zip_path, out_csv, jobs=1, incremental=False, delta_csv=None):
+    """Parses every core .fzp of the archive into out_csv, writing rows as they are
+    parsed, and records the members in the manifest. With incremental, only members
+    added or changed since the manifest was written are parsed (falling back to a
+    full import without a usable manifest). delta_csv receives the changes (every
+    row an 'add' after a full import). jobs None: one process per CPU when at least
+    PARALLEL_MIN members need parsing, else serial (starting the pool costs more than
+    it saves on a small or incremental run). Returns the number of parts written."""
+    with zipfile.ZipFile(zip_path) as z:
+        fzp_files = fzp_members(z)
+        info = {name: (z.getinfo(name).CRC, z.getinfo(name).file_size) for name in fzp_files}
+    print(f"Found {len(fzp_files)} parts in the 'core' directory.")
+    if not fzp_files:
+        print("Error: No .fzp files found. Check the repository structure.", file=sys.stderr)
         sys.exit(1)
 
-    # --- 2. Process the ZIP file in memory ---
-    new_parts = []
-    try:
-        with zipfile.ZipFile(io.BytesIO(response.content)) as z:
-            # Find all .fzp files in the 'core' directory
-            # The top-level folder in the zip is 'fritzing-parts-master'
-            fzp_files = [f for f in z.namelist() if f.endswith('.fzp') and '/core/' in f]
-            
-            print(f"Found {len(fzp_files)} parts in the 'core' directory.")
-            if not fzp_files:
-                print("Error: No .fzp files found. Check the repository structure.", file=sys.stderr)
-                sys.exit(1)
-
-            # --- 3. Parse files ---
-            for fzp_file in fzp_files:
-                with z.open(fzp_file) as f:
-                    content = f.read().decode('utf-8')
-                    part_data = parse_fzp(content)
-                    if part_data:
-                        new_parts.append(part_data)
-            
-            print(f"Successfully parsed {len(new_parts)} parts.")
+    if os.path.dirname(out_csv):
+        os.makedirs(os.path.dirname(out_csv), exist_ok=True)
+    mpath = manifest_path(out_csv)
+    old = load_manifest(mpath) if incremental and os.path.exists(mpath) and os.path.exists(out_csv) else None
+    prev = previous_rows(out_csv, old) if old is not None else None
+    if prev is None:
+        old, prev = [], {}
+    seen = {m[0]: m for m in old}
+    todo = [n for n in fzp_files if n not in seen or tuple(seen[n][1:3]) != info[n]]
+    if jobs is None:
+        jobs = (os.cpu_count() or 1) if len(todo) >= PARALLEL_MIN else 1
+    if incremental:
+        print(f"Incremental: {len(fzp_files) - len(todo)} unchanged, {len(todo)} added or changed, "
+              f"{len(set(seen) - set(info))} removed.")
+
+    fresh, hashes, redo = {}, {}, set(todo)
+    tmp = out_csv + '.tmp'
+    with open(tmp, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_HEADERS)
+        writer.writeheader()
+        if not old:
+            # full import: rows go out as they are parsed
+            for parsed in iter_parts(zip_path, fzp_files, jobs):
+                writer.writerows(row for _, row in parsed)
+                hashes.update((name, row_hash(row)) for name, row in parsed)
+                if delta_csv:
+                    fresh.update(parsed)
+        else:
+            for parsed in iter_parts(zip_path, todo, jobs):
+                fresh.update(parsed)
+            hashes.update((name, row_hash(row)) for name, row in fresh.items())
+            for name in fzp_files:
+                row = fresh.get(name) if name in redo else prev.get(name)
+                if row is not None:
+                    writer.writerow(row)
+    os.replace(tmp, out_csv)
+
+    members, delta = [], []
+    for name in fzp_files:
+        h = hashes.get(name) if name in redo else seen[name][3]
+        members.append([name, info[name][0], info[name][1], h])
+        before = seen[name][3] if name in seen else None
+        if not delta_csv or h == before:
+            continue
+        if before is not None:
+            delta.append(('remove', name, prev[name]))
+        if h is not None:
+            delta.append(('add', name, fresh[name]))
+    for name in seen if delta_csv else ():
+        if name not in info and seen[name][3] is not None:
+            delta.append(('remove', name, prev[name]))
+    write_manifest(mpath, members)
+    if delta_csv:
+        write_delta(delta_csv, delta)
+        print(f"Wrote {len(delta)} delta rows to {delta_csv}")
+    return sum(1 for m in members if m[3] is not None)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--zip", help="local fritzing-parts ZIP (default: download --url)")
+    ap.add_argument("--url", default=REPO_ZIP_URL)
+    ap.add_argument("--out", default=OUTPUT_CSV)
+    ap.add_argument("--jobs", type=int,
+                    help=f"parser processes (default: one per CPU from {PARALLEL_MIN} members to parse, else 1)")
+    ap.add_argument("--incremental", action="store_true",
+                    help="only parse members changed since the last run (see the manifest next to --out)")
+    ap.add_argument("--delta", help="write the added/changed/removed rows to this CSV")
+    args = ap.parse_args()
 
+    tmp_path = None
+    zip_path = args.zip
+    if zip_path is None:
+        # --- 1. Download the Fritzing parts repo ZIP ---
+        print(f"Downloading Fritzing parts library from {args.url}...")
+        fd, tmp_path = tempfile.mkstemp(suffix='.zip', prefix='fritzing-parts-')
+        try:
+            with os.fdopen(fd, 'wb') as dest:
+                download_zip(args.url, dest)
+            print("Download successful. Parsing ZIP file...")
+        except requests.exceptions.RequestException as e:
+            os.unlink(tmp_path)
+            print(f"\n--- ERROR ---")
+            print(f"Error downloading repository: {e}")
+            print("Please check your internet connection and ensure 'requests' is installed (`pip install requests`)")
+            sys.exit(1)
+        zip_path = tmp_path
+
+    # --- 2. Parse the ZIP members and write the CSV as they come in ---
+    try:
+        jobs = None if args.jobs is None else max(1, args.jobs)
+        count = import_zip(zip_path, args.out, jobs, args.incremental, args.delta)
     except zipfile.BadZipFile:
         print("Error: Downloaded file is not a valid ZIP file.", file=sys.stderr)
         sys.exit(1)
-    except Exception as e:
-        print(f"Error processing ZIP file: {e}", file=sys.stderr)
+    except OSError as e:
+        print(f"Error writing to CSV file: {e}", file=sys.stderr)
         sys.exit(1)
+    finally:
+        if tmp_path:
+            os.unlink(tmp_path)
 
-    # --- 4. Write to CSV ---
-    if not new_parts:
+    if not count:
         print("No parts were parsed. Exiting.", file=sys.stderr)
         sys.exit(1)
-        
-    os.makedirs(os.path.dirname(OUTPUT_CSV), exist_ok=True)
-    try:
-        with open(OUTPUT_CSV, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=CSV_HEADERS)
-            writer.writeheader()
-            writer.writerows(new_parts)
-        print(f"\n--- SUCCESS ---")
-        print(f"Successfully wrote {len(new_parts)} parts to {OUTPUT_CSV}")
-        
-    except Exception as e:
-        print(f"Error writing to CSV file: {e}", file=sys.stderr)
+    print(f"\n--- SUCCESS ---")
+    print(f"Successfully wrote {count} parts to {args.out}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,19 +1,65 @@
 # Tiny FastAPI wrapper around your KB to serve recommendations.
 # Run: uvicorn tools.kb_adapter:app --reload
-from fastapi import FastAPI
+# Set KB_INDEX=0 to answer /recommend through SPARQL only (no in-memory index).
+# Set KB_MODE=mmap to serve /recommend from a shared memory-mapped catalog instead
+# of a per-worker Graph (for --workers N); see kb_mmap.py.
+# The KB is hot-reloaded when the ontology files change (KB_WATCH=0 disables it);
+# GET /admin/kb reports the loaded version, POST /admin/kb/reload forces a rebuild
+# (X-Admin-Token = KB_ADMIN_TOKEN, or localhost if unset; throttled, see kb_reload.py).
+# POST /recommend/batch answers a list of Req slots (e.g. a whole BOM, at most
+# KB_BATCH_MAX_SLOTS) in one call; candidates whose I2C addresses are all taken by earlier slots' picks go last.
+# POST /bom returns the k cheapest compatible BOMs around a controller (bom_solver.py;
+# graph mode only).
+# POST /power sums a BOM's active/idle current per rail and recommends supplies that
+# cover each rail (power_budget.py; graph mode only).
+import os, sys
+from fastapi import FastAPI, Header, HTTPException, Request
 from pydantic import BaseModel
 from rdflib import Graph, Namespace, URIRef, Literal
 from rdflib.namespace import RDF, XSD
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bom_solver import BomSolver, TIME_BUDGET_MS, TOP_K
+from i2c_addr import fits
+from kb_index import PartIndex
+from kb_snapshot import load_graph
+from kb_cache import ResponseCache
+from kb_mmap import MmapIndex, ensure_catalog
+from kb_reload import KBState, KBWatcher, WATCH, admin_allowed
+from part_table import PartTable
+from power_budget import PowerBudget, HEADROOM, RAILS
+
 EX   = Namespace("https://example.org/iotkb#")
 SOSA = Namespace("http://www.w3.org/ns/sosa/")
 app  = FastAPI(title="IoT KB Adapter")
 
-# Load KB once
-G = Graph()
-G.parse("ontologies/iotkb_schema.ttl", format="turtle")
-G.parse("ontologies/iotkb_align.ttl",  format="turtle")
-G.parse("ontologies/iotkb_parts.ttl",  format="turtle")
+# KB sources (loaded through the compiled snapshot cache, see kb_snapshot.py)
+KB_FILES = [
+    "ontologies/iotkb_schema.ttl",
+    "ontologies/iotkb_align.ttl",
+    "ontologies/iotkb_parts.ttl",
+]
+KB_MODE = os.environ.get("KB_MODE", "graph")
+USE_INDEX = os.environ.get("KB_INDEX", "1") != "0"
+BATCH_MAX_SLOTS = int(os.environ.get("KB_BATCH_MAX_SLOTS", "256"))   # per /recommend/batch call
+
+def build_kb(paths, version) -> KBState:
+    if KB_MODE == "mmap":
+        # every worker attaches to the same compiled file; no Graph, so no SPARQL fallback
+        return KBState(None, MmapIndex(ensure_catalog(paths)), version, "", 0.0)
+    g = load_graph(paths)
+    # Precomputed index; SPARQL stays as the fallback path. The BOM solver's per-need
+    # candidate lists and the supply index are built here too, off the request path.
+    table = PartTable(g)
+    i2c = {str(table.parts[r]): table.i2c_mask(r) for r in range(len(table)) if table.i2c_bits[r].any()}
+    return KBState(g, PartIndex(g) if USE_INDEX else None, version, "", 0.0,
+                   {"bom": BomSolver(table), "power": PowerBudget(table), "i2c": i2c})
+
+# Responses are cached per KB version (content digest of the loaded TTL files)
+KB = KBWatcher(KB_FILES, build_kb, on_swap=lambda kb: CACHE.reset(kb.version))
+CACHE = ResponseCache(version=KB.current.version)
+if WATCH:
+    KB.start()
 
 class Req(BaseModel):
     cls: str                     # "SensorPart" | "ActuatorPart" | "ControllerBoard" | "Part"
@@ -23,12 +69,35 @@ class Req(BaseModel):
     budget: float | None = None  # e.g. 30.0
     currency: str | None = None  # "CAD" optional
 
+class BatchReq(BaseModel):
+    slots: list[Req]             # one Req per BOM slot; results come back in the same order
+    i2c: bool = True             # down-rank candidates with no I2C address left (graph mode)
+
+class BomReq(BaseModel):
+    controller: str              # controller local name or IRI, e.g. "Arduino_Mega_2560"
+    needs: list[str]             # e.g. ["distance", "motion", "power_state"]
+    v: float | None = None       # rail; default: the controller's logic level and 3.3/5 V rails
+    budget: float | None = None  # max total price of the BOM
+    currency: str | None = None  # price BOMs in this currency only, e.g. "EUR"
+    k: int = TOP_K               # BOMs to return, cheapest first
+    time_budget_ms: float = TIME_BUDGET_MS
+
+class PowerReq(BaseModel):
+    parts: list[str]             # part local names or IRIs; list a part twice to count it twice
+    rails: list[float] = list(RAILS)   # rails to put parts on, in order of preference
+    headroom: float = HEADROOM   # supplies must deliver the active current plus this share
+    k: int = TOP_K               # supplies to return per rail
+
+def cache_key(req: Req):
+    """Canonical form of a request: list order and duplicates don't change the result."""
+    return (req.cls, tuple(sorted(set(req.properties))), tuple(sorted(set(req.interfaces))),
+            req.v, req.budget, req.currency or None)
+
 def iri_local(u: URIRef) -> str:
     s = str(u)
     return s.split("#")[-1] if "#" in s else s.rsplit("/",1)[-1]
 
-@app.post("/recommend")
-def recommend(req: Req):
+def sparql_rows(req: Req, g: Graph):
     cls_iri  = EX[req.cls]
     prop_iris = [EX[p] for p in req.properties]
     iface_iris= [EX[i] for i in req.interfaces]
@@ -62,8 +131,19 @@ SELECT ?part ?vmin ?vmax ?price ?cur WHERE {{
   {' '.join(where)}
 }}
 """
+    return g.query(q)
+
+def index_rows(req: Req, index, memo=None):
+    return index.rows(EX[req.cls],
+                      props=[EX[p] for p in req.properties],
+                      ifaces=[EX[i] for i in req.interfaces],
+                      v=req.v, budget=req.budget, currency=req.currency, memo=memo)
+
+def answer(req: Req, kb: KBState, memo=None) -> dict:
+    """Uncached /recommend response for req against one KB state."""
+    rows = index_rows(req, kb.index, memo) if kb.index is not None else sparql_rows(req, kb.graph)
     res = []
-    for row in G.query(q):
+    for row in rows:
         part, vmin, vmax, price, cur = row
         res.append({
             "iri": str(part),
@@ -79,4 +159,125 @@ SELECT ?part ?vmin ?vmax ?price ?cur WHERE {{
         p = x["price"] if x["price"] is not None else 1e9
         return (p, x["label"])
     res.sort(key=score)
-    return {"count": len(res), "items": res}
\ No newline at end of file
+    return {"count": len(res), "items": res}
+
+def i2c_rerank(results, masks):
+    """Per slot, candidates that can't get a free I2C address next to the top picks
+    of the earlier slots move to the end, flagged i2c_conflict. Cached results are
+    not modified."""
+    picked, bus, out = [], 0, []
+    for res in results:
+        ok, clash = [], []
+        for item in res["items"]:
+            m = masks.get(item["iri"], 0)
+            if m and not fits(picked, bus, m):
+                clash.append(dict(item, i2c_conflict=True))
+            else:
+                ok.append(item)
+        if ok:
+            m = masks.get(ok[0]["iri"], 0)
+            if m:
+                picked.append(m)
+                bus |= m
+        out.append(dict(res, items=ok + clash) if clash else res)
+    return out
+
+@app.post("/recommend")
+def recommend(req: Req):
+    kb = KB.current      # one consistent KB snapshot for the whole request
+    key = cache_key(req)
+    cached = CACHE.get(key)
+    if cached is not None:
+        return cached
+    out = answer(req, kb)
+    CACHE.put(key, out, version=kb.version)
+    return out
+
+@app.post("/recommend/batch")
+def recommend_batch(batch: BatchReq):
+    """Answers every slot like /recommend. With i2c (graph mode), candidates are then
+    re-ranked slot by slot in request order: each slot's first remaining candidate is
+    taken as picked, and later slots' candidates that can't get an I2C address next
+    to the picks so far move to the end (i2c_conflict). This is greedy, so the
+    outcome depends on slot order and assumes the top candidates are the ones used;
+    /bom searches the combinations instead."""
+    # every slot sees the same KB state; identical slots are answered once and the
+    # voltage/budget range sets (PartIndex._le/_ge) are shared between slots via memo
+    if len(batch.slots) > BATCH_MAX_SLOTS:
+        raise HTTPException(status_code=413, detail=f"{len(batch.slots)} slots; at most {BATCH_MAX_SLOTS} per batch")
+    kb = KB.current
+    keys = [cache_key(r) for r in batch.slots]
+    done, todo = {}, {}
+    for key, req in zip(keys, batch.slots):
+        if key in done or key in todo:
+            continue
+        cached = CACHE.get(key)
+        if cached is not None:
+            done[key] = cached
+        else:
+            todo[key] = req
+
+    memo = {} if kb.index is not None else None
+    for key, req in todo.items():
+        out = answer(req, kb, memo)
+        done[key] = out
+        CACHE.put(key, out, version=kb.version)
+
+    results = [done[k] for k in keys]
+    masks = (kb.extra or {}).get("i2c")
+    if batch.i2c and masks:
+        results = i2c_rerank(results, masks)
+    return {"count": len(keys), "kb_version": kb.version, "results": results}
+
+@app.post("/bom")
+def bom(req: BomReq):
+    kb = KB.current
+    solver = (kb.extra or {}).get("bom")
+    if solver is None:
+        raise HTTPException(status_code=501, detail="BOM solving needs the graph mode (unset KB_MODE)")
+    key = ("bom", req.controller, tuple(dict.fromkeys(req.needs)), req.v, req.budget, req.currency, req.k)
+    cached = CACHE.get(key)
+    if cached is not None:
+        return cached
+    try:
+        out = solver.solve(req.controller, req.needs, req.v, req.budget, req.k, req.time_budget_ms, req.currency)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+    if out["complete"]:      # a search cut short by the time budget is not cached
+        CACHE.put(key, out, version=kb.version)
+    return out
+
+@app.post("/power")
+def power(req: PowerReq):
+    kb = KB.current
+    budget = (kb.extra or {}).get("power")
+    if budget is None:
+        raise HTTPException(status_code=501, detail="power analysis needs the graph mode (unset KB_MODE)")
+    key = ("power", tuple(req.parts), tuple(req.rails), req.headroom, req.k)
+    cached = CACHE.get(key)
+    if cached is not None:
+        return cached
+    try:
+        out = budget.analyze(req.parts, req.rails, req.headroom, req.k)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+    CACHE.put(key, out, version=kb.version)
+    return out
+
+@app.get("/health")
+def health():
+    return {"status": "ok", "mode": KB_MODE, "kb_version": KB.current.version, "cache": CACHE.stats()}
+
+@app.get("/admin/kb")
+def admin_kb():
+    return {"mode": KB_MODE, **KB.status()}
+
+@app.post("/admin/kb/reload")
+def admin_kb_reload(request: Request, x_admin_token: str | None = Header(None)):
+    if not admin_allowed(x_admin_token, request.client.host if request.client else None):
+        raise HTTPException(status_code=403, detail="admin token required")
+    reloaded, retry_after = KB.force_reload()
+    if retry_after:
+        raise HTTPException(status_code=429, detail=f"reload forced too recently; retry in {retry_after}s",
+                            headers={"Retry-After": str(int(retry_after + 1))})
+    return {"reloaded": reloaded, "mode": KB_MODE, **KB.status()}
\ No newline at end of file
@@ -0,0 +1,72 @@
+# filename: tools/kb_cache.py
+# Bounded LRU + TTL response cache for the /recommend endpoints.
+# Entries are tagged with the KB version they were computed against; calling
+# reset(version) after a KB (re)load drops everything computed on the old data.
+import os, threading, time
+from collections import OrderedDict
+
+CACHE_SIZE = int(os.environ.get("KB_CACHE_SIZE", "1024"))
+CACHE_TTL  = float(os.environ.get("KB_CACHE_TTL", "300"))
+
+class ResponseCache:
+    def __init__(self, maxsize: int = CACHE_SIZE, ttl: float = CACHE_TTL, version: str = ""):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.version = version
+        self._data = OrderedDict()   # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+
+    def get(self, key):
+        """Cached value for key, or None (counted as a miss)."""
+        if self.maxsize <= 0:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                if item[0] >= time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return item[1]
+                del self._data[key]
+                self.expirations += 1
+            self.misses += 1
+            return None
+
+    def put(self, key, value, version: str = None):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            if version is not None and version != self.version:
+                return  # computed against a KB that has since been replaced
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def reset(self, version: str):
+        """Invalidate all entries if the KB version changed."""
+        with self._lock:
+            if version != self.version:
+                self.version = version
+                self._data.clear()
+                self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "kb_version": self.version,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_s": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
@@ -0,0 +1,129 @@
+# filename: tools/kb_index.py
+# In-memory part index built once from the KB graph, so /recommend can answer
+# class / property / interface / voltage / budget requests with set
+# intersections and range lookups instead of a SPARQL round trip.
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from decimal import Decimal
+from itertools import product
+from rdflib import Graph, Namespace, URIRef, Literal
+from rdflib.namespace import RDF
+
+EX = Namespace("https://example.org/iotkb#")
+
+def num(o):
+    """Numeric value of a literal the way SPARQL's xsd:decimal() cast sees it (None if not castable)."""
+    if not isinstance(o, Literal):
+        return None
+    try:
+        return float(Decimal(str(o)))
+    except Exception:
+        return None
+
+class PartIndex:
+    """Parts grouped by class, inverted sets for properties/interfaces and
+    sorted numeric arrays for vccMin/vccMax/offerPrice."""
+
+    def __init__(self, g: Graph):
+        self.by_class = defaultdict(set)    # class IRI -> parts
+        self.by_prop  = defaultdict(set)    # ex:observesProperty object -> parts
+        self.by_iface = defaultdict(set)    # ex:hasInterface object -> parts
+        self.by_cur   = defaultdict(set)    # STR(priceCurrency) -> parts
+        self.attrs    = {}                  # part -> (vmins, vmaxs, prices, curs)
+
+        for s, o in g.subject_objects(RDF.type):
+            if isinstance(o, URIRef):
+                self.by_class[o].add(s)
+        for s, o in g.subject_objects(EX.observesProperty):
+            self.by_prop[o].add(s)
+        for s, o in g.subject_objects(EX.hasInterface):
+            self.by_iface[o].add(s)
+
+        parts = set().union(*self.by_class.values()) if self.by_class else set()
+        for s in parts:
+            vals = tuple(tuple(g.objects(s, p)) for p in (EX.vccMin, EX.vccMax, EX.offerPrice, EX.priceCurrency))
+            if any(vals):
+                self.attrs[s] = vals
+            for c in vals[3]:
+                self.by_cur[str(c)].add(s)
+
+        # parts carrying at least one value (bound in SPARQL terms) and
+        # sorted (value, part) arrays over the numeric ones
+        self.bound = [set(), set(), set()]
+        self.sorted_vals, self.sorted_parts = [], []
+        for k in range(3):
+            pairs = []
+            for s, vals in self.attrs.items():
+                if vals[k]:
+                    self.bound[k].add(s)
+                for o in vals[k]:
+                    x = num(o)
+                    if x is not None:
+                        pairs.append((x, str(s), s))
+            pairs.sort()
+            self.sorted_vals.append([x for x, _, _ in pairs])
+            self.sorted_parts.append([s for _, _, s in pairs])
+        self.has_cur = set().union(*self.by_cur.values()) if self.by_cur else set()
+
+    def _le(self, k: int, x: float, memo=None) -> set:
+        if memo is not None:
+            key = ("le", k, x)
+            if key not in memo:
+                memo[key] = self._le(k, x)
+            return memo[key]
+        return set(self.sorted_parts[k][:bisect_right(self.sorted_vals[k], x)])
+
+    def _ge(self, k: int, x: float, memo=None) -> set:
+        if memo is not None:
+            key = ("ge", k, x)
+            if key not in memo:
+                memo[key] = self._ge(k, x)
+            return memo[key]
+        return set(self.sorted_parts[k][bisect_left(self.sorted_vals[k], x):])
+
+    def candidates(self, cls: URIRef, props=(), ifaces=(), v=None, budget=None, currency=None, memo=None) -> set:
+        """Parts that have at least one attribute combination passing every filter.
+        Pass the same memo dict for a batch of requests to share the range lookups."""
+        sets = [self.by_class.get(cls, set())]
+        sets += [self.by_prop.get(p, set()) for p in props]
+        sets += [self.by_iface.get(i, set()) for i in ifaces]
+        sets.sort(key=len)
+        cand = set(sets[0])
+        for s in sets[1:]:
+            if not cand:
+                break
+            cand &= s
+
+        def keep(k, ok):
+            # unbound attribute passes (!BOUND(...) || ...), bound ones need a matching value
+            return {s for s in cand if s not in self.bound[k] or s in ok}
+
+        if cand and v is not None:
+            cand = keep(0, self._le(0, v, memo))
+            cand = keep(1, self._ge(1, v, memo))
+        if cand and budget is not None:
+            cand = keep(2, self._le(2, budget, memo))
+        if cand and currency:
+            ok = self.by_cur.get(currency, set())
+            cand = {s for s in cand if s not in self.has_cur or s in ok}
+        return cand
+
+    def rows(self, cls: URIRef, props=(), ifaces=(), v=None, budget=None, currency=None, memo=None):
+        """Yield (part, vmin, vmax, price, cur) rows, matching the SPARQL solution sequence
+        of the OPTIONAL/FILTER query in kb_adapter (one row per value combination)."""
+        empty = ((), (), (), ())
+        for s in sorted(self.candidates(cls, props, ifaces, v, budget, currency, memo)):
+            vmins, vmaxs, prices, curs = self.attrs.get(s, empty)
+            for vmin, vmax, price, cur in product(vmins or (None,), vmaxs or (None,),
+                                                  prices or (None,), curs or (None,)):
+                if v is not None:
+                    if vmin is not None and not (num(vmin) is not None and num(vmin) <= v):
+                        continue
+                    if vmax is not None and not (num(vmax) is not None and num(vmax) >= v):
+                        continue
+                if budget is not None and price is not None:
+                    if not (num(price) is not None and num(price) <= budget):
+                        continue
+                if currency and cur is not None and str(cur) != currency:
+                    continue
+                yield s, vmin, vmax, price, cur
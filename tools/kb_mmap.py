@@ -0,0 +1,217 @@
+# filename: tools/kb_mmap.py
+# usage:    python3 tools/kb_mmap.py .kb_cache/catalog.kbm ontologies/iotkb_schema.ttl ontologies/iotkb_align.ttl ontologies/iotkb_parts.ttl
+#
+# Read-only, memory-mapped part catalog for multi-worker deployments
+# (uvicorn tools.kb_adapter:app --workers N with KB_MODE=mmap).
+# The catalog is compiled once into a flat file and every worker attaches to it
+# with mmap, so the page cache holds a single copy instead of one rdflib Graph
+# per worker. Lookups read straight from the mapping (no per-worker dicts).
+#
+# Layout (little-endian, every section 8-byte aligned):
+#   header   magic, n_parts, n_terms, source digest, section offsets
+#   parts    interned part IRIs, sorted (u32 offsets + utf-8 blob); part id = position
+#   terms    interned keys "c|<class>", "p|<observesProperty>", "i|<hasInterface>",
+#            "$|<currency>", sorted (u32 offsets + utf-8 blob)
+#   postings adjacency list term id -> sorted part ids (u32 offsets + u32 ids)
+#   columns  vccMin, vccMax, offerPrice as f64 and currency as i32 term id, each a
+#            value list per part (u32 offsets + values) so multi-valued parts expand
+#            into the same rows as the SPARQL OPTIONALs; non-numeric values are NaN
+#            and never pass a voltage/budget filter.
+import fcntl, math, mmap, os, struct, sys
+from itertools import product
+from rdflib import Graph, Namespace, URIRef
+from rdflib.namespace import RDF
+
+from kb_index import num
+from kb_snapshot import CACHE_DIR, load_graph, sources_digest
+
+EX = Namespace("https://example.org/iotkb#")
+
+MAGIC = b"IOTKBMM1"
+SECTIONS = ("part_off", "part_blob", "term_off", "term_blob", "post_off", "post_ids",
+            "vmin_off", "vmin", "vmax_off", "vmax", "price_off", "price", "cur_off", "cur")
+HEADER = struct.Struct(f"<8sII64s{len(SECTIONS)}Q")
+DEFAULT_PATH = os.path.join(CACHE_DIR, "catalog.kbm")
+
+def _strings(items):
+    offs, blob = [0], bytearray()
+    for s in items:
+        blob += s.encode("utf-8")
+        offs.append(len(blob))
+    return struct.pack(f"<{len(offs)}I", *offs), bytes(blob)
+
+def _column(values_per_part, fmt):
+    offs, vals = [0], []
+    for vs in values_per_part:
+        vals.extend(vs)
+        offs.append(len(vals))
+    return struct.pack(f"<{len(offs)}I", *offs), struct.pack(f"<{len(vals)}{fmt}", *vals)
+
+def _nums(g: Graph, s, p):
+    return [math.nan if x is None else x for x in (num(o) for o in g.objects(s, p))]
+
+def compile_catalog(g: Graph, out_path: str, digest: str = ""):
+    """Write the part catalog of graph g to out_path (atomically)."""
+    postings = {}
+    for s, o in g.subject_objects(RDF.type):
+        if isinstance(o, URIRef):
+            postings.setdefault("c|" + str(o), set()).add(s)
+    for s, o in g.subject_objects(EX.observesProperty):
+        postings.setdefault("p|" + str(o), set()).add(s)
+    for s, o in g.subject_objects(EX.hasInterface):
+        postings.setdefault("i|" + str(o), set()).add(s)
+    parts = sorted({s for k, ss in postings.items() if k.startswith("c|") for s in ss}, key=str)
+    for s in parts:
+        for o in g.objects(s, EX.priceCurrency):
+            postings.setdefault("$|" + str(o), set()).add(s)
+
+    part_id = {s: i for i, s in enumerate(parts)}
+    terms = sorted(postings)
+    term_id = {t: i for i, t in enumerate(terms)}
+
+    post_off, post_ids = [0], []
+    for t in terms:
+        post_ids.extend(sorted(part_id[s] for s in postings[t] if s in part_id))
+        post_off.append(len(post_ids))
+
+    sections = {}
+    sections["part_off"], sections["part_blob"] = _strings(str(s) for s in parts)
+    sections["term_off"], sections["term_blob"] = _strings(terms)
+    sections["post_off"] = struct.pack(f"<{len(post_off)}I", *post_off)
+    sections["post_ids"] = struct.pack(f"<{len(post_ids)}I", *post_ids)
+    for name, pred in (("vmin", EX.vccMin), ("vmax", EX.vccMax), ("price", EX.offerPrice)):
+        sections[name + "_off"], sections[name] = _column((_nums(g, s, pred) for s in parts), "d")
+    sections["cur_off"], sections["cur"] = _column(
+        ([term_id["$|" + str(o)] for o in g.objects(s, EX.priceCurrency)] for s in parts), "i")
+    n = len(parts)
+
+    body, offsets, pos = bytearray(), [], HEADER.size
+    for name in SECTIONS:
+        pad = (-pos) % 8
+        body += b"\0" * pad
+        pos += pad
+        offsets.append(pos)
+        body += sections[name]
+        pos += len(sections[name])
+    header = HEADER.pack(MAGIC, n, len(terms), digest.encode("ascii").ljust(64, b"\0"), *offsets)
+
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    tmp = out_path + f".tmp-{os.getpid()}"
+    with open(tmp, "wb") as f:
+        f.write(header)
+        f.write(body)
+    os.replace(tmp, out_path)
+
+def read_digest(path: str) -> str:
+    with open(path, "rb") as f:
+        magic, _, _, digest, *_ = HEADER.unpack(f.read(HEADER.size))
+    return digest.rstrip(b"\0").decode("ascii") if magic == MAGIC else ""
+
+def ensure_catalog(paths, out_path: str = DEFAULT_PATH) -> str:
+    """Compile the catalog unless an up-to-date one exists; only one process compiles at a time."""
+    digest = sources_digest(paths)
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    with open(out_path + ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            if not os.path.exists(out_path) or read_digest(out_path) != digest:
+                compile_catalog(load_graph(paths), out_path, digest)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+    return out_path
+
+class MmapIndex:
+    """Zero-copy view of a compiled catalog; rows() mirrors PartIndex.rows()."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.n_parts, self.n_terms, digest, *offs = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a compiled KB catalog")
+        self.digest = digest.rstrip(b"\0").decode("ascii")
+        off = dict(zip(SECTIONS, offs))
+        mv = memoryview(self.mm)
+        n, t = self.n_parts, self.n_terms
+
+        def view(name, count, fmt, width):
+            return mv[off[name]:off[name] + count * width].cast(fmt)
+
+        self.part_off = view("part_off", n + 1, "I", 4)
+        self.part_blob = off["part_blob"]
+        self.term_off = view("term_off", t + 1, "I", 4)
+        self.term_blob = off["term_blob"]
+        self.post_off = view("post_off", t + 1, "I", 4)
+        self.post_ids = view("post_ids", self.post_off[t], "I", 4)
+        self.cols = []
+        for name, fmt, width in (("vmin", "d", 8), ("vmax", "d", 8), ("price", "d", 8), ("cur", "i", 4)):
+            offs = view(name + "_off", n + 1, "I", 4)
+            self.cols.append((offs, view(name, offs[n], fmt, width)))
+
+    def __len__(self):
+        return self.n_parts
+
+    def part_iri(self, i: int) -> str:
+        return self.mm[self.part_blob + self.part_off[i]:self.part_blob + self.part_off[i + 1]].decode("utf-8")
+
+    def term(self, i: int) -> bytes:
+        return self.mm[self.term_blob + self.term_off[i]:self.term_blob + self.term_off[i + 1]]
+
+    def term_id(self, key: str) -> int:
+        """Binary search over the sorted term table; -1 if absent."""
+        k = key.encode("utf-8")
+        lo, hi = 0, self.n_terms
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.term(mid) < k:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo if lo < self.n_terms and self.term(lo) == k else -1
+
+    def postings(self, key: str):
+        t = self.term_id(key)
+        return self.post_ids[self.post_off[t]:self.post_off[t + 1]] if t >= 0 else ()
+
+    def _postings(self, key: str, memo=None):
+        if memo is None:
+            return self.postings(key)
+        if key not in memo:
+            memo[key] = self.postings(key)
+        return memo[key]
+
+    def rows(self, cls, props=(), ifaces=(), v=None, budget=None, currency=None, memo=None):
+        lists = [self._postings("c|" + str(cls), memo)]
+        lists += [self._postings("p|" + str(p), memo) for p in props]
+        lists += [self._postings("i|" + str(i), memo) for i in ifaces]
+        lists.sort(key=len)
+        cand = set(lists[0])
+        for ids in lists[1:]:
+            if not cand:
+                break
+            cand.intersection_update(ids)
+        cur_ok = self.term_id("$|" + currency) if currency else -1
+
+        for i in sorted(cand):
+            vmins, vmaxs, prices, curs = (vals[offs[i]:offs[i + 1]] for offs, vals in self.cols)
+            for vmin, vmax, price, cur in product(vmins or (None,), vmaxs or (None,),
+                                                  prices or (None,), curs or (None,)):
+                if v is not None:
+                    if vmin is not None and not vmin <= v:
+                        continue
+                    if vmax is not None and not vmax >= v:
+                        continue
+                if budget is not None and price is not None and not price <= budget:
+                    continue
+                if currency and cur is not None and cur != cur_ok:
+                    continue
+                yield (self.part_iri(i), vmin, vmax, price,
+                       self.term(cur)[2:].decode("utf-8") if cur is not None else None)
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: python3 tools/kb_mmap.py <out.kbm> <source.ttl> [<source.ttl> ...]")
+        sys.exit(1)
+    out = ensure_catalog(sys.argv[2:], sys.argv[1])
+    idx = MmapIndex(out)
+    print(f"Compiled {len(idx)} parts to {out} ({os.path.getsize(out)} bytes)")
@@ -0,0 +1,132 @@
+# filename: tools/kb_reload.py
+# Hot reload for the API servers: a background thread watches the ontology files,
+# builds a complete new KB state (graph, indexes, version) off the request path and
+# swaps it in with a single reference assignment. Request handlers read
+# `watcher.current` once and use that state throughout, so they never block on a
+# reload and never see a half-built graph.
+# KB_WATCH=0 disables the watcher thread; KB_WATCH_INTERVAL sets the poll period (s).
+# Forced reloads (POST /admin/kb/reload) need the KB_ADMIN_TOKEN value in the
+# X-Admin-Token header, or come from localhost when no token is set, and run at most
+# once per KB_RELOAD_MIN_INTERVAL seconds.
+import hmac, os, sys, threading, time, traceback
+from datetime import datetime, timezone
+from typing import Any, NamedTuple, Optional
+
+from kb_snapshot import sources_digest
+
+WATCH = os.environ.get("KB_WATCH", "1") != "0"
+WATCH_INTERVAL = float(os.environ.get("KB_WATCH_INTERVAL", "2"))
+ADMIN_TOKEN = os.environ.get("KB_ADMIN_TOKEN", "")
+RELOAD_MIN_INTERVAL = float(os.environ.get("KB_RELOAD_MIN_INTERVAL", "30"))
+LOCAL_HOSTS = {"127.0.0.1", "::1", "localhost"}
+
+class KBState(NamedTuple):
+    graph: Any             # rdflib Graph (None in mmap mode)
+    index: Any             # PartIndex / MmapIndex / server-specific lookup tables
+    version: str           # content digest of the sources
+    loaded_at: str         # ISO timestamp (UTC)
+    load_seconds: float
+    extra: Optional[dict] = None
+
+def kb_version(paths) -> str:
+    return sources_digest(paths)[:16]
+
+def admin_allowed(token, client_host) -> bool:
+    """Whether a request may use the admin write endpoints."""
+    if ADMIN_TOKEN:
+        return hmac.compare_digest((token or "").encode(), ADMIN_TOKEN.encode())
+    return client_host in LOCAL_HOSTS
+
+def stat_signature(paths):
+    sig = []
+    for p in paths:
+        try:
+            st = os.stat(p)
+            sig.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            sig.append(None)
+    return tuple(sig)
+
+class KBWatcher:
+    """Owns the current KBState; build(paths, version) must return a fresh KBState."""
+
+    def __init__(self, paths, build, on_swap=None, interval: float = WATCH_INTERVAL):
+        self.paths = list(paths)
+        self.build = build
+        self.on_swap = on_swap
+        self.interval = interval
+        self.reloads = 0
+        self.last_error = None
+        self._reload_lock = threading.Lock()
+        self._forced_lock = threading.Lock()
+        self._last_forced = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._sig = stat_signature(self.paths)
+        self.current = self._load(kb_version(self.paths))
+
+    def _load(self, version: str) -> KBState:
+        t0 = time.perf_counter()
+        state = self.build(self.paths, version)
+        return state._replace(version=version,
+                              loaded_at=datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                              load_seconds=round(time.perf_counter() - t0, 4))
+
+    def reload(self, force: bool = False) -> bool:
+        """Rebuild from the sources and swap it in; False if nothing changed or the build failed."""
+        with self._reload_lock:
+            self._sig = stat_signature(self.paths)
+            try:
+                version = kb_version(self.paths)
+                if version == self.current.version and not force:
+                    return False
+                state = self._load(version)
+            except Exception as e:
+                # keep serving the previous state; retried on the next file change
+                self.last_error = f"{type(e).__name__}: {e}"
+                traceback.print_exc(file=sys.stderr)
+                return False
+            self.current = state          # atomic swap
+            self.reloads += 1
+            self.last_error = None
+            if self.on_swap:
+                self.on_swap(state)
+            return True
+
+    def force_reload(self, min_interval: float = RELOAD_MIN_INTERVAL):
+        """(reloaded, retry_after): reload(force=True) unless one was forced less than
+        min_interval seconds ago, in which case nothing runs and retry_after says
+        how long to wait."""
+        with self._forced_lock:
+            now = time.monotonic()
+            if self._last_forced is not None and now - self._last_forced < min_interval:
+                return False, round(min_interval - (now - self._last_forced), 1)
+            self._last_forced = now
+        return self.reload(force=True), 0.0
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if stat_signature(self.paths) != self._sig:
+                self.reload()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="kb-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def status(self) -> dict:
+        kb = self.current
+        return {
+            "kb_version": kb.version,
+            "loaded_at": kb.loaded_at,
+            "load_seconds": kb.load_seconds,
+            "triples": len(kb.graph) if kb.graph is not None else None,
+            "sources": self.paths,
+            "reloads": self.reloads,
+            "watching": self._thread is not None and not self._stop.is_set(),
+            "last_error": self.last_error,
+        }
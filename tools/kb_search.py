@@ -0,0 +1,142 @@
+# filename: tools/kb_search.py
+# Full-text part search for kb_server.py's /search: an inverted index over
+# rdfs:label, ex:mpn, ex:manufacturer, ex:kind / ex:partKind and ex:notes, built once
+# at KB load and ranked with BM25 (k1, b below). Field weights scale a term's
+# frequency before saturation, so a hit in the label or MPN outranks one in the
+# notes (BM25F-style). Every posting's score contribution is fixed by the corpus, so
+# it is computed at build time; a query only gathers the postings of its terms,
+# sums them per part and keeps the parts passing the class / voltage / budget masks.
+import re
+from collections import Counter
+import numpy as np
+from rdflib import Graph, Literal, Namespace
+from rdflib.namespace import RDF, RDFS
+
+EX = Namespace("https://example.org/iotkb#")
+
+K1, B = 1.2, 0.75
+FIELDS = [  # (predicate, weight)
+    (RDFS.label, 2.0),
+    (EX.mpn, 3.0),
+    (EX.manufacturer, 1.0),
+    (EX.kind, 1.0),
+    (EX.partKind, 1.0),
+    (EX.notes, 1.0),
+]
+TOKEN = re.compile(r"[a-z0-9]+")
+
+def tokens(text: str) -> list:
+    return TOKEN.findall(text.lower())
+
+def mpn_tokens(text: str) -> list:
+    """MPN tokens plus the MPN without separators, so "hcsr04" finds "HC-SR04"."""
+    toks = tokens(text)
+    joined = "".join(toks)
+    return toks + [joined] if len(toks) > 1 else toks
+
+def num(o):
+    try:
+        return float(str(o))
+    except ValueError:
+        return None
+
+class SearchIndex:
+    def __init__(self, g: Graph):
+        # documents: every subject typed with an ex: class, in IRI order
+        typed = {}
+        for s, c in g.subject_objects(RDF.type):
+            if str(c).startswith(str(EX)):
+                typed.setdefault(s, []).append(c)
+        self.parts = sorted(typed, key=str)
+        row = {s: i for i, s in enumerate(self.parts)}
+        n = len(self.parts)
+
+        self.class_mask = {}
+        for s, cs in typed.items():
+            for c in cs:
+                self.class_mask.setdefault(c, np.zeros(n, dtype=bool))[row[s]] = True
+
+        tf = [Counter() for _ in range(n)]
+        for pred, weight in FIELDS:
+            split = mpn_tokens if pred == EX.mpn else tokens
+            for s, o in g.subject_objects(pred):
+                r = row.get(s)
+                if r is not None and isinstance(o, Literal):
+                    for t in split(str(o)):
+                        tf[r][t] += weight
+
+        values_of = lambda p: {s: o for s, o in g.subject_objects(p) if s in row}
+        self.labels = [str(g.value(s, RDFS.label) or str(s).split("#")[-1]) for s in self.parts]
+        cols = []
+        for p in (EX.vccMin, EX.vccMax, EX.offerPrice):
+            vals = values_of(p)
+            col = np.full(n, np.nan)
+            for s, o in vals.items():
+                x = num(o)
+                if x is not None:
+                    col[row[s]] = x
+            cols.append(col)
+        self.vcc_min, self.vcc_max, self.price = cols
+        self.fields = {p: values_of(p) for p in (EX.manufacturer, EX.priceCurrency, EX.productURL)}
+
+        # postings grouped by term: doc ids and their precomputed BM25 contribution
+        self.vocab = {}
+        term_ids, docs, freqs = [], [], []
+        for r, counts in enumerate(tf):
+            for t, f in counts.items():
+                term_ids.append(self.vocab.setdefault(t, len(self.vocab)))
+                docs.append(r)
+                freqs.append(f)
+        term_ids = np.array(term_ids, dtype=np.int64)
+        docs = np.array(docs, dtype=np.int64)
+        freqs = np.array(freqs, dtype=np.float64)
+        dl = np.array([sum(c.values()) for c in tf], dtype=np.float64)
+        avgdl = dl.mean() if n and dl.mean() > 0 else 1.0
+        df = np.bincount(term_ids, minlength=len(self.vocab))
+        idf = np.log(1.0 + (n - df + 0.5) / (df + 0.5))
+        weight = idf[term_ids] * freqs * (K1 + 1) / (freqs + K1 * (1 - B + B * dl[docs] / avgdl))
+        order = np.argsort(term_ids, kind="stable")
+        self.docs, self.weight = docs[order], weight[order]
+        self.offsets = np.concatenate(([0], np.cumsum(df)))
+
+    def __len__(self):
+        return len(self.parts)
+
+    def search(self, q: str, classes=None, v=None, budget=None, limit=20):
+        """(total, [(row, score)]) for the parts matching any term of q, best first
+        (ties in IRI order). classes: class IRIs, a part of any of them passes;
+        missing voltage bounds and prices never reject, as in the other endpoints."""
+        tids = sorted({self.vocab[t] for t in tokens(q) if t in self.vocab})
+        if not tids:
+            return 0, []
+        if len(tids) == 1:
+            t = tids[0]
+            docs, scores = self.docs[self.offsets[t]:self.offsets[t + 1]], self.weight[self.offsets[t]:self.offsets[t + 1]]
+        else:
+            # a term's postings hold each part once, so they add into a dense array
+            # directly (cheaper than sorting the union for common terms)
+            acc = np.zeros(len(self.parts))
+            for t in tids:
+                s = slice(self.offsets[t], self.offsets[t + 1])
+                acc[self.docs[s]] += self.weight[s]
+            docs = np.flatnonzero(acc)
+            scores = acc[docs]
+        keep = np.ones(len(docs), dtype=bool)
+        if classes:
+            keep &= np.any([self.class_mask[c][docs] for c in classes if c in self.class_mask] or
+                           [np.zeros(len(docs), dtype=bool)], axis=0)
+        if v is not None:
+            keep &= ~(v < self.vcc_min[docs]) & ~(v > self.vcc_max[docs])
+        if budget is not None:
+            keep &= ~(self.price[docs] > budget)
+        docs, scores = docs[keep], scores[keep]
+        if len(docs) > limit:
+            kth = -np.partition(-scores, limit - 1)[limit - 1]
+            top = scores >= kth
+            docs, scores = docs[top], scores[top]
+        order = np.lexsort((docs, -scores))[:limit]
+        return int(keep.sum()), list(zip(docs[order].tolist(), scores[order].tolist()))
+
+    def value(self, pred, r: int):
+        o = self.fields[pred].get(self.parts[r])
+        return None if o is None else str(o)
@@ -1,30 +1,26 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-import rdflib
 import os
+import re
+from rdflib.namespace import Namespace
+from rdflib.plugins.sparql import prepareQuery
+from kb_snapshot import load_graph
+from kb_cache import ResponseCache
+from kb_reload import KBState, KBWatcher, WATCH, admin_allowed
+from kb_search import SearchIndex
 
 app = Flask(__name__)
 CORS(app)  # Enable Cross-Origin Resource Sharing so web apps can call this
 
 # --- CONFIGURATION ---
 KB_FILE = "ontologies/iotkb_parts.ttl"  # The file you just generated
+SOSA = Namespace("http://www.w3.org/ns/sosa/")
+EX = Namespace("https://example.org/iotkb#")
 
-# --- LOAD KNOWLEDGE BASE ---
-print(f"Loading Knowledge Base from {KB_FILE}...")
-if not os.path.exists(KB_FILE):
-    print("Error: TTL file not found! Did you run csv2ttl_v3.py?")
-    exit(1)
-
-g = rdflib.Graph()
-try:
-    g.parse(KB_FILE, format="turtle")
-    print(f"Loaded {len(g)} triples successfully.")
-except Exception as e:
-    print(f"Error parsing TTL file: {e}")
-    exit(1)
-
-# --- SPARQL QUERY TEMPLATE ---
-# This query finds parts that match a category and (optionally) a capability
+# --- SPARQL QUERY PLANS ---
+# This query finds parts that match a category and (optionally) a capability.
+# The class is fixed per plan and the property IRI is passed as a binding (?prop),
+# so each plan is parsed/algebrized once at startup and never sees raw user input.
 QUERY_TEMPLATE = """
 PREFIX ex: <https://example.org/iotkb#>
 PREFIX sosa: <http://www.w3.org/ns/sosa/>
@@ -32,12 +28,9 @@ PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
 
 SELECT ?part ?label ?price ?currency ?manufacturer ?img
 WHERE {
-  ?part a ?type .
+  ?part a ex:%s .
   ?part rdfs:label ?label .
   
-  # Filter by Category (Class)
-  FILTER(?type = ex:%s)
-  
   # Optional: Filter by Property (e.g. "temperature")
   %s
   
@@ -51,6 +44,15 @@ ORDER BY ?price
 LIMIT 20
 """
 
+# Checks if the part observes OR acts on the bound property
+PROPERTY_PATTERN = """
+  {
+    { ?part sosa:observesProperty ?prop . }
+    UNION
+    { ?part sosa:actsOnProperty ?prop . }
+  }
+"""
+
 # Map user-friendly category names to Ontology Classes
 CLASS_MAP = {
     "sensor": "SensorPart",
@@ -61,6 +63,60 @@ CLASS_MAP = {
     "tooling": "Tooling"
 }
 
+# One compiled plan per (class, has-property) shape
+PLANS = {
+    (cls_name, has_prop): prepareQuery(QUERY_TEMPLATE % (cls_name, PROPERTY_PATTERN if has_prop else ""))
+    for cls_name in set(CLASS_MAP.values())
+    for has_prop in (False, True)
+}
+
+def norm_prop(name):
+    """Normalize a property name for lookup: case-insensitive, spaces/dashes as underscores."""
+    return re.sub(r"[\s\-]+", "_", (name or "").strip().lower())
+
+def build_property_table(graph):
+    """Map normalized local names of observed/actuated properties to their IRIs."""
+    table = {}
+    for pred in (SOSA.observesProperty, SOSA.actsOnProperty):
+        for obs in set(graph.objects(None, pred)):
+            table.setdefault(norm_prop(str(obs).split("#")[-1]), set()).add(obs)
+    return {k: sorted(v) for k, v in table.items()}
+
+def resolve_property(table, name):
+    """Every property IRI whose normalized local name contains the key; partial names
+    ("temp", "color" -> luminous_color) resolve as the old REGEX filter did."""
+    key = norm_prop(name)
+    return sorted({iri for k, iris in table.items() if key in k for iri in iris})
+
+def price_key(row):
+    # same order as ORDER BY ?price: unbound first, then ascending; ties by part IRI
+    return (row.price is not None, float(row.price) if row.price is not None else 0.0, str(row.part))
+
+def build_kb(paths, version):
+    graph = load_graph(paths)
+    # the full-text index for /search is built with the KB, off the request path
+    return KBState(graph, build_property_table(graph), version, "", 0.0, {"search": SearchIndex(graph)})
+
+# --- LOAD KNOWLEDGE BASE ---
+# The graph and its property table are rebuilt in the background when KB_FILE
+# changes and swapped in atomically (see kb_reload.py).
+print(f"Loading Knowledge Base from {KB_FILE}...")
+if not os.path.exists(KB_FILE):
+    print("Error: TTL file not found! Did you run csv2ttl_v3.py?")
+    exit(1)
+
+try:
+    KB = KBWatcher([KB_FILE], build_kb, on_swap=lambda kb: CACHE.reset(kb.version))
+    print(f"Loaded {len(KB.current.graph)} triples successfully.")
+except Exception as e:
+    print(f"Error parsing TTL file: {e}")
+    exit(1)
+
+# Responses are cached per KB version (content digest of the loaded TTL)
+CACHE = ResponseCache(version=KB.current.version)
+if WATCH:
+    KB.start()
+
 @app.route('/recommend', methods=['GET'])
 def recommend():
     """
@@ -72,29 +128,35 @@ def recommend():
     category = request.args.get('category', 'sensor').lower()
     prop_filter = request.args.get('property', '').lower()
     
+    kb = KB.current  # one consistent KB snapshot for the whole request
+
     # 1. Resolve Class Name
     cls_name = CLASS_MAP.get(category, "SensorPart")
     
-    # 2. Build Property Filter (if provided)
-    prop_query_part = ""
-    if prop_filter:
-        # This SPARQL fragment checks if the part observes OR acts on the property
-        prop_query_part = f"""
-        {{
-          {{ ?part sosa:observesProperty ?obs . FILTER(REGEX(STR(?obs), "{prop_filter}", "i")) }}
-          UNION
-          {{ ?part sosa:actsOnProperty ?act . FILTER(REGEX(STR(?act), "{prop_filter}", "i")) }}
-        }}
-        """
-
-    # 3. Construct Final Query
-    final_query = QUERY_TEMPLATE % (cls_name, prop_query_part)
-    
-    # 4. Execute
+    # Repeated (class, property) combinations come straight from the cache
+    key = (cls_name, norm_prop(prop_filter))
+    results = CACHE.get(key)
+    if results is not None:
+        return jsonify({
+            "query": {"category": category, "property": prop_filter},
+            "count": len(results),
+            "results": results
+        })
+
+    # 2. Resolve Property (if provided) through the lookup table
+    prop_iris = resolve_property(kb.index, prop_filter) if prop_filter else [None]
+
+    # 3. Execute the compiled plan with the property bound
+    plan = PLANS[(cls_name, bool(prop_filter))]
     results = []
     try:
-        qres = g.query(final_query)
-        for row in qres:
+        rows = []
+        for prop_iri in prop_iris:
+            bindings = {"prop": prop_iri} if prop_iri is not None else {}
+            rows.extend(kb.graph.query(plan, initBindings=bindings))
+        if len(prop_iris) > 1:
+            rows = sorted(rows, key=price_key)[:20]
+        for row in rows:
             part_data = {
                 "iri": str(row.part),
                 "name": str(row.label),
@@ -107,15 +169,84 @@ def recommend():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+    CACHE.put(key, results, version=kb.version)
     return jsonify({
         "query": {"category": category, "property": prop_filter},
         "count": len(results),
         "results": results
     })
 
+@app.route('/search', methods=['GET'])
+def search():
+    """
+    Endpoint: /search
+    Params:
+      - q: free text over label, MPN, manufacturer, kind and notes (required)
+      - category: sensor, actuator, controller, ... (optional; default: all)
+      - v: supply voltage the part must accept (optional)
+      - budget: max price (optional)
+      - limit: results to return (default: 20)
+    """
+    q = request.args.get('q', '').strip()
+    category = request.args.get('category', '').lower()
+    if not q:
+        return jsonify({"error": "q is required"}), 400
+    try:
+        v = float(request.args['v']) if request.args.get('v') else None
+        budget = float(request.args['budget']) if request.args.get('budget') else None
+        limit = max(1, min(int(request.args.get('limit', 20)), 200))
+    except ValueError:
+        return jsonify({"error": "v and budget must be numbers, limit an integer"}), 400
+    if category and category not in CLASS_MAP:
+        return jsonify({"error": f"unknown category {category!r}"}), 400
+
+    kb = KB.current
+    query = {"q": q, "category": category or None, "v": v, "budget": budget, "limit": limit}
+    key = ("search", q.lower(), category, v, budget, limit)
+    cached = CACHE.get(key)
+    if cached is not None:
+        return jsonify({"query": query, **cached})
+
+    index = kb.extra["search"]
+    classes = [EX[CLASS_MAP[category]]] if category else None
+    total, hits = index.search(q, classes, v, budget, limit)
+    results = []
+    for r, score in hits:
+        price = index.price[r]
+        results.append({
+            "iri": str(index.parts[r]),
+            "name": index.labels[r],
+            "manufacturer": index.value(EX.manufacturer, r) or "Unknown",
+            "price": None if price != price else float(price),
+            "currency": index.value(EX.priceCurrency, r),
+            "image_url": index.value(EX.productURL, r) or "",
+            "score": round(score, 4),
+        })
+    out = {"total": total, "count": len(results), "results": results}
+    CACHE.put(key, out, version=kb.version)
+    return jsonify({"query": query, **out})
+
 @app.route('/status', methods=['GET'])
 def status():
-    return jsonify({"status": "online", "triples": len(g)})
+    kb = KB.current
+    return jsonify({"status": "online", "triples": len(kb.graph), "kb_version": kb.version, "cache": CACHE.stats()})
+
+@app.route('/admin/kb', methods=['GET'])
+def admin_kb():
+    """Current KB version, when it was loaded and how long the load took."""
+    return jsonify(KB.status())
+
+@app.route('/admin/kb/reload', methods=['POST'])
+def admin_kb_reload():
+    """Forced rebuild: X-Admin-Token must match KB_ADMIN_TOKEN (localhost only when
+    unset), and forced reloads are throttled (see kb_reload.py)."""
+    if not admin_allowed(request.headers.get('X-Admin-Token'), request.remote_addr):
+        return jsonify({"error": "admin token required"}), 403
+    reloaded, retry_after = KB.force_reload()
+    if retry_after:
+        return jsonify({"error": f"reload forced too recently; retry in {retry_after}s"}), 429, \
+            {"Retry-After": str(int(retry_after + 1))}
+    return jsonify({"reloaded": reloaded, **KB.status()})
 
 if __name__ == '__main__':
     print("Starting IoT Knowledge Base Server on port 5000...")
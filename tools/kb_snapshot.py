@@ -0,0 +1,106 @@
+# filename: tools/kb_snapshot.py
+# Compiled snapshot cache for the KB: the first load parses the Turtle sources and
+# pickles the resulting rdflib Graph; later loads (every uvicorn worker, every CLI
+# call) unpickle it instead of re-parsing, as long as the sources are unchanged.
+#
+# A snapshot is keyed by the source paths and validated against each file's
+# mtime/size, falling back to a sha256 of the content when the mtime moved
+# (e.g. after a fresh checkout), so it is rebuilt automatically on real edits.
+# Set KB_CACHE_DIR to relocate the cache, or KB_SNAPSHOT=0 to always parse.
+import hashlib, json, os, pickle, sys, tempfile
+import rdflib
+from rdflib import Graph
+from rdflib.util import guess_format
+
+CACHE_DIR = os.environ.get("KB_CACHE_DIR", ".kb_cache")
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def sources_digest(paths) -> str:
+    """Content digest over all sources; used as the KB version stamp."""
+    h = hashlib.sha256()
+    for p in paths:
+        h.update(file_sha256(p).encode("ascii"))
+    return h.hexdigest()
+
+def source_info(path: str) -> dict:
+    st = os.stat(path)
+    return {"path": os.path.abspath(path), "mtime_ns": st.st_mtime_ns,
+            "size": st.st_size, "sha256": file_sha256(path)}
+
+def snapshot_key(paths) -> str:
+    # pickles are only valid for the same interpreter / rdflib pair
+    ident = "|".join([sys.version.split()[0], rdflib.__version__] + [os.path.abspath(p) for p in paths])
+    return hashlib.sha1(ident.encode("utf-8")).hexdigest()[:16]
+
+def parse_sources(paths) -> Graph:
+    g = Graph()
+    for p in paths:
+        g.parse(p, format=guess_format(p) or "turtle")
+    return g
+
+def _fresh(manifest: dict, paths) -> bool:
+    """True if every source still matches the manifest (cheap stat first, hash on mtime change)."""
+    recorded = manifest.get("sources", [])
+    if [s["path"] for s in recorded] != [os.path.abspath(p) for p in paths]:
+        return False
+    changed = False
+    for rec, p in zip(recorded, paths):
+        st = os.stat(p)
+        if st.st_mtime_ns == rec["mtime_ns"] and st.st_size == rec["size"]:
+            continue
+        if st.st_size != rec["size"] or file_sha256(p) != rec["sha256"]:
+            return False
+        rec["mtime_ns"] = st.st_mtime_ns  # touched but identical content
+        changed = True
+    manifest["_touched"] = changed
+    return True
+
+def _atomic_write(path: str, data: bytes):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+def load_graph(paths, cache_dir: str = None) -> Graph:
+    """Load the given RDF files into one Graph, going through the snapshot cache."""
+    paths = list(paths)
+    if os.environ.get("KB_SNAPSHOT", "1") == "0":
+        return parse_sources(paths)
+
+    cache_dir = cache_dir or CACHE_DIR
+    key = snapshot_key(paths)
+    man_path = os.path.join(cache_dir, key + ".json")
+    pkl_path = os.path.join(cache_dir, key + ".pkl")
+
+    try:
+        with open(man_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        if _fresh(manifest, paths):
+            with open(pkl_path, "rb") as f:
+                g = pickle.load(f)
+            if manifest.pop("_touched", False):
+                _atomic_write(man_path, json.dumps(manifest, indent=1).encode("utf-8"))
+            return g
+    except (OSError, ValueError, KeyError, pickle.UnpicklingError, EOFError):
+        pass  # missing or unreadable snapshot -> rebuild
+
+    sources = [source_info(p) for p in paths]
+    g = parse_sources(paths)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        _atomic_write(pkl_path, pickle.dumps(g, protocol=pickle.HIGHEST_PROTOCOL))
+        _atomic_write(man_path, json.dumps({"sources": sources, "triples": len(g)}, indent=1).encode("utf-8"))
+    except OSError as e:
+        print(f"Warning: could not write KB snapshot to {cache_dir}: {e}", file=sys.stderr)
+    return g
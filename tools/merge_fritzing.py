@@ -3,53 +3,35 @@
 #   python3 tools/merge_fritzing.py \
 #       --seed /path/to/iotkb_seed.csv \
 #       --fritzing /path/to/fritzing_import.csv \
-#       --out /path/to/iotkb_seed_merged.csv
+#       --out /path/to/iotkb_seed_merged.csv \
+#       [--delta /path/to/fritzing_delta.csv]   # incremental, see merge_incremental
 
-import argparse, re
+import argparse, hashlib, json, os, re
+import numpy as np
 import pandas as pd
 from typing import Optional
+from classify import match_many, ruleset
 
 def s(x: Optional[str]) -> str:
     if pd.isna(x): return ""
     return str(x).strip()
 
+# category/kind rules live in classification_rules.json ("fritzing_category", "fritzing_kind")
+CATEGORY_RULES = ruleset("fritzing_category")
+KIND_RULES = ruleset("fritzing_kind")
+
+def category_text(name: str, tags: str, family: str, props: str) -> str:
+    return " ".join([s(name), s(tags), s(family), s(props)]).lower()
+
+def kind_text(name: str, tags: str) -> str:
+    return (s(name) + " " + s(tags)).lower()
+
 def infer_category(name: str, tags: str, family: str, props: str) -> str:
-    text = " ".join([s(name), s(tags), s(family), s(props)]).lower()
-    # sensors
-    if any(k in text for k in ["sensor", "pir", "ultrasonic", "ldr", "rtc", "temperature", "humidity", "co2", "tvoc", "mq-"]):
-        return "Sensor"
-    # actuators
-    if any(k in text for k in ["motor", "servo", "stepper", "relay", "buzzer", "solenoid", "pump"]):
-        return "Actuator"
-    # controllers
-    if any(k in text for k in ["arduino", "esp32", "esp8266", "microcontroller", "stm32", "nano", "mega", "uno", "mcu", "dev board", "development board"]):
-        return "Controller"
-    # power
-    if any(k in text for k in ["power supply", "adapter", "battery", "psu", "buck", "boost", "charger", "dc-dc"]):
-        return "PowerSupply"
-    # mechanical
-    if any(k in text for k in ["gear", "shaft", "hinge", "bracket", "pulley", "bearing", "panel", "enclosure", "chassis", "screw"]):
-        return "Mechanical"
-    # tooling and misc
-    if any(k in text for k in ["solder", "breadboard", "wire", "jumper", "kit", "glue", "tape", "heatshrink", "crimp", "tool", "resistor", "capacitor", "led"]):
-        return "Tool"
-    return "Tool"
+    return CATEGORY_RULES.classify([category_text(name, tags, family, props)])[0]["category"]
 
 def infer_kind(name: str, tags: str) -> str:
-    t = (s(name) + " " + s(tags)).lower()
     # “kind” is a lightweight hint for downstream filters; keep it coarse
-    if "pir" in t or "ultrasonic" in t or "hc-sr04" in t or "ldr" in t or "photoresistor" in t or "mq-" in t \
-       or "gas" in t or "temperature" in t or "humidity" in t or "reed" in t or "limit switch" in t:
-        return "sensor"
-    if "relay" in t or "servo" in t or "stepper" in t or "dc motor" in t or "buzzer" in t or "pump" in t:
-        return "actuator"
-    if any(k in t for k in ["arduino", "esp32", "esp8266", "stm32", "microcontroller", "dev board", "uno", "nano", "mega"]):
-        return "controller"
-    if any(k in t for k in ["adapter", "battery", "buck", "boost", "psu", "dc-dc"]):
-        return "power"
-    if "breadboard" in t or "wire" in t or "jumper" in t or "solder" in t:
-        return "helper"
-    return ""
+    return KIND_RULES.classify([kind_text(name, tags)])[0]["kind"]
 
 def infer_iface(text: str) -> str:
     t = s(text).lower()
@@ -86,92 +68,195 @@ def guess_col(df, candidates, default=None):
                 return c
     return default
 
+def fritzing_columns(fritz) -> dict:
+    # Guess Fritzing columns (robust to different dumps)
+    return dict(
+        name_col = guess_col(fritz, ["title","name","label","displayname","part"], fritz.columns[0]),
+        manu_col = guess_col(fritz, ["manuf","vendor","brand"]),
+        mpn_col  = guess_col(fritz, ["mpn","sku","partnumber","p/n","pn","part no"]),
+        tags_col = guess_col(fritz, ["tag"]),
+        fam_col  = guess_col(fritz, ["family"]),
+        desc_col = guess_col(fritz, ["propert","description","details","notes"]),
+        url_col  = guess_col(fritz, ["url","link","product","store"]),
+        data_col = guess_col(fritz, ["datasheet","spec"]),
+        volt_col = guess_col(fritz, ["volt","supply","vcc","power"]),
+        iface_col= guess_col(fritz, ["iface","interface","io","pins"]),
+    )
+
+def col_s(ser) -> pd.Series:
+    """s() over a whole column."""
+    return ser.astype(object).where(ser.notna(), "").astype(str).str.strip()
+
+def infer_iface_col(text) -> pd.Series:
+    """infer_iface() over a whole column: one substring test per token and column,
+    the token combination looked up from a table."""
+    t = text.str.lower()
+    has = lambda w: t.str.contains(w, regex=False).to_numpy()
+    masks = {
+        "I2C": has("i2c"),
+        "SPI": has("spi"),
+        "UART": has("uart") | has("serial"),
+        "ADC": has("analog") | has("adc"),
+        "GPIO": has("gpio") | has("digital"),
+        "GPIO_TRIGGER_ECHO": has("trigger") & has("echo"),
+    }
+    names = sorted(masks)
+    code = sum(masks[n].astype(np.int64) << i for i, n in enumerate(names))
+    table = np.array(["|".join(n for i, n in enumerate(names) if c >> i & 1) for c in range(1 << len(names))],
+                     dtype=object)
+    return pd.Series(table[code], index=text.index, dtype=object)
+
+def parse_voltage_col(text):
+    """parse_voltage() over a whole column: (vmin, vmax) Series of str(float) or ""."""
+    vmin = pd.Series("", index=text.index, dtype=object)
+    vmax = vmin.copy()
+    found = text.str.extractall(r"(\d+(?:\.\d+)?)\s*V", flags=re.I)
+    if len(found):
+        g = found[0].astype(float).groupby(level=0)
+        lo, hi = g.min(), g.max()
+        vmin[lo.index] = [str(v) for v in lo.tolist()]
+        vmax[hi.index] = [str(v) for v in hi.tolist()]
+    return vmin, vmax
+
+def normalize_fritzing(fritz, seed_cols, cols) -> pd.DataFrame:
+    """Fritzing rows mapped into the seed schema (exact seed column order), computed
+    column by column."""
+    empty = pd.Series("", index=fritz.index, dtype=object)
+    get = lambda k: col_s(fritz[cols[k]]) if cols[k] else empty
+    name, manu, mpn, tags = get("name_col"), get("manu_col"), get("mpn_col"), get("tags_col")
+    fam, desc, url, durl = get("fam_col"), get("desc_col"), get("url_col"), get("data_col")
+    volt, iface = get("volt_col"), get("iface_col")
+
+    vmin, vmax = parse_voltage_col(volt + " " + desc + " " + tags + " " + fam + " " + name)
+    # kind_text is the start of category_text: one scan classifies both
+    kind_texts = (name + " " + tags).str.lower()
+    cat_texts = kind_texts + (" " + fam + " " + desc).str.lower()
+    cat_ids, kind_ids = match_many([CATEGORY_RULES, KIND_RULES], cat_texts.tolist(),
+                                   [None, kind_texts.str.len().to_numpy()])
+
+    values = {
+        "manufacturer": manu,
+        "mpn": mpn,
+        "part_label": name.where(name != "", mpn.where(mpn != "", "Fritzing Part")),
+        "category": [c["category"] for c in CATEGORY_RULES.outputs_of(cat_ids)],
+        "kind": [k["kind"] for k in KIND_RULES.outputs_of(kind_ids)],
+        "vcc_min": vmin,
+        "vcc_max": vmax,
+        "iface": infer_iface_col(iface + " " + tags + " " + desc),
+        "datasheet_url": durl,
+        "product_url": url,
+        "notes": "imported_from_fritzing",
+    }
+    # enforce exact seed column order; every other seed column stays empty
+    out = pd.DataFrame({c: values.get(c, "") for c in seed_cols}, index=fritz.index)
+    return out.reset_index(drop=True)
+
+def row_keys(df) -> pd.Series:
+    """norm_key for every row, column-wise, as one string per row (the label part
+    is [a-z0-9] only, so the separator cannot collide)."""
+    col = lambda c: col_s(df[c]) if c in df.columns else pd.Series("", index=df.index, dtype=object)
+    pl = col("part_label").str.lower().str.replace(r"[^a-z0-9]+", "", regex=True)
+    return pl + "\x1f" + col("manufacturer").str.lower() + "|" + col("mpn").str.lower()
+
+def merge_full(seed, fritz_norm) -> pd.DataFrame:
+    """Seed and Fritzing rows, one per norm_key: seed rows come first, so keeping the
+    first row of every key lets the seed win, then the first Fritzing row. Hash-based
+    (duplicated), so rows keep their input order instead of being sorted by key."""
+    merged = pd.concat([seed, fritz_norm], ignore_index=True)
+    return merged[~row_keys(merged).duplicated(keep="first").to_numpy()]
+
+def merge(seed, fritz) -> pd.DataFrame:
+    """The full merge of main(): seed plus the normalized Fritzing rows."""
+    return merge_full(seed, normalize_fritzing(fritz, list(seed.columns), fritzing_columns(fritz)))
+
+# --- incremental merge ---
+# Applies a delta CSV from `import_fritzing_zip.py --delta` to the previous output:
+# only the keys touched by the delta's rows (old and new versions) are re-decided,
+# from the seed (which wins) or the first current Fritzing row with that key; every
+# other merged row is carried over as it was written. Needs the same seed as the
+# previous run (checked against the state file next to --out), else merges in full.
+# The state file is only written by --delta runs, so the first one merges in full
+# (give it the delta of a full import, every row an 'add').
+
+DELTA_COLUMNS = ["_op", "_member"]   # import_fritzing_zip.DELTA_COLUMNS
+STATE_VERSION = 2   # 2: rows in input order (hash dedup), no longer sorted by key
+
+def state_path(out_csv):
+    return os.path.splitext(out_csv)[0] + ".state.json"
+
+def file_sha256(path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def merge_incremental(seed, fritz, delta, base, seed_cols):
+    """merge_full() of seed + fritz, rebuilt from the previous output base (read as
+    str) and only re-normalizing the rows of keys the delta touched. None if base
+    does not line up with the current rows."""
+    cols = fritzing_columns(fritz)
+    seed_keys = set(row_keys(seed))
+    touched = set(row_keys(normalize_fritzing(delta, seed_cols, cols))) - seed_keys
+
+    # key of every current Fritzing row, without normalizing it
+    empty = pd.Series("", index=fritz.index, dtype=object)
+    name, manu, mpn = (col_s(fritz[cols[c]]) if cols[c] else empty for c in ("name_col", "manu_col", "mpn_col"))
+    label = name.where(name != "", mpn.where(mpn != "", "Fritzing Part"))
+    fkeys = row_keys(pd.DataFrame({"part_label": label, "manufacturer": manu, "mpn": mpn}))
+    first = fkeys[~fkeys.duplicated() & ~fkeys.isin(seed_keys)]   # surviving Fritzing keys, in order
+
+    win = first[first.isin(touched)]
+    winners = normalize_fritzing(fritz.loc[win.index], seed_cols, cols).astype(str)
+    bkeys = row_keys(base)
+    is_seed = bkeys.isin(seed_keys).to_numpy()
+    pos = pd.Series(np.arange(len(base)), index=bkeys.to_numpy())[~is_seed]
+    pos = pd.concat([pos, pd.Series(np.arange(len(winners)) + len(base), index=win.to_numpy())])
+    if not first.isin(pos.index).all():
+        return None
+    order = np.concatenate([np.flatnonzero(is_seed), pos[~pos.index.duplicated(keep="last")].reindex(first).to_numpy()])
+    return pd.concat([base, winners], ignore_index=True).iloc[order]
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--seed", required=True)
     ap.add_argument("--fritzing", required=True)
     ap.add_argument("--out", required=True)
+    ap.add_argument("--delta", help="apply this import_fritzing_zip.py --delta CSV to the previous --out "
+                                    "instead of merging everything")
     args = ap.parse_args()
 
     seed = pd.read_csv(args.seed)
     seed_cols = list(seed.columns)
     fritz = pd.read_csv(args.fritzing)
 
-    # Guess Fritzing columns (robust to different dumps)
-    name_col = guess_col(fritz, ["title","name","label","displayname","part"], fritz.columns[0])
-    manu_col = guess_col(fritz, ["manuf","vendor","brand"])
-    mpn_col  = guess_col(fritz, ["mpn","sku","partnumber","p/n","pn","part no"])
-    tags_col = guess_col(fritz, ["tag"])
-    fam_col  = guess_col(fritz, ["family"])
-    desc_col = guess_col(fritz, ["propert","description","details","notes"])
-    url_col  = guess_col(fritz, ["url","link","product","store"])
-    data_col = guess_col(fritz, ["datasheet","spec"])
-    volt_col = guess_col(fritz, ["volt","supply","vcc","power"])
-    iface_col= guess_col(fritz, ["iface","interface","io","pins"])
-
-    # Normalize Fritzing rows into seed schema
-    out_rows = []
-    for _, r in fritz.iterrows():
-        name = s(r.get(name_col, ""))
-        manu = s(r.get(manu_col, "")) if manu_col else ""
-        mpn  = s(r.get(mpn_col, "")) if mpn_col else ""
-        tags = s(r.get(tags_col, "")) if tags_col else ""
-        fam  = s(r.get(fam_col, "")) if fam_col else ""
-        desc = s(r.get(desc_col, "")) if desc_col else ""
-        url  = s(r.get(url_col, "")) if url_col else ""
-        durl = s(r.get(data_col, "")) if data_col else ""
-        vtxt = " ".join([s(r.get(volt_col,"")), desc, tags, fam, name])
-        vmin, vmax = parse_voltage(vtxt)
-        iface_guess = infer_iface(" ".join([s(r.get(iface_col,"")), tags, desc]))
-        category = infer_category(name, tags, fam, desc)
-        kind = infer_kind(name, tags)
-
-        rec = {col: "" for col in seed_cols}
-        rec.update({
-            "manufacturer": manu,
-            "mpn": mpn,
-            "part_label": name if name else (mpn or "Fritzing Part"),
-            "category": category,
-            "kind": kind,
-            "observed_property": "",
-            "actuatable_property": "",
-            "feature_of_interest": "",
-            "vcc_min": vmin,
-            "vcc_max": vmax,
-            "i_active_mA": "",
-            "i_idle_uA": "",
-            "iface": iface_guess,
-            "i2c_addr_default": "",
-            "i2c_addr_range": "",
-            "spi_max_mhz": "",
-            "uart_baud": "",
-            "sample_rate_max_hz": "",
-            "latency_ms": "",
-            "accuracy_pct": "",
-            "range_min": "",
-            "range_max": "",
-            "units": "",
-            "datasheet_url": durl,
-            "product_url": url,
-            "offer_price": "",
-            "currency": "",
-            "lifecycle": "",
-            "notes": "imported_from_fritzing"
-        })
-        out_rows.append(rec)
-
-    fritz_norm = pd.DataFrame(out_rows)
-    # enforce exact seed column order
-    fritz_norm = fritz_norm[seed_cols]
-
-    merged = pd.concat([seed, fritz_norm], ignore_index=True)
-    merged["_k"] = merged.apply(norm_key, axis=1)
-    merged["_is_seed"] = False
-    merged.loc[:len(seed)-1, "_is_seed"] = True
-    merged = merged.sort_values(by=["_k","_is_seed"], ascending=[True, False])
-    merged = merged.drop_duplicates(subset=["_k"], keep="first").drop(columns=["_k","_is_seed"])
+    seed_sha = file_sha256(args.seed)
+    state, delta = {}, None
+    if args.delta:
+        delta = pd.read_csv(args.delta)
+        missing = [c for c in DELTA_COLUMNS if c not in delta.columns]
+        if missing:
+            raise SystemExit(f"{args.delta} is not an import_fritzing_zip.py --delta CSV "
+                             f"(missing {', '.join(missing)})")
+        delta = delta.drop(columns=DELTA_COLUMNS)
+        if os.path.exists(args.out) and os.path.exists(state_path(args.out)):
+            with open(state_path(args.out)) as f:
+                state = json.load(f)
+    merged = None
+    if state.get("seed_sha256") == seed_sha and state.get("version") == STATE_VERSION:
+        base = pd.read_csv(args.out, dtype=str, keep_default_na=False)
+        merged = merge_incremental(seed, fritz, delta, base, seed_cols)
+        if merged is not None:
+            print("incremental: applied", len(delta), "delta rows")
+    if merged is None:
+        if args.delta:
+            print("incremental: no usable previous merge with this seed, merging in full")
+        merged = merge(seed, fritz)
 
     merged.to_csv(args.out, index=False)
+    if args.delta:
+        with open(state_path(args.out), "w") as f:
+            json.dump({"version": STATE_VERSION, "seed_sha256": seed_sha}, f)
 
     # Simple stats
     print("OK")
@@ -182,4 +267,4 @@ def main():
     print("output:", args.out)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
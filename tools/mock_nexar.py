@@ -0,0 +1,135 @@
+# filename: tools/mock_nexar.py
+# usage:    python3 tools/mock_nexar.py [--port 8765] [--latency 0.05] [--fail-rate 0.1]
+#                   [--replay responses.json | --record responses.json --upstream URL]
+#           NEXAR_URL=http://127.0.0.1:8765/graphql python3 tools/fetch_prices_token.py
+# Local stand-in for the Nexar GraphQL endpoint, answering the supSearchMpn queries that
+# fetch_prices_token.py sends, single or as aliased batches (m0: supSearchMpn(q: $m0)
+# ...). Offers are derived from a hash of the MPN, so every run sees the same prices;
+# roughly one MPN in seven has no match. --latency adds a delay per request and
+# --fail-rate answers that fraction with 429/503 to exercise retries.
+#
+# --record forwards every MPN to --upstream (e.g. the real API, with NEXAR_TOKEN set)
+# one query at a time and saves {mpn: supSearchMpn result} to the file on exit;
+# --replay answers from such a file (MPNs not in it get no results).
+import argparse, hashlib, json, os, random, re, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SELLERS = ["Digi-Key", "Mouser", "LCSC", "Farnell"]
+
+def offers_for(mpn: str) -> list:
+    """Search results for an MPN: [] or one part with a few sellers and price breaks."""
+    h = hashlib.sha256(mpn.encode("utf-8")).digest()
+    if h[0] % 7 == 0:
+        return []
+    sellers = []
+    for i in range(1 + h[1] % 3):
+        base = round(0.5 + (h[2 + i] * 256 + h[6 + i]) / 1000, 2)
+        sellers.append({
+            "company": {"name": SELLERS[(h[10] + i) % len(SELLERS)]},
+            "offers": [{"prices": [
+                {"price": base, "currency": "USD", "quantity": 1},
+                {"price": round(base * 0.8, 2), "currency": "USD", "quantity": 10},
+                {"price": round(base * 0.6, 2), "currency": "USD", "quantity": 100},
+            ]}],
+        })
+    return [{"part": {"mpn": mpn, "shortDescription": f"Mock part {mpn}", "sellers": sellers}}]
+
+# "alias: supSearchMpn(q: $var" or plain "supSearchMpn(q: $var"
+SEARCH = re.compile(r"(?:(\w+)\s*:\s*)?supSearchMpn\s*\(\s*q\s*:\s*\$(\w+)")
+
+def searches(query: str) -> list:
+    """(response key, variable name) for every supSearchMpn in a query document."""
+    return [(alias or "supSearchMpn", var) for alias, var in SEARCH.findall(query or "")]
+
+def recorded(path: str, upstream: str = None, record: bool = False):
+    """Results lookup for --replay/--record: mpn -> supSearchMpn result."""
+    book = {}
+    if path and os.path.exists(path) and not record:
+        with open(path, encoding="utf-8") as f:
+            book = json.load(f)
+    if not record:
+        return lambda mpn: book.get(mpn, {"results": []})
+    from fetch_prices_token import QUERY, make_session
+    session = make_session(1)
+    lock = threading.Lock()
+    def lookup(mpn):
+        with lock:
+            if mpn not in book:
+                r = session.post(upstream, json={"query": QUERY, "variables": {"mpn": mpn}}, timeout=30)
+                r.raise_for_status()
+                book[mpn] = r.json()["data"]["supSearchMpn"]
+            return book[mpn]
+    lookup.book = book
+    return lookup
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive, so pooled clients reuse connections
+
+    def do_POST(self):
+        srv = self.server
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        with srv.lock:
+            srv.requests += 1
+        if srv.latency:
+            time.sleep(srv.latency)
+        if srv.fail_rate and srv.rng.random() < srv.fail_rate:
+            if srv.rng.random() < 0.5:
+                return self.reply(429, {"errors": [{"message": "rate limited"}]}, {"Retry-After": "0"})
+            return self.reply(503, {"errors": [{"message": "unavailable"}]})
+        variables = body.get("variables") or {}
+        try:
+            data = {key: srv.lookup(variables.get(var, "")) for key, var in searches(body.get("query"))}
+        except Exception as e:   # upstream failure while recording
+            return self.reply(502, {"errors": [{"message": str(e)}]})
+        self.reply(200, {"data": data})
+
+    def reply(self, status: int, payload: dict, headers: dict = None):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+def serve(port: int = 0, latency: float = 0.0, fail_rate: float = 0.0, seed: int = 0, lookup=None):
+    """Starts the mock in a daemon thread; returns (server, graphql_url).
+    lookup(mpn) -> supSearchMpn result defaults to the hashed offers (see recorded()).
+    server.requests counts the POSTs received; call server.shutdown() to stop."""
+    srv = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    srv.daemon_threads = True
+    srv.lookup = lookup or (lambda mpn: {"results": offers_for(mpn)})
+    srv.latency, srv.fail_rate = latency, fail_rate
+    srv.rng, srv.lock, srv.requests = random.Random(seed), threading.Lock(), 0
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv, f"http://127.0.0.1:{srv.server_address[1]}/graphql"
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--latency", type=float, default=0.05, help="seconds added to every request")
+    ap.add_argument("--fail-rate", type=float, default=0.0, help="fraction of requests answered 429/503")
+    ap.add_argument("--replay", help="answer from recorded responses")
+    ap.add_argument("--record", help="save responses fetched from --upstream here")
+    ap.add_argument("--upstream", default="https://api.nexar.com/graphql")
+    args = ap.parse_args()
+    lookup = recorded(args.record, args.upstream, record=True) if args.record \
+             else recorded(args.replay) if args.replay else None
+    srv, url = serve(args.port, args.latency, args.fail_rate, lookup=lookup)
+    print(f"mock Nexar GraphQL on {url} (Ctrl-C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        srv.shutdown()
+    if args.record:
+        with open(args.record, "w", encoding="utf-8") as f:
+            json.dump(lookup.book, f, indent=1, sort_keys=True)
+        print(f"recorded {len(lookup.book)} MPNs to {args.record}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+# filename: tools/part_table.py
+# Columnar part table for the CLI recommender (tools/recommend.py).
+# The graph is walked once: numeric specs become float64 columns (NaN = missing)
+# and interfaces / capabilities / classes become uint64 bitmasks, so voltage,
+# budget, capability and interface filters are plain NumPy mask operations.
+import numpy as np
+from rdflib import Graph, Namespace, URIRef, Literal
+from rdflib.namespace import RDF, RDFS, XSD
+
+from i2c_addr import parse_addrs, split, join
+
+EX   = Namespace("https://example.org/iotkb#")
+SOSA = Namespace("http://www.w3.org/ns/sosa/")
+
+NUMERIC_TYPES = (XSD.decimal, XSD.double, XSD.float, XSD.integer)
+
+def decimal_val(g: Graph, s: URIRef, p: URIRef):
+    for o in g.objects(s, p):
+        try:
+            if isinstance(o, Literal) and o.datatype in NUMERIC_TYPES:
+                return float(o)
+            # also accept plain literal with numeric string
+            return float(str(o))
+        except Exception:
+            continue
+    return None
+
+def label_of(g: Graph, s: URIRef):
+    for o in g.objects(s, RDFS.label):
+        return str(o)
+    # fallback to local fragment
+    iri = str(s)
+    return iri.split("#")[-1]
+
+def first_str(g: Graph, s: URIRef, p: URIRef):
+    for o in g.objects(s, p):
+        return str(o)
+    return None
+
+class Vocab:
+    """Interns tokens to bit positions and packs token sets into uint64 words."""
+
+    def __init__(self):
+        self.ids = {}
+
+    def add(self, tok) -> int:
+        return self.ids.setdefault(tok, len(self.ids))
+
+    @property
+    def words(self) -> int:
+        return max(1, (len(self.ids) + 63) // 64)
+
+    def pack(self, rows) -> np.ndarray:
+        """rows: list of lists of token ids -> (n, words) uint64 bitmask matrix."""
+        m = np.zeros((len(rows), self.words), dtype=np.uint64)
+        for r, ids in enumerate(rows):
+            for i in ids:
+                m[r, i >> 6] |= np.uint64(1) << np.uint64(i & 63)
+        return m
+
+    def mask(self, toks) -> np.ndarray:
+        """Single-row query mask; unknown tokens are ignored."""
+        m = np.zeros(self.words, dtype=np.uint64)
+        for t in toks:
+            i = self.ids.get(t)
+            if i is not None:
+                m[i >> 6] |= np.uint64(1) << np.uint64(i & 63)
+        return m
+
+class PartTable:
+    def __init__(self, g: Graph):
+        # row order per class follows g.subjects(RDF.type, cls), as the loop-based CLI did,
+        # so ties in the final (price, label) sort come out the same
+        self.class_rows = {}
+        row_of = {}
+        for c in sorted(set(g.objects(None, RDF.type)), key=str):
+            rows = []
+            for s in g.subjects(RDF.type, c):
+                rows.append(row_of.setdefault(s, len(row_of)))
+            self.class_rows[c] = np.array(rows, dtype=np.int64)
+        self.parts = sorted(row_of, key=row_of.get)
+        self.row_of = {str(s): r for s, r in row_of.items()}
+
+        self.ifaces, self.caps = Vocab(), Vocab()
+        iface_ids, obs_ids, act_ids, supports_ids, need_ids = [], [], [], [], []
+        self.labels, self.currency, self.url = [], [], []
+        self.mpn, self.kind, self.notes = [], [], []
+        vmin, vmax, price, logic, i_active, i_idle = [], [], [], [], [], []
+        i2c = []
+        for s in self.parts:
+            self.labels.append(label_of(g, s))
+            self.currency.append(first_str(g, s, EX.priceCurrency))
+            self.url.append(first_str(g, s, EX.productURL))
+            self.mpn.append(first_str(g, s, EX.mpn))
+            self.kind.append(first_str(g, s, EX.partKind))
+            self.notes.append(first_str(g, s, EX.notes))
+            vmin.append(decimal_val(g, s, EX.vccMin))
+            vmax.append(decimal_val(g, s, EX.vccMax))
+            price.append(decimal_val(g, s, EX.offerPrice))
+            logic.append(decimal_val(g, s, EX.logicLevel))
+            i_active.append(decimal_val(g, s, EX.iActive_mA))
+            i_idle.append(decimal_val(g, s, EX.iIdle_uA))
+            i2c.append(split(parse_addrs(" ".join(str(o) for p in (EX.i2cAddrDefault, EX.i2cAddrRange)
+                                                  for o in g.objects(s, p)))))
+            iface_ids.append([self.ifaces.add(label_of(g, i).strip()) for i in g.objects(s, EX.hasInterface)])
+            obs_ids.append([self.caps.add(p) for p in g.objects(s, EX.observesProperty)])
+            act_ids.append([self.caps.add(p) for p in g.objects(s, EX.actsOnProperty)])
+            supports_ids.append([self.ifaces.add(label_of(g, i).strip()) for i in g.objects(s, EX.supportsInterface)])
+            # what the part can fill in a BOM, under the ex: or the sosa: predicates
+            need_ids.append([self.caps.add(p) for pred in (EX.observesProperty, EX.actsOnProperty,
+                                                           SOSA.observesProperty, SOSA.actsOnProperty)
+                             for p in g.objects(s, pred)])
+
+        nan = lambda xs: np.array([np.nan if x is None else x for x in xs], dtype=np.float64)
+        self.vcc_min, self.vcc_max, self.price, self.logic = nan(vmin), nan(vmax), nan(price), nan(logic)
+        self.i_active, self.i_idle = nan(i_active), nan(i_idle)   # mA, uA
+        # reachable I2C addresses, 128 bits as (low, high) words; 0 = none known
+        self.i2c_bits = np.array(i2c, dtype=np.uint64).reshape(-1, 2)
+        self.iface_bits = self.ifaces.pack(iface_ids)
+        self.supports_bits = self.ifaces.pack(supports_ids)
+        self.obs_bits = self.caps.pack(obs_ids)
+        self.act_bits = self.caps.pack(act_ids)
+        self.need_bits = self.caps.pack(need_ids)
+
+    def __len__(self):
+        return len(self.parts)
+
+    def rows_of_class(self, cls: URIRef) -> np.ndarray:
+        return self.class_rows.get(cls, np.zeros(0, dtype=np.int64))
+
+    def select(self, cls: URIRef, cap_pred=None, cap_ind=None, iface_required=(), v=None, budget=None) -> np.ndarray:
+        """Row ids of cls passing all filters, in class order."""
+        rows = self.rows_of_class(cls)
+        keep = np.ones(len(rows), dtype=bool)
+        if cap_pred is not None and cap_ind is not None:
+            bits = self.obs_bits if cap_pred == EX.observesProperty else self.act_bits
+            keep &= (bits[rows] & self.caps.mask([cap_ind])).any(axis=1)
+        if iface_required:
+            # any required token among the part's interfaces (parts without interfaces never match)
+            keep &= (self.iface_bits[rows] & self.ifaces.mask(iface_required)).any(axis=1)
+        if v is not None:
+            # NaN compares False, so missing bounds never reject
+            keep &= ~(v < self.vcc_min[rows]) & ~(v > self.vcc_max[rows])
+        if budget is not None:
+            p = self.price[rows]
+            keep &= np.isnan(p) | (p <= budget)
+        return rows[keep]
+
+    def i2c_mask(self, r: int) -> int:
+        return join(*self.i2c_bits[r])
+
+    def value(self, col: np.ndarray, r: int):
+        x = col[r]
+        return None if np.isnan(x) else float(x)
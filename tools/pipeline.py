@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# usage:
+#   python3 tools/pipeline.py \
+#       [--seed data-entry/iotkb_seed.csv] [--fritzing data-entry/fritzing_import.csv] \
+#       [--ttl iotkb_catalog.ttl] [--out data-entry/iotkb_priced.csv] \
+#       [--skip prices] [--dedup] [--keep-csv DIR [--keep-stages merge,filter]] \
+#       [--shacl-report iotkb_catalog.shacl.json] [--strict]
+#
+# A catalog refresh in one process. The chain used to be a run of scripts, each one
+# re-reading and re-writing a CSV under data-entry/:
+#   apply_category_kind_mapping -> merge_fritzing -> auto_categorize ->
+#   generate_standard_parts -> filter_smart_parts -> fetch_prices_token ->
+#   repair_and_enrich -> csv2ttl_v3
+# Here the seed and the Fritzing import are read once and the catalog is handed from
+# stage to stage as a DataFrame, through the same functions the scripts' main()s
+# call. Intermediate CSVs are written only with --keep-csv (all stages, or the ones
+# in --keep-stages); --out writes the final catalog. Every stage is timed and its
+# row counts reported. The last stage checks the Turtle against tools/shapes.shacl.ttl
+# (shacl_validate.py), re-checking only the parts whose Turtle changed since the last
+# run, and writes the report; --strict fails the run when it does not conform.
+
+import argparse, os, sys, time
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data-entry'))
+import apply_category_kind_mapping
+import auto_categorize
+import csv2ttl_v3
+import dedup_fuzzy
+import fetch_prices_token
+import filter_smart_parts
+import generate_standard_parts
+import merge_fritzing
+import repair_and_enrich
+import shacl_validate
+
+SEED_CSV = 'data-entry/iotkb_seed.csv'
+FRITZING_CSV = 'data-entry/fritzing_import.csv'
+TTL_OUT = 'iotkb_catalog.ttl'
+
+# --- stages: fn(df, args) -> df, run in this order ---
+
+def stage_map(df, args):
+    apply_category_kind_mapping.apply_mapping(df)
+    return df
+
+def stage_merge(df, args):
+    return merge_fritzing.merge(df, pd.read_csv(args.fritzing))
+
+def stage_dedup(df, args):
+    out, _ = dedup_fuzzy.find_duplicates(df, jobs=args.jobs)
+    return df[out['is_canonical'].to_numpy()]
+
+def stage_categorize(df, args):
+    return auto_categorize.refine(df)
+
+def stage_standard(df, args):
+    return generate_standard_parts.add_standard_parts(df)[0]
+
+def stage_filter(df, args):
+    return filter_smart_parts.filter_smart(df)
+
+def stage_prices(df, args):
+    cache = fetch_prices_token.PriceCache(args.price_cache, fetch_prices_token.CACHE_TTL) if args.price_cache else None
+    try:
+        fetch_prices_token.price_frame(df, cache=cache, log=lambda *a: None)
+    finally:
+        if cache is not None:
+            cache.close()
+    return df
+
+def stage_enrich(df, args):
+    repair_and_enrich.repair(df)
+    return df
+
+def stage_ttl(df, args):
+    csv2ttl_v3.frame_to_ttl(df, args.ttl)
+    return df
+
+def stage_validate(df, args):
+    report_file = args.shacl_report or shacl_validate.report_path(args.ttl)
+    report = shacl_validate.run(args.ttl, report_file)
+    print(f"shacl: {report['mode']}, {report['checked']} parts checked, {report['results_count']} results -> {report_file}")
+    if args.strict and not report['conforms']:
+        raise SystemExit(f"{args.ttl} does not conform to {report['shapes']}, see {report_file}")
+    return df
+
+STAGES = [
+    ('map', stage_map),
+    ('merge', stage_merge),
+    ('dedup', stage_dedup),          # only with --dedup
+    ('categorize', stage_categorize),
+    ('standard', stage_standard),
+    ('filter', stage_filter),
+    ('prices', stage_prices),
+    ('enrich', stage_enrich),
+    ('ttl', stage_ttl),
+    ('validate', stage_validate),
+]
+
+# read_csv's default NA strings
+NA_STRINGS = {"", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+              "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null"}
+
+def as_read(df):
+    """df with the column types a CSV round trip would give it, without writing one:
+    text and mixed columns holding only numbers (or NA strings) become numeric, the
+    rest become str. The scripts only ever saw their input through read_csv, and some
+    of them behave differently on an object column of Python ints than on the
+    float64 column a CSV would have come back as."""
+    for col in df.columns:
+        ser = df[col]
+        if ser.dtype.kind in "fiub":
+            continue
+        na = ser.isna() | ser.isin(NA_STRINGS)
+        if na.any():
+            ser = ser.where(~na)
+        try:
+            df[col] = pd.to_numeric(ser)
+            continue
+        except (ValueError, TypeError):
+            pass
+        if ser.dtype == object:
+            df[col] = ser.astype("str")
+        elif na.any():
+            df[col] = ser
+    return df
+
+def run(df, stages, args, keep=(), keep_dir=None, log=print):
+    """Passes df through the (name, fn) stages; returns the final frame and a
+    (stage, seconds, rows in, rows out) report. Stages named in keep also write
+    their output to keep_dir/NN_<stage>.csv (not counted in the stage time). Between stages the columns are retyped as if
+    read back from CSV (as_read), so every stage sees what its script would."""
+    report = []
+    for k, (name, fn) in enumerate(stages):
+        rows_in = len(df)
+        t0 = time.perf_counter()
+        df = as_read(fn(df, args))
+        secs = time.perf_counter() - t0
+        report.append((name, secs, rows_in, len(df)))
+        log(f"{name:<11} {secs:>8.3f}s {rows_in:>8} -> {len(df)} rows")
+        if name in keep:
+            os.makedirs(keep_dir, exist_ok=True)
+            df.to_csv(os.path.join(keep_dir, f"{k:02d}_{name}.csv"), index=False)
+    return df, report
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--seed", default=SEED_CSV)
+    ap.add_argument("--fritzing", default=FRITZING_CSV)
+    ap.add_argument("--ttl", default=TTL_OUT, help="Turtle written by the ttl stage")
+    ap.add_argument("--out", help="also write the final catalog CSV here")
+    ap.add_argument("--skip", default="", help="comma-separated stages to leave out, e.g. prices")
+    ap.add_argument("--only", default="", help="comma-separated stages to run (default: all)")
+    ap.add_argument("--dedup", action="store_true", help="keep only the canonical rows of fuzzy duplicates after merge")
+    ap.add_argument("--keep-csv", metavar="DIR", help="write intermediate CSVs to DIR")
+    ap.add_argument("--keep-stages", default="", help="comma-separated stages to write (default: all, with --keep-csv)")
+    ap.add_argument("--price-cache", default=fetch_prices_token.CACHE_DB, help="SQLite price cache ('' disables it)")
+    ap.add_argument("--jobs", type=int, default=1, help="processes for the dedup stage")
+    ap.add_argument("--shacl-report", help="SHACL report of the validate stage (default: next to --ttl, .shacl.json)")
+    ap.add_argument("--strict", action="store_true", help="stop with an error if the Turtle does not conform to the shapes")
+    args = ap.parse_args()
+
+    names = [n for n, _ in STAGES]
+    split = lambda s: [x for x in s.split(",") if x]
+    for n in split(args.skip) + split(args.only) + split(args.keep_stages):
+        if n not in names:
+            raise SystemExit(f"unknown stage {n!r} (stages: {', '.join(names)})")
+    skip = set(split(args.skip)) | (set() if args.dedup else {'dedup'})
+    only = set(split(args.only)) or set(names)
+    stages = [(n, fn) for n, fn in STAGES if n in only and n not in skip]
+    keep = (set(split(args.keep_stages)) or set(names)) if args.keep_csv else set()
+
+    t0 = time.perf_counter()
+    df = pd.read_csv(args.seed)
+    t_load = time.perf_counter() - t0
+    print(f"{'load':<11} {t_load:>8.3f}s {len(df):>8} rows from {args.seed}")
+    df, report = run(df, stages, args, keep, args.keep_csv)
+    if args.out:
+        df.to_csv(args.out, index=False)
+    total = t_load + sum(r[1] for r in report)
+    print(f"{'total':<11} {total:>8.3f}s {len(df):>8} rows" + (f", written to {args.out}" if args.out else ""))
+
+if __name__ == "__main__":
+    main()
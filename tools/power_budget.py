@@ -0,0 +1,162 @@
+# filename: tools/power_budget.py
+# Power budget of a BOM on the columnar part table (part_table.py). Every part of the
+# BOM is put on a rail (the first requested rail inside its vccMin..vccMax, else its
+# own vccMin), its ex:iActive_mA / ex:iIdle_uA are summed per rail, and ex:PowerSupply
+# parts (adapters and regulators such as the LM2596 or AMS1117) that can feed each
+# loaded rail with some headroom are recommended.
+#
+# The catalog has no output property, and a part's vccMin..vccMax is its *input*
+# range, so a supply's output is derived once:
+#   - voltage: for regulators and adapters a fixed output named in the notes, label or
+#     MPN ("3.3V fixed output", "AMS1117-3.3", "78R05", "12V DC Adapter"); adjustable
+#     converters take their datasheet output range from ADJUSTABLE_OUT
+#   - capacity: a current in the label or notes ("50mA", "2A max"), else the datasheet
+#     rating in RATED_MA.
+# Raw sources (batteries, panels, chargers) need a regulator in front of a rail and are
+# not recommended; neither is anything without a known output voltage. Supplies are
+# indexed sorted by capacity, so a rail's candidates are a searchsorted slice masked by
+# output voltage, the tightest fit first. Supplies of the right voltage without a
+# rating are listed apart.
+import re
+import numpy as np
+from rdflib import Namespace
+
+from part_table import PartTable
+
+EX = Namespace("https://example.org/iotkb#")
+
+RAILS = (3.3, 5.0)       # rails parts are put on, in order of preference
+HEADROOM = 0.25          # a supply must deliver the rail's active current plus this share
+TOP_K = 3
+SUPPLY_KINDS = re.compile(r"regulator|adapter", re.I)   # kinds that output a rail
+ADJUSTABLE = re.compile(r"adjust|variable|step.?(up|down)|buck|boost|dc.?dc", re.I)
+# datasheet output ranges (V) of adjustable converters; others have no known output
+ADJUSTABLE_OUT = {"LM2596": (1.23, 37.0),    # buck, below its input
+                  "MT3608": (5.0, 28.0)}     # boost, above its 2-24 V input
+# datasheet output ratings (mA) for parts whose catalog entry doesn't state one
+RATED_MA = {"LM2596": 3000.0, "AMS1117": 1000.0, "LM1117": 800.0, "MT3608": 2000.0,
+            "KA78R05": 500.0, "POWERBOOST 500": 500.0}
+
+NUM = r"(?<![\d.])(\d+(?:\.\d+)?)\s*"
+VOLTS = re.compile(NUM + r"V(?![a-zA-Z])")
+AMPS = re.compile(NUM + r"(mA|A)(?![a-zA-Z])")
+SUFFIX_V = re.compile(r"-(\d\.\d)\b")            # AMS1117-3.3
+SERIES_78 = re.compile(r"78[A-Z]?(\d\d)\b")       # 7805, KA78R05
+
+def first_match(pattern, texts):
+    for t in texts:
+        m = pattern.search(t)
+        if m:
+            return m
+    return None
+
+def supply_output(table: PartTable, r: int):
+    """(out_min, out_max, capacity_mA) of one supply row; NaN when unknown (raw
+    sources and supplies without a stated output have no output voltage)."""
+    t = table
+    texts = [x for x in (t.notes[r], t.labels[r], t.mpn[r]) if x]
+    names = " ".join(texts).upper()
+    lo = hi = np.nan
+    if SUPPLY_KINDS.search(t.kind[r] or ""):
+        if first_match(ADJUSTABLE, texts):
+            lo, hi = next((out for key, out in ADJUSTABLE_OUT.items() if key in names), (np.nan, np.nan))
+        else:
+            m = first_match(VOLTS, texts) or first_match(SUFFIX_V, texts) or first_match(SERIES_78, texts)
+            if m:
+                lo = hi = float(m.group(1))
+    m = first_match(AMPS, texts)
+    if m:
+        cap = float(m.group(1)) * (1.0 if m.group(2) == "mA" else 1000.0)
+    else:
+        cap = next((ma for key, ma in RATED_MA.items() if key in names), np.nan)
+    return lo, hi, cap
+
+class PowerBudget:
+    def __init__(self, table: PartTable):
+        self.table = table
+        rows = table.rows_of_class(EX.PowerSupply).tolist()
+        out = np.array([supply_output(table, r) for r in rows], dtype=np.float64).reshape(-1, 3)
+        known = ~np.isnan(out[:, 0]) & ~np.isnan(out[:, 1])      # no output voltage: never recommended
+        rows, out = np.array(rows, dtype=np.int64)[known], out[known]
+        order = np.argsort(out[:, 2], kind="stable")             # by capacity, unrated (NaN) last
+        self.rows = rows[order]
+        self.out_min, self.out_max, self.cap = (out[order, j] for j in range(3))
+        self.rated = int((~np.isnan(self.cap)).sum())
+
+    def part_rows(self, parts) -> np.ndarray:
+        t = self.table
+        rows = []
+        for p in parts:
+            r = t.row_of.get(p, t.row_of.get(str(EX[p])))
+            if r is None:
+                raise KeyError(f"unknown part {p!r}")
+            rows.append(r)
+        return np.array(rows, dtype=np.int64)
+
+    def assign_rails(self, rows: np.ndarray, rails=RAILS) -> np.ndarray:
+        """Rail voltage per row: the first of rails inside the part's vccMin..vccMax
+        (missing bounds never reject), else the part's vccMin."""
+        t = self.table
+        r = np.asarray(rails, dtype=np.float64)
+        lo, hi = t.vcc_min[rows][:, None], t.vcc_max[rows][:, None]
+        fits = ~(r[None, :] < lo) & ~(r[None, :] > hi)
+        return np.where(fits.any(axis=1), r[fits.argmax(axis=1)], t.vcc_min[rows])
+
+    def supplies(self, v: float, load_mA: float, k: int = TOP_K):
+        """(rated, unrated) supply rows for a rail: rated ones delivering at least
+        load_mA at v, smallest capacity first, then up to k without a rating."""
+        start = int(np.searchsorted(self.cap[:self.rated], load_mA, side="left"))
+        fit = lambda s: s[~(v < self.out_min[s]) & ~(v > self.out_max[s])]
+        rated = fit(np.arange(start, self.rated))[:k]
+        unrated = fit(np.arange(self.rated, len(self.rows)))[:k]
+        return rated, unrated
+
+    def analyze(self, parts, rails=RAILS, headroom=HEADROOM, k=TOP_K) -> dict:
+        """Per-rail current totals of the BOM (part IRIs or ex: local names; a part
+        listed twice counts twice) and the supplies that cover each rail. Parts without
+        a current are counted in no_active / no_idle, so the totals are lower bounds."""
+        t = self.table
+        rows = self.part_rows(parts)
+        rail_v = self.assign_rails(rows, rails or RAILS)
+        nan_v = np.isnan(rail_v)
+        rail_v = np.where(nan_v, -1.0, rail_v)                   # parts without any voltage data
+        volts, inv = np.unique(rail_v, return_inverse=True)
+        active, idle = np.nan_to_num(t.i_active[rows]), np.nan_to_num(t.i_idle[rows])
+        n = len(volts)
+        sum_active = np.bincount(inv, weights=active, minlength=n)
+        sum_idle = np.bincount(inv, weights=idle, minlength=n)
+        counts = np.bincount(inv, minlength=n)
+        no_active = np.bincount(inv, weights=np.isnan(t.i_active[rows]), minlength=n).astype(int)
+        no_idle = np.bincount(inv, weights=np.isnan(t.i_idle[rows]), minlength=n).astype(int)
+
+        def supply(s, load):
+            r = self.rows[s]
+            cap = self.cap[s]
+            return {"iri": str(t.parts[r]), "label": t.labels[r], "kind": t.kind[r], "mpn": t.mpn[r],
+                    "out_min": float(self.out_min[s]), "out_max": float(self.out_max[s]),
+                    "capacity_mA": None if np.isnan(cap) else float(cap),
+                    "headroom_mA": None if np.isnan(cap) else round(float(cap) - load, 6),
+                    "price": t.value(t.price, r), "currency": t.currency[r]}
+
+        out_rails = []
+        for j, v in enumerate(volts.tolist()):
+            load = float(sum_active[j])
+            entry = {"v": None if v < 0 else v, "parts": int(counts[j]),
+                     "i_active_mA": round(load, 6), "i_idle_uA": round(float(sum_idle[j]), 6),
+                     "no_active": int(no_active[j]), "no_idle": int(no_idle[j]),
+                     "power_mW": None if v < 0 else round(v * load, 6)}
+            if v >= 0:
+                # nothing is recommended for a rail without any known load
+                need = load * (1.0 + headroom)
+                rated, unrated = self.supplies(v, need, k) if load > 0 else ([], [])
+                entry["load_mA"] = round(need, 6)
+                entry["supplies"] = [supply(s, load) for s in rated]
+                entry["unrated_supplies"] = [supply(s, load) for s in unrated]
+            out_rails.append(entry)
+        return {"parts": [{"iri": str(t.parts[r]), "label": t.labels[r], "rail": None if v < 0 else float(v),
+                           "i_active_mA": t.value(t.i_active, r), "i_idle_uA": t.value(t.i_idle, r)}
+                          for r, v in zip(rows.tolist(), rail_v.tolist())],
+                "rails": out_rails,
+                "total": {"i_active_mA": round(float(active.sum()), 6), "i_idle_uA": round(float(idle.sum()), 6),
+                          "power_mW": round(float((np.where(nan_v, 0.0, rail_v) * active).sum()), 6)},
+                "headroom": headroom}
@@ -2,9 +2,16 @@
 # usage examples:
 #   python3 tools/recommend.py --kb ontologies/iotkb_parts.ttl --cls SensorPart --need distance --iface GPIO_TRIGGER_ECHO --v 5.0 --budget 30
 #   python3 tools/recommend.py --kb ontologies/iotkb_parts.ttl --cls SensorPart --need motion --controller ELEGOO_ESP_WROOM_32_Bluetooth --v 5.0
+#   python3 tools/recommend.py --kb ontologies/iotkb_parts.ttl --controller Arduino_Mega_2560 --bom distance,motion,power_state --budget 30 --top-k 3
+#   python3 tools/recommend.py --kb ontologies/iotkb_parts.ttl --power Arduino_Mega_2560,L298N_Motor_Driver,TB6612FNG_Driver
 import argparse
-from rdflib import Graph, Namespace, URIRef, Literal
-from rdflib.namespace import RDF, XSD
+from rdflib import Graph, Namespace, URIRef
+from rdflib.namespace import RDF
+from kb_snapshot import load_graph
+from part_table import PartTable, decimal_val, label_of
+from bom_solver import BomSolver, TIME_BUDGET_MS, TOP_K
+from power_budget import PowerBudget, HEADROOM
+from i2c_addr import addrs, assign, fmt
 
 EX   = Namespace("https://example.org/iotkb#")
 SOSA = Namespace("http://www.w3.org/ns/sosa/")
@@ -20,7 +27,13 @@ def parse_args():
     p.add_argument("--iface", help="required interface token (GPIO, I2C, SPI, GPIO_TRIGGER_ECHO, ...)")
     p.add_argument("--controller", help="controller local name to derive interfaces from supportsInterface")
     p.add_argument("--v", type=float, help="supply voltage to check against vccMin/vccMax")
-    p.add_argument("--budget", type=float, help="max price to include (offerPrice <= budget)")
+    p.add_argument("--budget", type=float, help="max price to include (offerPrice <= budget; the BOM total with --bom)")
+    p.add_argument("--currency", help="with --bom: price BOMs in this currency only (e.g. EUR)")
+    p.add_argument("--bom", help="comma-separated needs: cheapest complete BOMs around --controller instead of one class")
+    p.add_argument("--top-k", type=int, default=TOP_K, help="BOMs to show with --bom, supplies per rail with --power")
+    p.add_argument("--time-budget-ms", type=float, default=TIME_BUDGET_MS, help="search time limit with --bom")
+    p.add_argument("--power", help="comma-separated part local names: per-rail current totals and supplies instead of one class")
+    p.add_argument("--headroom", type=float, default=HEADROOM, help="share of extra current a supply must deliver with --power")
     return p.parse_args()
 
 def get_controller_ifaces(g: Graph, ctrl_local: str):
@@ -41,31 +54,89 @@ def get_controller_ifaces(g: Graph, ctrl_local: str):
             toks.append(tok)
     return sorted(set(toks))
 
-def decimal_val(g: Graph, s: URIRef, p: URIRef):
-    for o in g.objects(s, p):
-        try:
-            if isinstance(o, Literal) and (o.datatype == XSD.decimal or o.datatype == XSD.double or o.datatype == XSD.float or o.datatype == XSD.integer):
-                return float(o)
-            # also accept plain literal with numeric string
-            return float(str(o))
-        except Exception:
-            continue
-    return None
-
 def string_vals(g: Graph, s: URIRef, p: URIRef):
     return [str(o) for o in g.objects(s, p)]
 
-def label_of(g: Graph, s: URIRef):
-    for o in g.objects(s, Namespace("http://www.w3.org/2000/01/rdf-schema#").label):
-        return str(o)
-    # fallback to local fragment
-    iri = str(s)
-    return iri.split("#")[-1]
+def print_boms(out):
+    if not out["boms"]:
+        print("No complete BOM found.")
+        if out["missing"]:
+            print(f"- No compatible part for: {', '.join(out['missing'])}")
+        return
+    for n, b in enumerate(out["boms"], 1):
+        rail = f"{b['rail']:.2f} V" if b["rail"] is not None else "any rail"
+        unpriced = f" + {b['unpriced']} unpriced" if b["unpriced"] else ""
+        print(f"BOM {n}: {rail}, {b['price']:.2f} {b['currency'] or ''}{unpriced}")
+        for p in b["parts"]:
+            ps = f"{p['price']:.2f}" if p["price"] is not None else "-"
+            addr = f"  I2C {p['i2c_addr']}" if p["i2c_addr"] else ""
+            print(f"  {','.join(p['needs']):<24} {p['label']:<40} {ps:>8} {p['currency'] or '':>3}{addr}")
+    if not out["complete"]:
+        print("(search stopped at the time budget; cheaper BOMs may exist)")
+
+def print_power(out):
+    for r in out["rails"]:
+        rail = f"{r['v']:.2f} V" if r["v"] is not None else "no voltage data"
+        unknown = f" ({r['no_active']} without a current)" if r["no_active"] else ""
+        print(f"{rail}: {r['parts']} parts, {r['i_active_mA']:.1f} mA active, {r['i_idle_uA']:.1f} uA idle{unknown}")
+        if r["v"] is None:
+            continue
+        if not r["i_active_mA"]:
+            print("  no known load, no supply suggested")
+            continue
+        if not r["supplies"]:
+            print(f"  no rated supply delivers {r['load_mA']:.1f} mA")
+        for s in r["supplies"]:
+            print(f"  {s['label']:<40} {s['capacity_mA']:>8.0f} mA  (+{s['headroom_mA']:.0f})")
+        for s in r["unrated_supplies"]:
+            print(f"  {s['label']:<40} {'unrated':>11}")
+    t = out["total"]
+    print(f"Total: {t['i_active_mA']:.1f} mA active, {t['i_idle_uA']:.1f} uA idle, {t['power_mW']:.0f} mW")
+
+def print_i2c(table, rows):
+    """Distinct I2C addresses for the listed parts that sit on the bus, or the
+    conflict if there are none (same check as --bom, i2c_addr.py)."""
+    bus = [(table.labels[r], table.i2c_mask(r)) for r in rows if table.i2c_bits[r].any()]
+    if len(bus) < 2:
+        return
+    got = assign([m for _, m in bus])
+    if got is None:
+        print("I2C conflict: these parts can't all get distinct addresses:")
+        for lab, m in bus:
+            print(f"  {lab:<40} {' '.join(fmt(a) for a in addrs(m))}")
+        return
+    print("I2C: " + ", ".join(f"{lab} {fmt(a)}" for (lab, _), a in zip(bus, got)))
 
 def main():
     args = parse_args()
-    g = Graph()
-    g.parse(args.kb, format="turtle")
+    g = load_graph([args.kb])
+
+    if args.power:
+        parts = [n.strip() for n in args.power.split(",") if n.strip()]
+        rails = [args.v] if args.v is not None else None
+        table = PartTable(g)
+        budget = PowerBudget(table)
+        try:
+            out = budget.analyze(parts, rails, args.headroom, args.top_k)
+        except KeyError as e:
+            raise SystemExit(str(e.args[0]))
+        print_power(out)
+        print_i2c(table, budget.part_rows(parts).tolist())
+        return
+
+    if args.bom:
+        if not args.controller:
+            raise SystemExit("--bom needs --controller")
+        solver = BomSolver(PartTable(g))
+        needs = [n.strip() for n in args.bom.split(",") if n.strip()]
+        try:
+            out = solver.solve(args.controller, needs, args.v, args.budget, args.top_k, args.time_budget_ms,
+                               args.currency)
+        except KeyError as e:
+            raise SystemExit(str(e.args[0]))
+        print(f"Controller: {out['controller']['label']}  needs: {', '.join(out['needs'])}")
+        print_boms(out)
+        return
 
     cls = local(args.cls)
 
@@ -93,50 +164,12 @@ def main():
     else:
         cap_ind = None
 
-    # collect candidates of requested class
-    candidates = []
-    for s in g.subjects(RDF.type, cls):
-        candidates.append(s)
-
-    # filter by capability
-    if cap_pred and cap_ind:
-        candidates = [s for s in candidates if (s, cap_pred, cap_ind) in g]
-
-    # filter by interface (hasInterface for parts; supportsInterface handled only on controller individuals)
-    if iface_required:
-        keep = []
-        for s in candidates:
-            part_ifaces = [label_of(g, i).strip() for i in g.objects(s, EX.hasInterface)]
-            if not part_ifaces:
-                # some rows might have no interface listed → skip if a constraint exists
-                continue
-            if any(tok in part_ifaces for tok in iface_required):
-                keep.append(s)
-        candidates = keep
-
-    # filter by voltage
-    if args.v is not None:
-        keep = []
-        for s in candidates:
-            vmin = decimal_val(g, s, EX.vccMin)
-            vmax = decimal_val(g, s, EX.vccMax)
-            ok = True
-            if vmin is not None and args.v < vmin: ok = False
-            if vmax is not None and args.v > vmax: ok = False
-            if ok: keep.append(s)
-        candidates = keep
-
-    # filter by budget
-    if args.budget is not None:
-        keep = []
-        for s in candidates:
-            price = decimal_val(g, s, EX.offerPrice)
-            if price is None or price <= args.budget:
-                keep.append(s)
-        candidates = keep
+    # all filters run as column / bitmask operations over the part table
+    table = PartTable(g)
+    candidates = table.select(cls, cap_pred, cap_ind, sorted(iface_required), args.v, args.budget)
 
     # pretty print
-    if not candidates:
+    if len(candidates) == 0:
         print("No candidates found.")
         if args.controller:
             print("Debugging…")
@@ -159,18 +192,9 @@ def main():
 
     # output table
     rows = []
-    for s in candidates:
-        lab   = label_of(g, s)
-        price = decimal_val(g, s, EX.offerPrice)
-        cur   = None
-        for o in g.objects(s, EX.priceCurrency):
-            cur = str(o); break
-        vmin  = decimal_val(g, s, EX.vccMin)
-        vmax  = decimal_val(g, s, EX.vccMax)
-        url   = None
-        for o in g.objects(s, EX.productURL):
-            url = str(o); break
-        rows.append((lab, price, cur or "", vmin, vmax, url or ""))
+    for r in candidates:
+        rows.append((table.labels[r], table.value(table.price, r), table.currency[r] or "",
+                     table.value(table.vcc_min, r), table.value(table.vcc_max, r), table.url[r] or ""))
 
     # sort by price then label
     rows.sort(key=lambda r: (float(r[1]) if r[1] is not None else 1e12, r[0]))
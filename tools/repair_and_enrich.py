@@ -1,9 +1,13 @@
 import pandas as pd
 import os
 import numpy as np
+from classify import KeywordMatcher
 
 # --- CONFIGURATION ---
 TARGET_CSV = 'data-entry/iotkb_priced.csv'
+# We skip 'part_label' and 'mpn' to keep the original identity
+# We skip 'offer_price' and 'currency' to keep the live pricing
+SKIP_COLS = ['part_label', 'mpn', 'offer_price', 'currency']
 
 # --- THE STANDARD LIBRARY (Rich Semantic Data) ---
 # [Keep the exact same STANDARD_PARTS list from before - it was correct]
@@ -32,6 +36,76 @@ STANDARD_PARTS = [
     {'part_label': 'L298N', 'mpn': 'L298N', 'category': 'actuator', 'kind': 'motor_driver', 'actuatable_property': 'motor_velocity', 'feature_of_interest': 'dc_motor', 'vcc_min': 5, 'vcc_max': 35, 'iface': 'GPIO|PWM'}
 ]
 
+class StandardIndex:
+    """STANDARD_PARTS compiled for matching: one keyword trie over the lowercased MPNs
+    and one over the lowercased labels. Each trie is a single regex scan over a whole
+    column, so finding the first matching standard part costs the same however long
+    the list gets (see classify.KeywordMatcher)."""
+
+    def __init__(self, parts):
+        self.parts = parts
+        self.mpns = KeywordMatcher((p.get('mpn', '').lower(), i) for i, p in enumerate(parts) if p.get('mpn', ''))
+        self.labels = KeywordMatcher((p.get('part_label', '').lower(), i) for i, p in enumerate(parts) if p.get('part_label', ''))
+        # an empty label is "in" every label
+        self.always = next((i for i, p in enumerate(parts) if not p.get('part_label', '')), None)
+        self.columns = list(dict.fromkeys(k for p in parts for k in p if k not in SKIP_COLS))
+
+    def match(self, mpns, labels) -> np.ndarray:
+        """Index of the first standard part (list order) whose MPN is inside the row's MPN
+        or whose label is inside the row's label, -1 if none."""
+        none = len(self.parts)
+        hit = np.minimum(np.where((m := self.mpns.first(mpns)) < 0, none, m),
+                         np.where((l := self.labels.first(labels)) < 0, none, l))
+        if self.always is not None:
+            hit = np.minimum(hit, self.always)
+        hit[hit == none] = -1
+        return hit
+
+    def values(self, col) -> tuple:
+        """(has, vals) per standard part for one column, as arrays to index by match()."""
+        has = np.array([col in p for p in self.parts], dtype=bool)
+        vals = np.empty(len(self.parts), dtype=object)
+        vals[:] = [p.get(col) for p in self.parts]
+        return has, vals
+
+def enrich(df, index) -> int:
+    """Overwrites the semantic columns of every row matching a standard part; returns
+    the number of rows updated."""
+    win = index.match([str(x).lower() for x in df['mpn']], [str(x).lower() for x in df['part_label']])
+    rows = np.flatnonzero(win >= 0)
+    win = win[rows]
+    # new columns appear in the order the matched parts list them
+    for w in pd.unique(win):
+        for key in index.parts[w]:
+            if key not in SKIP_COLS and key not in df.columns:
+                df[key] = np.nan
+    for col in index.columns:
+        has, vals = index.values(col)
+        sel = has[win]
+        if not sel.any():
+            continue
+        v = vals[win[sel]]
+        if df[col].dtype.kind in 'fiub':
+            if all(isinstance(x, (int, float, np.number)) for x in v):
+                # an int column stays int (7 is written as 7, not 7.0) unless a
+                # fraction has to go in
+                kind = df[col].dtype.kind
+                if kind == 'b' or (kind in 'iu' and not all(float(x).is_integer() for x in v)):
+                    df[col] = df[col].astype('float64')
+                v = v.astype(df[col].dtype)
+            else:
+                # a text value into a numeric column: widen it, as a per-cell write would
+                df[col] = df[col].astype(object)
+        df.iloc[rows[sel], df.columns.get_loc(col)] = v
+    return len(rows)
+
+def repair(df) -> int:
+    """main() on a DataFrame, in place: returns the number of rows enriched."""
+    # Clean up string columns to ensure matching works
+    df['part_label'] = df['part_label'].astype(str)
+    df['mpn'] = df['mpn'].astype(str)
+    return enrich(df, StandardIndex(STANDARD_PARTS))
+
 def main():
     if not os.path.exists(TARGET_CSV):
         print(f"Error: {TARGET_CSV} not found.")
@@ -40,47 +114,8 @@ def main():
     print(f"Reading {TARGET_CSV}...")
     df = pd.read_csv(TARGET_CSV)
 
-    # Clean up string columns to ensure matching works
-    df['part_label'] = df['part_label'].astype(str)
-    df['mpn'] = df['mpn'].astype(str)
-
-    updates_count = 0
-    
     print("Repairing rows with rich semantic data...")
-    
-    for index, row in df.iterrows():
-        row_label = row['part_label'].lower()
-        row_mpn = row['mpn'].lower()
-        
-        match_found = None
-        
-        # Heuristic Matching
-        for part in STANDARD_PARTS:
-            std_mpn = part.get('mpn', '').lower()
-            std_label = part.get('part_label', '').lower()
-            
-            # 1. Strong Match: MPN contains key string (e.g. 'hc-sr04' in 'Ultrasonic HC-SR04')
-            if std_mpn and std_mpn in row_mpn:
-                match_found = part
-                break
-            
-            # 2. Weak Match: Label contains standard label
-            if std_label in row_label:
-                match_found = part
-                break
-        
-        if match_found:
-            # FORCE UPDATE semantic fields
-            # We skip 'part_label' and 'mpn' to keep the original identity
-            # We skip 'offer_price' and 'currency' to keep the live pricing
-            skip_cols = ['part_label', 'mpn', 'offer_price', 'currency']
-            
-            for key, val in match_found.items():
-                if key not in skip_cols:
-                    df.at[index, key] = val
-            
-            # print(f"  -> Updated {row['part_label']}") # Uncomment for verbosity
-            updates_count += 1
+    updates_count = repair(df)
 
     # Save
     df.to_csv(TARGET_CSV, index=False)
@@ -0,0 +1,469 @@
+#!/usr/bin/env python3
+# usage:
+#   python3 tools/shacl_validate.py [--data ontologies/iotkb_parts.ttl] \
+#       [--shapes tools/shapes.shacl.ttl] [--ontology ontologies/iotkb_schema.ttl] \
+#       [--report ontologies/iotkb_parts.shacl.json] [--full] [--strict]
+#
+# Validates the catalog Turtle against tools/shapes.shacl.ttl without a generic SHACL
+# engine. The shapes are compiled into per-class count checks (sh:targetClass with
+# its rdfs:subClassOf closure, sh:minCount / sh:maxCount on IRI paths, sh:or of those);
+# anything else in the shapes file is refused rather than silently skipped. The data
+# is loaded into a small int triple store holding only rdf:type, rdfs:subClassOf and
+# the shapes' paths, and each check is one NumPy comparison over a shape's focus nodes.
+#
+# Turtle written one predicate per line (csv2ttl_v3.py's layout) is read by a line
+# scanner; anything else goes through rdflib (the report's fallback says why). The
+# scanner keeps a digest of every subject's statements in a state file next to the
+# report; the next run only parses and checks the subjects whose statements changed
+# (or disappeared) and keeps the previous report's results for the rest. Changed shapes or ontology files, a
+# changed class hierarchy, or --full validate everything.
+#
+# The report is JSON: conforms, counts, timings and one entry per result with the
+# SHACL result fields (focusNode, resultPath, sourceShape - the node shape -,
+# sourceConstraintComponent, resultSeverity, resultMessage) as full IRIs.
+
+import argparse, hashlib, json, os, re, time
+from array import array
+import numpy as np
+from rdflib import Graph, Literal, URIRef
+from rdflib.collection import Collection
+from rdflib.namespace import RDF, RDFS, XSD, Namespace
+
+from kb_snapshot import file_sha256, parse_sources
+
+SH = Namespace("http://www.w3.org/ns/shacl#")
+DATA_TTL = "ontologies/iotkb_parts.ttl"
+SHAPES_TTL = "tools/shapes.shacl.ttl"
+SCHEMA_TTL = "ontologies/iotkb_schema.ttl"
+STATE_VERSION = 1
+
+def report_path(data):
+    return os.path.splitext(data)[0] + ".shacl.json"
+
+def state_path(report):
+    return os.path.splitext(report)[0] + ".state.json"
+
+# --- compiling the shapes ---
+
+NODE_KEYS = {RDF.type, SH.targetClass, SH.property, SH["or"], SH.message, SH.severity, SH.deactivated,
+             RDFS.label, RDFS.comment}
+PROP_KEYS = {SH.path, SH.minCount, SH.maxCount, SH.message, SH.severity, SH.name, SH.description}
+
+class Shape:
+    """A node shape as count checks. counts: (path, min, max, message, severity) per
+    sh:property; alternatives: the sh:or branches, each a list of (path, min, max)
+    that must all hold, or None."""
+
+    def __init__(self, iri, targets, counts, alternatives, message, severity):
+        self.iri, self.targets = iri, targets
+        self.counts, self.alternatives = counts, alternatives
+        self.message, self.severity = message, severity
+
+    def paths(self):
+        out = {c[0] for c in self.counts}
+        for alt in self.alternatives or ():
+            out.update(c[0] for c in alt)
+        return out
+
+def _check_keys(g, node, allowed, what):
+    extra = sorted(str(p) for p in set(g.predicates(node)) if p not in allowed)
+    if extra:
+        raise ValueError(f"{what} {node}: unsupported {', '.join(extra)}")
+
+def _str(v):
+    return None if v is None else str(v)
+
+def _count_checks(g, node):
+    out = []
+    for ps in g.objects(node, SH.property):
+        _check_keys(g, ps, PROP_KEYS, "property shape")
+        path = g.value(ps, SH.path)
+        if not isinstance(path, URIRef):
+            raise ValueError(f"property shape {ps}: only IRI paths are supported")
+        hi = g.value(ps, SH.maxCount)
+        out.append((str(path), int(g.value(ps, SH.minCount, default=Literal(0))), None if hi is None else int(hi),
+                    _str(g.value(ps, SH.message)), _str(g.value(ps, SH.severity))))
+    return out
+
+def compile_shapes(path) -> list:
+    """The node shapes of a shapes file as Shape objects (ValueError on constructs
+    the checks cannot express)."""
+    g = parse_sources([path])
+    shapes = []
+    for node in sorted(set(g.subjects(RDF.type, SH.NodeShape)) | set(g.subjects(SH.targetClass))):
+        _check_keys(g, node, NODE_KEYS, "node shape")
+        if g.value(node, SH.deactivated) == Literal(True):
+            continue
+        alternatives = None
+        ors = list(g.objects(node, SH["or"]))
+        if len(ors) > 1:
+            raise ValueError(f"node shape {node}: more than one sh:or")
+        for lst in ors:
+            alternatives = []
+            for member in Collection(g, lst):
+                _check_keys(g, member, {RDF.type, SH.property}, "sh:or member")
+                alternatives.append([c[:3] for c in _count_checks(g, member)])
+        shapes.append(Shape(str(node), sorted(str(c) for c in g.objects(node, SH.targetClass)),
+                            _count_checks(g, node), alternatives, _str(g.value(node, SH.message)),
+                            str(g.value(node, SH.severity, default=SH.Violation))))
+    return shapes
+
+# --- the triple store ---
+
+TYPE, SUBCLASS = str(RDF.type), str(RDFS.subClassOf)
+ID_BITS = 28   # term ids per column in the packed (predicate, subject, object) keys
+
+class TripleStore:
+    """rdf:type, rdfs:subClassOf and the given predicates' triples over interned
+    terms (IRIs as plain strings, literals in N3 form, kept apart by their leading
+    quote). Other predicates are dropped while loading. freeze() packs the triples
+    into one sorted int64 key per distinct triple."""
+
+    def __init__(self, preds):
+        self.preds = {p: k for k, p in enumerate([TYPE, SUBCLASS] + sorted(set(preds) - {TYPE, SUBCLASS}))}
+        self.ids, self.names = {}, []
+        self.cols = (array("q"), array("q"), array("q"))
+        self._counts = {}
+
+    def term(self, t) -> int:
+        i = self.ids.get(t)
+        if i is None:
+            i = self.ids[t] = len(self.names)
+            self.names.append(t)
+        return i
+
+    def add(self, s, k, o):
+        S, P, O = self.cols
+        S.append(self.term(s)); P.append(k); O.append(self.term(o))
+
+    def add_graph(self, g):
+        for p, k in self.preds.items():
+            for s, o in g.subject_objects(URIRef(p)):
+                self.add(s.n3() if not isinstance(s, URIRef) else str(s), k,
+                         o.n3() if not isinstance(o, URIRef) else str(o))
+
+    def freeze(self):
+        if len(self.names) >= 1 << ID_BITS:
+            raise ValueError(f"more than {1 << ID_BITS} terms")
+        S, P, O = (np.frombuffer(c, dtype=np.int64) if len(c) else np.zeros(0, np.int64) for c in self.cols)
+        self.keys = np.unique((P << (2 * ID_BITS)) | (S << ID_BITS) | O)
+        self.bounds = np.searchsorted(self.keys, np.arange(len(self.preds) + 1, dtype=np.int64) << (2 * ID_BITS))
+        self._counts = {}
+        return self
+
+    def pairs(self, pred):
+        """(subjects, objects) of a predicate's triples, sorted."""
+        k = self.preds[pred]
+        keys = self.keys[self.bounds[k]:self.bounds[k + 1]]
+        mask = (1 << ID_BITS) - 1
+        return (keys >> ID_BITS) & mask, keys & mask
+
+    def counts(self, pred) -> np.ndarray:
+        """Distinct objects of pred per term id."""
+        if pred not in self._counts:
+            self._counts[pred] = np.bincount(self.pairs(pred)[0], minlength=len(self.names))
+        return self._counts[pred]
+
+    def subclasses(self, cls):
+        """Term ids of cls and everything rdfs:subClassOf it, transitively."""
+        if cls not in self.ids:
+            return set()
+        sub, sup = self.pairs(SUBCLASS)
+        below = {}
+        for a, b in zip(sub.tolist(), sup.tolist()):
+            below.setdefault(b, []).append(a)
+        seen, todo = set(), [self.ids[cls]]
+        while todo:
+            c = todo.pop()
+            if c not in seen:
+                seen.add(c)
+                todo.extend(below.get(c, ()))
+        return seen
+
+    def instances(self, classes) -> np.ndarray:
+        """Sorted term ids typed with any of the classes or their subclasses."""
+        ids = set()
+        for c in classes:
+            ids |= self.subclasses(c)
+        s, o = self.pairs(TYPE)
+        return np.unique(s[np.isin(o, np.fromiter(ids, dtype=np.int64, count=len(ids)))])
+
+    def hierarchy_digest(self) -> str:
+        sub, sup = self.pairs(SUBCLASS)
+        pairs = sorted(f"{self.names[a]} {self.names[b]}" for a, b in zip(sub.tolist(), sup.tolist()))
+        return hashlib.sha256("\n".join(pairs).encode("utf-8")).hexdigest()
+
+# --- reading csv2ttl-style Turtle ---
+
+OBJ = r'"(?:[^"\\\n]|\\.)*"(?:\^\^[^\s;,]+|@[A-Za-z][A-Za-z0-9-]*)?|<[^<>"\s]*>|[^\s"<>;,#]+'
+OBJ_RE = re.compile(OBJ)
+PO_LINE = re.compile(rf"\s*(\S+)\s+((?:{OBJ})(?:\s*,\s*(?:{OBJ}))*)\s*([;.])\s*")
+PREFIX = re.compile(r"@prefix\s+([\w-]*):\s*<([^<>\s]*)>\s*\.\s*")
+LITERAL = re.compile(r'("(?:[^"\\\n]|\\.)*")(?:\^\^([^\s;,]+)|(@[A-Za-z][A-Za-z0-9-]*))?')
+BARE = {"true": str(XSD.boolean), "false": str(XSD.boolean)}
+
+def statements(path, prefixes):
+    """(subject token, lines) per statement of Turtle written with one predicate (or a
+    comma list) per line, each ending in ";" or "." - a statement ends at the first
+    line ending in "."; @prefix lines are added to prefixes as they come. The lines
+    are only checked when read (predicate_objects)."""
+    subj, lines = None, []
+    with open(path, encoding="utf-8") as f:
+        for n, line in enumerate(f, 1):
+            if subj is None:
+                head = line.lstrip()
+                if not head or head.startswith("#"):
+                    continue
+                if line.startswith("@prefix"):
+                    m = PREFIX.fullmatch(line)
+                    if m is None:
+                        raise ValueError(f"{path}:{n}: unreadable @prefix")
+                    prefixes[m[1]] = m[2]
+                    continue
+                if head is not line or line[0] in "@[(":
+                    raise ValueError(f"{path}:{n}: not a subject line")
+                subj = line.split(None, 1)[0]
+            lines.append(line)
+            if line.rstrip().endswith("."):
+                yield subj, lines
+                subj, lines = None, []
+    if subj is not None:
+        raise ValueError(f"{path}: unterminated statement at the end")
+
+def predicate_objects(subj, lines):
+    """[(predicate token, objects text)] of a statement (ValueError if a line holds
+    anything but one predicate and its objects)."""
+    pos = []
+    for k, line in enumerate(lines):
+        rest = line[line.index(subj) + len(subj):] if k == 0 else line
+        m = PO_LINE.fullmatch(rest)
+        if m is None:
+            if k and k == len(lines) - 1 and rest.strip() == ".":   # a lone "." closing the statement
+                break
+            raise ValueError(f"statement {subj}: not one predicate per line: {line.strip()!r}")
+        if (m[3] == ".") != (k == len(lines) - 1):
+            raise ValueError(f"statement {subj}: misplaced '.'")
+        pos.append((m[1], m[2]))
+    return pos
+
+def expand(tok, prefixes) -> str:
+    """Store key of a Turtle term token (see TripleStore)."""
+    c = tok[0]
+    if c == "<":
+        return tok[1:-1]
+    if c == '"':
+        m = LITERAL.fullmatch(tok)
+        if m[2]:
+            return f"{m[1]}^^<{expand(m[2], prefixes)}>"
+        return m[1] + (m[3] or "")
+    if tok == "a":
+        return TYPE
+    pfx, sep, local = tok.partition(":")
+    if sep and pfx in prefixes:
+        return prefixes[pfx] + local
+    if tok in BARE:
+        return f'"{tok}"^^<{BARE[tok]}>'
+    if re.fullmatch(r"[+-]?\d+", tok):
+        return f'"{tok}"^^<{XSD.integer}>'
+    if re.fullmatch(r"[+-]?\d*\.\d+", tok):
+        return f'"{tok}"^^<{XSD.decimal}>'
+    raise ValueError(f"cannot read term {tok!r}")
+
+def add_statement(store, subj, lines, prefixes, pred_ids):
+    """Adds a statement's triples of the store's predicates; pred_ids caches the
+    predicate tokens seen so far (store index or None)."""
+    s = None
+    for p, objs in predicate_objects(subj, lines):
+        k = pred_ids.get(p, -1)
+        if k == -1:
+            k = pred_ids[p] = store.preds.get(expand(p, prefixes))
+        if k is not None:
+            s = s or expand(subj, prefixes)
+            for o in OBJ_RE.findall(objs):
+                store.add(s, k, expand(o, prefixes))
+
+def scan(path, store, previous=None, only=None):
+    """Loads path into store. Returns {subject: statement digest}, the subjects with a
+    statement left out because its digest matched previous (statements that mention
+    rdfs:subClassOf are always read) and the prefixes. With only, reads just those
+    subjects' statements."""
+    prefixes, digests, skipped, pred_ids, known = {}, {}, set(), {}, {}
+    for subj, lines in statements(path, prefixes):
+        if prefixes != known:   # a prefix (re)defined: the cached predicate ids are stale
+            pred_ids, known = {}, dict(prefixes)
+        if only is not None:
+            if subj in only:
+                add_statement(store, subj, lines, prefixes, pred_ids)
+            continue
+        text = "".join(lines)
+        d = hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+        if subj in digests:   # statements about one subject spread over the file
+            d = hashlib.blake2b((digests[subj] + d).encode("ascii"), digest_size=8).hexdigest()
+        digests[subj] = d
+        if previous is not None and previous.get(subj) == d and "subClassOf" not in text:
+            skipped.add(subj)
+        else:
+            add_statement(store, subj, lines, prefixes, pred_ids)
+    return digests, skipped, prefixes
+
+# --- checking ---
+
+def check(store, shapes, scope=None) -> list:
+    """Results for every shape's focus nodes (only those in scope, sorted term ids,
+    when given) and the number of focus nodes checked."""
+    results, checked = [], np.zeros(0, dtype=np.int64)
+    def emit(nodes, shape, path, component, message, severity):
+        for f in nodes.tolist():
+            results.append({"focusNode": store.names[f], "resultPath": path, "sourceShape": shape.iri,
+                            "sourceConstraintComponent": str(SH[component]),
+                            "resultSeverity": severity or shape.severity, "resultMessage": message})
+    for shape in shapes:
+        focus = store.instances(shape.targets)
+        if scope is not None:
+            focus = np.intersect1d(focus, scope, assume_unique=True)
+        if not len(focus):
+            continue
+        checked = np.union1d(checked, focus)
+        for path, lo, hi, message, severity in shape.counts:
+            n = store.counts(path)[focus]
+            if lo:
+                emit(focus[n < lo], shape, path, "MinCountConstraintComponent",
+                     message or f"Less than {lo} values on {path}", severity)
+            if hi is not None:
+                emit(focus[n > hi], shape, path, "MaxCountConstraintComponent",
+                     message or f"More than {hi} values on {path}", severity)
+        if shape.alternatives is not None:
+            ok = np.zeros(len(focus), dtype=bool)
+            for alt in shape.alternatives:
+                branch = np.ones(len(focus), dtype=bool)
+                for path, lo, hi in alt:
+                    n = store.counts(path)[focus]
+                    branch &= n >= lo
+                    if hi is not None:
+                        branch &= n <= hi
+                ok |= branch
+            emit(focus[~ok], shape, None, "OrConstraintComponent",
+                 shape.message or "Value does not conform to any shape in sh:or", None)
+    return results, len(checked)
+
+def result_key(r):
+    return r["focusNode"], r["sourceShape"], r["resultPath"] or "", r["sourceConstraintComponent"]
+
+def validate(data, shapes_path=SHAPES_TTL, ontologies=(SCHEMA_TTL,), previous=None, full=False):
+    """Validates data; returns the report and the state for the next run. previous is
+    (report, state) of the last run, used unless full or its shapes/ontologies differ."""
+    t0 = time.perf_counter()
+    shapes = compile_shapes(shapes_path)
+    paths = set().union(*(s.paths() for s in shapes))
+    config = hashlib.sha256("|".join(file_sha256(p) for p in [shapes_path, *ontologies]).encode("ascii")).hexdigest()
+    old_report, old_state = previous or (None, None)
+    if full or not old_state or old_state.get("version") != STATE_VERSION or old_state.get("config") != config:
+        old_report = old_state = None
+    onto = parse_sources(ontologies) if ontologies else Graph()
+    t_compile = time.perf_counter() - t0
+
+    def load(prev_blocks):
+        store = TripleStore(paths)
+        store.add_graph(onto)
+        digests, skipped, prefixes = scan(data, store, prev_blocks)
+        return store.freeze(), digests, skipped, prefixes
+
+    t0 = time.perf_counter()
+    mode, fallback = ("incremental" if old_state else "full"), None
+    try:
+        store, digests, skipped, prefixes = load(old_state["blocks"] if old_state else None)
+        if old_state and (prefixes != old_state.get("prefixes") or store.hierarchy_digest() != old_state.get("classes")):
+            mode, old_report, old_state = "full", None, None
+            store, digests, skipped, prefixes = load(None)
+    except ValueError as e:   # not csv2ttl's layout: parse it properly, no state
+        mode, old_report, old_state, digests, skipped = "full (rdflib)", None, None, None, set()
+        fallback = str(e)
+        store = TripleStore(paths)
+        store.add_graph(onto)
+        store.add_graph(parse_sources([data]))
+        store.freeze()
+
+    scope, touched, iris = None, set(), set()
+    if old_state:
+        prev_blocks = old_state["blocks"]
+        touched = {s for s, d in digests.items() if prev_blocks.get(s) != d}
+        touched.update(s for s in prev_blocks if s not in digests)
+        partial = touched & skipped   # changed subjects with a statement skipped above
+        if partial:
+            scan(data, store, only=partial)
+            store.freeze()
+        iris = {expand(s, prefixes) for s in touched}
+        scope = np.array(sorted(store.ids[i] for i in iris if i in store.ids), dtype=np.int64)
+    t_load = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    results, checked = check(store, shapes, scope)
+    if old_report is not None:
+        results += [r for r in old_report["results"] if r["focusNode"] not in iris]
+    results.sort(key=result_key)
+    t_check = time.perf_counter() - t0
+
+    by_shape = {s.iri: 0 for s in shapes}
+    for r in results:
+        by_shape[r["sourceShape"]] += 1
+    report = {
+        "conforms": not any(r["resultSeverity"] == str(SH.Violation) for r in results),
+        "data": data, "shapes": shapes_path, "ontologies": list(ontologies), "mode": mode,
+        "fallback": fallback,
+        "subjects": len(digests) if digests is not None else None,
+        "checked": checked,
+        "changed": len(touched) if old_state else None,
+        "results_count": len(results), "by_shape": by_shape,
+        "seconds": {"compile": round(t_compile, 4), "load": round(t_load, 4), "check": round(t_check, 4)},
+        "results": results,
+    }
+    state = None
+    if digests is not None:
+        state = {"version": STATE_VERSION, "config": config, "prefixes": prefixes,
+                 "classes": store.hierarchy_digest(), "blocks": digests}
+    return report, state
+
+def run(data, report_file=None, shapes_path=SHAPES_TTL, ontologies=(SCHEMA_TTL,), full=False) -> dict:
+    """validate() against the report and state files of the last run, then rewrites them."""
+    report_file = report_file or report_path(data)
+    previous = None
+    if not full and os.path.exists(report_file) and os.path.exists(state_path(report_file)):
+        try:
+            with open(report_file, encoding="utf-8") as f, open(state_path(report_file), encoding="utf-8") as g:
+                previous = json.load(f), json.load(g)
+        except ValueError:
+            previous = None
+    report, state = validate(data, shapes_path, ontologies, previous, full)
+    with open(report_file, "w", encoding="utf-8") as f:
+        json.dump(report, f)
+    if state is not None:
+        with open(state_path(report_file), "w", encoding="utf-8") as f:
+            json.dump(state, f)
+    elif os.path.exists(state_path(report_file)):
+        os.remove(state_path(report_file))
+    return report
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--data", default=DATA_TTL)
+    ap.add_argument("--shapes", default=SHAPES_TTL)
+    ap.add_argument("--ontology", action="append", help=f"class hierarchy source (repeatable, default {SCHEMA_TTL})")
+    ap.add_argument("--report", help="JSON report (default: next to --data, .shacl.json)")
+    ap.add_argument("--full", action="store_true", help="ignore the last run's state and check every part")
+    ap.add_argument("--strict", action="store_true", help="exit 1 if the data does not conform")
+    args = ap.parse_args()
+
+    report_file = args.report or report_path(args.data)
+    ontologies = [p for p in (args.ontology or [SCHEMA_TTL]) if p]
+    report = run(args.data, report_file, args.shapes, ontologies, args.full)
+    sec = report["seconds"]
+    print(f"{report['mode']}: {report['checked']} parts checked, {report['results_count']} results "
+          f"({sec['compile']:.3f}s compile, {sec['load']:.3f}s load, {sec['check']:.3f}s check)")
+    for shape, n in report["by_shape"].items():
+        print(f"  {shape}: {n}")
+    print("conforms" if report["conforms"] else "does not conform", "- report:", report_file)
+    if args.strict and not report["conforms"]:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()